@@ -0,0 +1,222 @@
+# bench_booking.py
+#
+# Concurrent-user booking benchmark. Seeds a scratch database with users, flights and
+# existing bookings, then runs simulated passengers on their own threads (and SQLite
+# connections) against the service layer. Run from the project root:
+#
+#   python -m benchmarks.bench_booking --users 1000 --flights 20 --passengers 16 --duration 10
+#
+# Besides throughput and latency it reports how often a statement hit SQLITE_BUSY and had
+# to be retried, and checks afterwards that no flight was sold beyond its capacity.
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from src import services
+from src.utils import data_generator, db_client
+from src.utils.metrics import percentile
+
+def seed_database(client, users, flights, bookings, capacity, seed):
+    """
+    Seeds users, flights and bookings with the synthetic data generator.
+
+    Args:
+        client: The database client instance.
+        users (int): Number of passengers.
+        flights (int): Number of flights.
+        bookings (int): Number of bookings created up front.
+        capacity (int): Seats per flight, or None to keep the generated seat counts.
+        seed (int): Random seed.
+
+    Returns:
+        tuple: (user_ids, flight_numbers, capacities) where capacities maps every
+        flight id to its number of seats before any booking.
+    """
+    data_generator.load_dataset(client, users, flights, bookings, admin_ratio=0.0, capacity=capacity, seed=seed)
+    user_ids = [row[0] for row in client.execute("SELECT id FROM users WHERE is_admin = 0")]
+    flight_numbers = [row[0] for row in client.execute("SELECT flight_number FROM flights")]
+    capacities = dict(client.execute("""
+        SELECT f.id, f.available_seats + COALESCE(SUM(b.tickets), 0)
+        FROM flights f LEFT JOIN bookings b ON b.flight_id = f.id
+        GROUP BY f.id
+    """).fetchall())
+    return user_ids, flight_numbers, capacities
+
+def check_oversell(client, capacities):
+    """
+    Compares every flight's bookings with its capacity.
+
+    Returns:
+        dict: Number of flights sold beyond capacity, with negative seat counts, and whose
+        seat counter disagrees with their bookings.
+    """
+    rows = client.execute("""
+        SELECT f.id, f.available_seats, COALESCE(SUM(b.tickets), 0)
+        FROM flights f LEFT JOIN bookings b ON b.flight_id = f.id
+        GROUP BY f.id
+    """).fetchall()
+    return {
+        "oversold_flights": sum(1 for flight_id, _, booked in rows if booked > capacities[flight_id]),
+        "negative_seat_counts": sum(1 for _, available, _ in rows if available < 0),
+        "seat_counter_mismatches": sum(1 for flight_id, available, booked in rows if available + booked != capacities[flight_id]),
+    }
+
+class Passenger(threading.Thread):
+    """
+    A simulated passenger running a random mix of operations on its own connection.
+    """
+    def __init__(self, index, user_ids, flight_numbers, mix, think_time, deadline, max_retries, seed):
+        super().__init__(daemon=True)
+        self.rng = random.Random(seed + index)
+        self.user_id = user_ids[index % len(user_ids)]
+        self.flight_numbers = flight_numbers
+        self.operations, self.weights = zip(*mix.items())
+        self.think_time = think_time
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.latencies = {}
+        self.outcomes = {}
+        self.busy_retries = 0
+        self.busy_failures = 0
+        self.booking_ids = []
+
+    def _with_retry(self, func, *args):
+        # The busy handler gives up after DatabaseClient.timeout; retry a few times with
+        # jittered backoff before counting the operation as failed.
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                if attempt == self.max_retries:
+                    self.busy_failures += 1
+                    raise
+                self.busy_retries += 1
+                time.sleep(self.rng.uniform(0, 0.005 * 2 ** attempt))
+
+    def _run_operation(self, client, operation):
+        if operation == "schedule":
+            self._with_retry(services.list_flights, client)
+        elif operation == "my_bookings":
+            self._with_retry(services.my_bookings, client, self.user_id)
+        elif operation == "book":
+            result = self._with_retry(services.book, client, self.user_id, self.rng.choice(self.flight_numbers), self.rng.randint(1, 4))
+            self.booking_ids.append(result.booking_id)
+        else:
+            booking_id = self.booking_ids.pop(self.rng.randrange(len(self.booking_ids)))
+            self._with_retry(services.cancel, client, booking_id, self.user_id)
+
+    def run(self):
+        client = db_client.DatabaseClient()
+        try:
+            while time.perf_counter() < self.deadline:
+                operation = self.rng.choices(self.operations, self.weights)[0]
+                if operation == "cancel" and not self.booking_ids:
+                    operation = "book"
+
+                started = time.perf_counter()
+                try:
+                    self._run_operation(client, operation)
+                    outcome = "ok"
+                except services.NotEnoughSeatsError:
+                    outcome = "sold_out"
+                except sqlite3.OperationalError:
+                    outcome = "busy"
+                self.latencies.setdefault(operation, []).append(time.perf_counter() - started)
+                key = f"{operation} {outcome}"
+                self.outcomes[key] = self.outcomes.get(key, 0) + 1
+
+                if self.think_time:
+                    time.sleep(self.rng.expovariate(1 / self.think_time))
+        finally:
+            client.close()
+
+def summarize(elapsed, passengers):
+    latencies = {}
+    outcomes = {}
+    for passenger in passengers:
+        for operation, values in passenger.latencies.items():
+            latencies.setdefault(operation, []).extend(values)
+        for key, count in passenger.outcomes.items():
+            outcomes[key] = outcomes.get(key, 0) + count
+
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+    summary = {
+        "operations": len(all_latencies),
+        "seconds": round(elapsed, 3),
+        "operations_per_second": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(all_latencies, 0.50) * 1000, 3),
+            "p90": round(percentile(all_latencies, 0.90) * 1000, 3),
+            "p99": round(percentile(all_latencies, 0.99) * 1000, 3),
+            "max": round((all_latencies[-1] if all_latencies else 0.0) * 1000, 3),
+        },
+        "busy_retries": sum(passenger.busy_retries for passenger in passengers),
+        "busy_failures": sum(passenger.busy_failures for passenger in passengers),
+        "per_operation": {},
+        "outcomes": dict(sorted(outcomes.items())),
+    }
+    for operation, values in sorted(latencies.items()):
+        values.sort()
+        summary["per_operation"][operation] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent passengers booking flights.")
+    parser.add_argument("--db", help="database file to seed (default: a temporary file)")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--flights", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=2000, help="bookings created before the run")
+    parser.add_argument("--capacity", type=int, help="seats per flight (default: the generated seat counts)")
+    parser.add_argument("--passengers", type=int, default=16, help="concurrent simulated passengers")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between a passenger's operations")
+    parser.add_argument("--mix", default="schedule=40,my_bookings=20,book=30,cancel=10",
+                        help="operation weights, e.g. schedule=50,book=50")
+    parser.add_argument("--busy-timeout", type=float, default=0.05, help="seconds SQLite waits for a lock before SQLITE_BUSY")
+    parser.add_argument("--max-retries", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-bench-"), "bench_booking.db")
+    db_client.DatabaseClient.db_path = db_path
+    db_client.DatabaseClient.timeout = args.busy_timeout
+    client = db_client.DatabaseClient()
+
+    user_ids, flight_numbers, capacities = seed_database(client, args.users, args.flights, args.bookings, args.capacity, args.seed)
+    print(f"Seeded {len(user_ids)} users, {len(flight_numbers)} flights into {db_path}")
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    passengers = [
+        Passenger(i, user_ids, flight_numbers, mix, args.think_time, deadline, args.max_retries, args.seed)
+        for i in range(args.passengers)
+    ]
+    for passenger in passengers:
+        passenger.start()
+    for passenger in passengers:
+        passenger.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(elapsed, passengers)
+    summary.update(check_oversell(client, capacities))
+    summary["config"] = {key: value for key, value in vars(args).items() if key != "json"}
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
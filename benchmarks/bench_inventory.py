@@ -0,0 +1,183 @@
+# bench_inventory.py
+#
+# Seat inventory benchmark. Seeds a scratch database, then runs concurrent booking threads
+# against a set of fresh flights three ways: services.book (one read, update and insert per
+# transaction), SeatInventory.book (admitted in memory, durable once its group commit is
+# done) and SeatInventory.reserve (admission only, the writer persists behind it). Run from
+# the project root:
+#
+#   python -m benchmarks.bench_inventory --threads 16 --duration 5
+#
+# Afterwards it checks the seat counters against the bookings with seat_reconciliation, and
+# times recovering a fresh inventory from the bookings table, including after reservations
+# that were admitted but never persisted (as if the process had died).
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from src import services
+from src.inventory import SeatInventory
+from src.utils import data_generator, db_client, flight_generator, seat_reconciliation
+from src.utils.metrics import percentile
+
+class Booker(threading.Thread):
+    """
+    Books random flights until the deadline, timing every attempt.
+    """
+    def __init__(self, index, book, user_ids, flight_numbers, deadline, seed):
+        super().__init__(daemon=True)
+        self.rng = random.Random(seed + index)
+        self.book = book
+        self.user_ids = user_ids
+        self.flight_numbers = flight_numbers
+        self.deadline = deadline
+        self.latencies = []
+        self.booked = 0
+        self.sold_out = 0
+        self.reservations = []
+
+    def run(self):
+        try:
+            while time.perf_counter() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    result = self.book(self.rng.choice(self.user_ids), self.rng.choice(self.flight_numbers), self.rng.randint(1, 4))
+                    self.booked += 1
+                    if hasattr(result, "wait"):
+                        self.reservations.append(result)
+                except services.NotEnoughSeatsError:
+                    self.sold_out += 1
+                self.latencies.append(time.perf_counter() - started)
+        finally:
+            db_client.DatabaseClient().close()
+
+def run_bookers(book, threads, duration, user_ids, flight_numbers, seed):
+    """
+    Returns:
+        dict: Throughput, outcomes and latency percentiles of the run.
+    """
+    deadline = time.perf_counter() + duration
+    bookers = [Booker(i, book, user_ids, flight_numbers, deadline, seed) for i in range(threads)]
+    started = time.perf_counter()
+    for booker in bookers:
+        booker.start()
+    for booker in bookers:
+        booker.join()
+    for booker in bookers:
+        for reservation in booker.reservations:
+            reservation.wait()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for booker in bookers for latency in booker.latencies)
+    return {
+        "attempts": len(latencies),
+        "booked": sum(booker.booked for booker in bookers),
+        "sold_out": sum(booker.sold_out for booker in bookers),
+        "seconds": round(elapsed, 3),
+        "attempts_per_second": round(len(latencies) / elapsed, 1),
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+    }
+
+class CrashedInventory(SeatInventory):
+    """
+    An inventory whose writer dies on start, so nothing it admits is ever persisted.
+    """
+    def _run(self):
+        pass
+
+def add_flights(client, run, count, seats):
+    """
+    Adds `count` empty flights of `seats` seats, so every run starts with seats to sell.
+
+    Returns:
+        list[str]: Their flight numbers.
+    """
+    generator = flight_generator.RandomFlightGenerator()
+    flights = []
+    for i in range(count):
+        flight = generator.generate_random_flight()
+        flight[1] = f"{run}{i:05d}"
+        flight[2] = seats
+        flights.append(flight)
+    client.executemany("""
+        INSERT INTO flights (flight_schedule, flight_number, available_seats, from_location, to_location, departure_time, arrival_time, flight_time, gate, distance, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, flights)
+    client.commit()
+    return [flight[1] for flight in flights]
+
+def check(client):
+    report = seat_reconciliation.reconcile_seats(client)
+    return {"drifted_flights": len(report.drifted), "orphaned_bookings": report.orphaned_bookings}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking through the in-memory seat inventory.")
+    parser.add_argument("--db", help="database file to seed (default: a temporary file)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--flights", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=200000, help="bookings created before the runs")
+    parser.add_argument("--run-flights", type=int, default=1000, help="flights added for every run, the ones its threads book")
+    parser.add_argument("--seats", type=int, default=500, help="seats of every added flight")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-bench-"), "bench_inventory.db")
+    db_client.DatabaseClient.db_path = db_path
+    client = db_client.DatabaseClient()
+    data_generator.load_dataset(client, args.users, args.flights, args.bookings, admin_ratio=0.0, seed=args.seed)
+    user_ids = [row[0] for row in client.execute("SELECT id FROM users WHERE is_admin = 0")]
+    print(f"Seeded {len(user_ids)} users, {args.flights} flights, {args.bookings} bookings into {db_path}")
+
+    results = {}
+    flight_numbers = add_flights(client, "SB", args.run_flights, args.seats)
+    results["services.book"] = run_bookers(lambda user_id, flight_number, tickets: services.book(db_client.DatabaseClient(), user_id, flight_number, tickets),
+                                           args.threads, args.duration, user_ids, flight_numbers, args.seed)
+
+    inventory = SeatInventory(client)
+    started = time.perf_counter()
+    inventory.start()
+    results["recovery_seconds"] = round(time.perf_counter() - started, 3)
+    for run, name, book in (("IB", "inventory.book", inventory.book), ("IR", "inventory.reserve", inventory.reserve)):
+        flight_numbers = add_flights(client, run, args.run_flights, args.seats)
+        batches, persisted = inventory.batches, inventory.persisted
+        results[name] = run_bookers(book, args.threads, args.duration, user_ids, flight_numbers, args.seed)
+        results[name]["bookings_per_commit"] = round((inventory.persisted - persisted) / max(inventory.batches - batches, 1), 1)
+    inventory.close()
+    results["consistency"] = check(client)
+
+    # Reservations admitted by an inventory whose writer never ran are lost with it; a new
+    # inventory must come back with the counters the bookings table implies.
+    crashed = CrashedInventory(client).start()
+    for i in range(1000):
+        try:
+            crashed.reserve(user_ids[i % len(user_ids)], flight_numbers[i % len(flight_numbers)], 1)
+        except services.NotEnoughSeatsError:
+            pass
+    recovered = SeatInventory(client)
+    corrected = recovered.recover()
+    expected = dict(client.execute("SELECT flight_number, available_seats FROM flights WHERE flight_number IN (SELECT value FROM json_each(?))",
+                                   (json.dumps(flight_numbers),)).fetchall())
+    results["recovery_after_crash"] = {
+        "corrected_flights": corrected,
+        "mismatched_counters": sum(1 for number in flight_numbers if recovered.seats(number) != expected[number]),
+    }
+
+    for name in ("services.book", "inventory.book", "inventory.reserve"):
+        result = results[name]
+        print(f"{name:<18} {result['attempts_per_second']:>10,.0f} attempts/s  p50 {result['p50_us']:>9,.1f} us  p99 {result['p99_us']:>10,.1f} us"
+              + (f"  {result['bookings_per_commit']} bookings/commit" if "bookings_per_commit" in result else ""))
+    print(json.dumps({key: value for key, value in results.items() if "." not in key}, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# bench_manifest.py
+#
+# Flight manifest benchmark. Seeds a scratch database with background bookings, fills one
+# large flight, churns its bookings with cancellations and rebookings (so its rows end up
+# scattered through the bookings table), then times reading its manifest. Run from the
+# project root:
+#
+#   python -m benchmarks.bench_manifest --seats 500 --churn 20000
+#
+# Compares the old admin query (SELECT users.*, bookings.* over a three-way join, fetched
+# at once and sliced in Python) with services.flight_manifest, with and without the
+# covering index on bookings (flight_id, user_id, tickets).
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from src import services
+from src.utils import data_generator, db_client, flight_generator
+from src.utils.metrics import percentile
+
+MANIFEST_FLIGHT = "MF-500"
+INDEX_NAME = "idx_bookings_flight_user"
+INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_bookings_flight_user ON bookings (flight_id, user_id, tickets)"
+
+def legacy_manifest(client, flight_number):
+    rows = client.execute("""
+        SELECT users.*, bookings.*
+        FROM flights
+        INNER JOIN bookings ON flights.id = bookings.flight_id
+        INNER JOIN users ON bookings.user_id = users.id
+        WHERE flights.flight_number = ?
+    """, (flight_number,)).fetchall()
+    return [row[:6] for row in rows]
+
+def streamed_manifest(client, flight_number):
+    return list(services.flight_manifest(client, flight_number))
+
+def seed_flight(client, seats, rng):
+    """
+    Adds the manifest flight and books it until it is sold out.
+
+    Returns:
+        tuple: (user_ids, booking_ids) of the passengers that can book and the flight's bookings.
+    """
+    flight = flight_generator.RandomFlightGenerator().generate_random_flight()
+    flight[1] = MANIFEST_FLIGHT
+    flight[2] = seats
+    client.execute("""
+        INSERT INTO flights (flight_schedule, flight_number, available_seats, from_location, to_location, departure_time, arrival_time, flight_time, gate, distance, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, flight)
+    client.commit()
+    user_ids = [row[0] for row in client.execute("SELECT id FROM users WHERE is_admin = 0")]
+    booking_ids = []
+    fill(client, user_ids, booking_ids, rng)
+    return user_ids, booking_ids
+
+def fill(client, user_ids, booking_ids, rng):
+    tickets = rng.randint(1, 4)
+    while True:
+        try:
+            booking_ids.append(services.book(client, rng.choice(user_ids), MANIFEST_FLIGHT, tickets).booking_id)
+        except services.NotEnoughSeatsError:
+            if tickets == 1:
+                return
+            tickets = 1
+        else:
+            tickets = rng.randint(1, 4)
+
+def churn(client, user_ids, booking_ids, rounds, rng):
+    """
+    Cancels a random booking and books the freed seats again, `rounds` times.
+
+    Returns:
+        float: Seconds spent.
+    """
+    started = time.perf_counter()
+    for _ in range(rounds):
+        booking_id = booking_ids.pop(rng.randrange(len(booking_ids)))
+        services.cancel(client, booking_id)
+        fill(client, user_ids, booking_ids, rng)
+    return time.perf_counter() - started
+
+def measure(client, manifest, runs):
+    """
+    Returns:
+        dict: Rows per manifest and p50/p99/max latency in milliseconds.
+    """
+    latencies = []
+    rows = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = len(manifest(client, MANIFEST_FLIGHT))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "rows": rows,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reading a large flight's passenger manifest.")
+    parser.add_argument("--db", help="database file to seed (default: a temporary file)")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--flights", type=int, default=5000, help="background flights")
+    parser.add_argument("--bookings", type=int, default=300000, help="background bookings")
+    parser.add_argument("--seats", type=int, default=500, help="seats of the manifest flight")
+    parser.add_argument("--churn", type=int, default=20000, help="cancel-and-rebook rounds on the manifest flight")
+    parser.add_argument("--runs", type=int, default=200, help="manifest reads (a tenth of them for the slow variants)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-bench-"), "bench_manifest.db")
+    db_client.DatabaseClient.db_path = db_path
+    client = db_client.DatabaseClient()
+    data_generator.load_dataset(client, args.users, args.flights, args.bookings, admin_ratio=0.0, seed=args.seed)
+    user_ids, booking_ids = seed_flight(client, args.seats, rng)
+    churn_seconds = churn(client, user_ids, booking_ids, args.churn, rng)
+    total = client.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
+    print(f"{len(booking_ids)} bookings on {MANIFEST_FLIGHT} among {total} after {args.churn} churn rounds "
+          f"({args.churn / churn_seconds:,.0f} rounds/s) in {db_path}")
+
+    results = {
+        "churn_rounds_per_second": round(args.churn / churn_seconds, 1),
+        "legacy join, fetchall": measure(client, legacy_manifest, max(1, args.runs // 10)),
+        "flight_manifest": measure(client, streamed_manifest, args.runs),
+    }
+    client.execute(f"DROP INDEX {INDEX_NAME}")
+    results["flight_manifest, no index"] = measure(client, streamed_manifest, max(1, args.runs // 10))
+    client.execute(INDEX_DDL)
+    client.commit()
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench_passenger_search.py
+#
+# Passenger search benchmark. Seeds a scratch database with synthetic users (the loader
+# builds the full-text index once they are inserted), then times services.search_passengers
+# for the kinds of fragments agents type, and a LIKE '%x%' scan of the users table for
+# comparison. Run from the project root:
+#
+#   python -m benchmarks.bench_passenger_search --users 5000000 --db search.db
+#
+# Reusing --db skips the seeding on later runs. The run fails (exit status 1) if the p99 of
+# any kind of search is above --target-ms.
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from src import services
+from src.utils import data_generator, db_client, schema
+from src.utils.metrics import percentile
+
+LIKE_QUERY = """
+    SELECT id, name, age, email, phone_number, is_admin FROM users
+    WHERE is_admin = 0 AND (name LIKE ? OR email LIKE ? OR phone_number LIKE ?)
+    LIMIT 20
+"""
+
+def build_queries(client, count, rng):
+    """
+    Derives search texts of every kind from randomly picked users.
+
+    Returns:
+        dict[str, list[str]]: Search texts keyed by kind.
+    """
+    max_id = client.execute("SELECT MAX(id) FROM users").fetchone()[0]
+    queries = {"full name": [], "last name": [], "name fragment": [], "email fragment": [], "phone fragment": [], "exact email": []}
+    while len(queries["exact email"]) < count:
+        row = client.execute("SELECT name, email, phone_number FROM users WHERE id = ?", (rng.randint(1, max_id),)).fetchone()
+        if row is None:
+            continue
+        name, email, phone_number = row
+        last_name = name.split()[-1]
+        local = email.split("@")[0]
+        start = rng.randrange(max(1, len(local) - 6))
+        queries["full name"].append(name)
+        queries["last name"].append(last_name)
+        queries["name fragment"].append(last_name[:rng.randint(3, max(3, len(last_name)))])
+        queries["email fragment"].append(local[start:start + 6])
+        queries["phone fragment"].append(phone_number[-8:])
+        queries["exact email"].append(email)
+    return queries
+
+def measure(func, texts):
+    latencies = []
+    for text in texts:
+        started = time.perf_counter()
+        func(text)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full-text passenger search.")
+    parser.add_argument("--db", help="database file to use; seeded if it has fewer users than --users (default: a temporary file)")
+    parser.add_argument("--users", type=int, default=5000000)
+    parser.add_argument("--queries", type=int, default=200, help="search texts per kind")
+    parser.add_argument("--like-queries", type=int, default=5, help="LIKE scans per kind, 0 to skip them")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target-ms", type=float, default=10.0, help="p99 latency every kind of search must stay under")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-bench-"), "bench_passenger_search.db")
+    db_client.DatabaseClient.db_path = db_path
+    client = db_client.DatabaseClient()
+    schema.create_schema(client)
+    existing = client.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if existing < args.users:
+        data_generator.load_dataset(client, args.users - existing, 0, 0, admin_ratio=0.0, seed=args.seed)
+    print(f"Searching {client.execute('SELECT COUNT(*) FROM users').fetchone()[0]} users in {db_path}")
+
+    queries = build_queries(client, args.queries, random.Random(args.seed))
+    results = {}
+    for kind, texts in queries.items():
+        results[kind] = {
+            "page 1": measure(lambda text: services.search_passengers(client, text), texts),
+            "page 3": measure(lambda text: services.search_passengers(client, text, page=3), texts),
+        }
+        if args.like_queries:
+            results[kind]["LIKE scan"] = measure(
+                lambda text: client.execute(LIKE_QUERY, (f"%{text}%",) * 3).fetchall(), texts[:args.like_queries])
+        print(f"{kind:<16} page 1 p50 {results[kind]['page 1']['p50_ms']:>7} ms  p99 {results[kind]['page 1']['p99_ms']:>7} ms"
+              + (f"   LIKE p50 {results[kind]['LIKE scan']['p50_ms']:>9} ms" if args.like_queries else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    slow = [f"{kind} {page} p99 {result[page]['p99_ms']} ms" for kind, result in results.items()
+            for page in ("page 1", "page 3") if result[page]["p99_ms"] > args.target_ms]
+    if slow:
+        raise SystemExit(f"Above the {args.target_ms} ms p99 target: " + ", ".join(slow))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# bench_row_mapping.py
+#
+# Compares ways of turning 'users' rows into Python objects: plain tuples, sqlite3.Row,
+# the dict-backed Passenger objects the admin screens used to build (and convert with
+# to_dict()), the __slots__ Passenger model and the UserRecord named tuple, the last two
+# built by a row factory. Run from the project root:
+#
+#   python -m benchmarks.bench_row_mapping --rows 1000000
+#
+# For every mapping it reports rows per second for fetching and building all rows, and the
+# memory held and peak memory per row (from tracemalloc, in a separate run so tracing does
+# not skew the timing).
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from src.models import Passenger
+from src.services import UserRecord
+from src.utils import data_generator, db_client, schema
+from src.utils.db_client import record_factory
+
+USERS_QUERY = "SELECT * FROM users"
+
+class DictPassenger:
+    """
+    The Passenger model as it was before it got __slots__: attributes live in a per-instance dict.
+    """
+    def __init__(self, _id, name, age, email, password=None, phone_number=None):
+        self.name = name
+        self.password = password
+        self.id = _id
+        self.age = age
+        self.email = email
+        self.phone_number = phone_number
+
+    def to_dict(self):
+        return {
+            "ID": self.id,
+            "Name": self.name,
+            "Age": self.age,
+            "Email": self.email,
+            "Phone Number": self.phone_number
+        }
+
+def _tuples(client):
+    return client.query(USERS_QUERY, row_factory=None).fetchall()
+
+def _sqlite_rows(client):
+    return client.query(USERS_QUERY).fetchall()
+
+def _dict_passengers(client):
+    return [DictPassenger(row[0], row[1], row[2], row[3], row[4], row[5]) for row in client.execute(USERS_QUERY)]
+
+def _dict_passenger_display_rows(client):
+    # What display_all_passengers used to hand to tabulate.
+    return [list(passenger.to_dict().values()) for passenger in _dict_passengers(client)]
+
+def _slotted_passengers(client):
+    return client.query(USERS_QUERY, row_factory=record_factory(Passenger)).fetchall()
+
+def _user_records(client):
+    return client.query(USERS_QUERY, row_factory=lambda cursor, row: UserRecord.from_row(row)).fetchall()
+
+MAPPINGS = {
+    "tuple": _tuples,
+    "sqlite3.Row": _sqlite_rows,
+    "dict Passenger": _dict_passengers,
+    "dict Passenger + to_dict rows": _dict_passenger_display_rows,
+    "slots Passenger": _slotted_passengers,
+    "UserRecord": _user_records,
+}
+
+def measure_time(client, mapping, repeat):
+    """
+    Returns:
+        tuple: (rows, best seconds over `repeat` runs).
+    """
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = mapping(client)
+        elapsed = time.perf_counter() - started
+        rows = len(result)
+        del result
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+def measure_memory(client, mapping):
+    """
+    Returns:
+        tuple: (bytes held by the mapped result, peak bytes while mapping), both per row.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = mapping(client)
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rows = max(len(result), 1)
+    return (held - before) / rows, (peak - before) / rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mapping 'users' rows to Python objects.")
+    parser.add_argument("--db", help="database file to use; seeded if it has fewer users than --rows (default: a temporary file)")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per mapping, the best one is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-bench-"), "bench_row_mapping.db")
+    db_client.DatabaseClient.db_path = db_path
+    client = db_client.DatabaseClient()
+    schema.create_schema(client)
+    existing = client.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if existing < args.rows:
+        data_generator.load_dataset(client, args.rows - existing, 0, 0, seed=args.seed)
+    print(f"Mapping {client.execute('SELECT COUNT(*) FROM users').fetchone()[0]} users from {db_path}")
+
+    results = {}
+    baseline = None
+    for name, mapping in MAPPINGS.items():
+        rows, seconds = measure_time(client, mapping, args.repeat)
+        bytes_per_row, peak_per_row = measure_memory(client, mapping)
+        if baseline is None:
+            baseline = bytes_per_row
+        results[name] = {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds),
+            "bytes_per_row": round(bytes_per_row, 1),
+            "bytes_per_row_over_tuple": round(bytes_per_row - baseline, 1),
+            "peak_bytes_per_row": round(peak_per_row, 1),
+        }
+        print(f"{name:<30} {rows / seconds:>10,.0f} rows/s {bytes_per_row:>7.1f} B/row held "
+              f"({bytes_per_row - baseline:+.1f} vs tuple) {peak_per_row:>7.1f} B/row peak")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# bench_validation.py
+#
+# Compares the per-call validators of validate_inputs with the batch ValidationEngine.
+# Run from the project root:
+#
+#   python -m benchmarks.bench_validation --rows 200000
+
+import argparse
+import random
+import re
+import time
+from src.utils import validate_inputs
+from src.utils.validation_engine import PASSENGER_VALIDATOR
+
+def generate_rows(count, invalid_ratio, seed):
+    """
+    Generates passenger rows as they would come out of a CSV file.
+
+    Args:
+        count (int): Number of rows to generate.
+        invalid_ratio (float): Share of rows with one broken field.
+        seed (int): Random seed.
+
+    Returns:
+        list[dict]: The generated rows.
+    """
+    rng = random.Random(seed)
+    broken = {
+        "name": "  ",
+        "age": "abc",
+        "email": "not-an-email",
+        "password": "abc",
+        "phone_number": "phone",
+    }
+    rows = []
+    for i in range(count):
+        row = {
+            "name": f"Passenger {i}",
+            "age": str(rng.randint(1, 90)),
+            "email": f"passenger{i}@example.com",
+            "password": "secret123",
+            "phone_number": f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        }
+        if rng.random() < invalid_ratio:
+            field = rng.choice(list(broken))
+            row[field] = broken[field]
+        rows.append(row)
+    return rows
+
+def validate_per_call(rows):
+    """
+    Validates rows one field at a time with the raising validators.
+
+    Args:
+        rows (list[dict]): The rows to validate.
+
+    Returns:
+        int: The number of invalid rows.
+    """
+    invalid = 0
+    for row in rows:
+        try:
+            validate_inputs.validate_non_empty_string(row["name"], "Name")
+            validate_inputs.validate_positive_integer(row["age"], "Age")
+            validate_inputs.validate_email(row["email"])
+            validate_inputs.validate_password(row["password"])
+            validate_inputs.validate_phone_number(row["phone_number"])
+        except ValueError:
+            invalid += 1
+    return invalid
+
+def validate_per_call_uncompiled(rows):
+    """
+    Validates rows like `validate_per_call`, but passes the email and phone number patterns
+    to `re.match` as strings on every call, as `validate_inputs` used to.
+
+    Args:
+        rows (list[dict]): The rows to validate.
+
+    Returns:
+        int: The number of invalid rows.
+    """
+    email_pattern = validate_inputs.EMAIL_PATTERN.pattern
+    phone_number_pattern = validate_inputs.PHONE_NUMBER_PATTERN.pattern
+    invalid = 0
+    for row in rows:
+        try:
+            validate_inputs.validate_non_empty_string(row["name"], "Name")
+            validate_inputs.validate_positive_integer(row["age"], "Age")
+            if not re.match(email_pattern, row["email"]):
+                raise ValueError("Invalid email format")
+            validate_inputs.validate_password(row["password"])
+            if not re.match(phone_number_pattern, row["phone_number"]):
+                raise ValueError("Invalid phone number format")
+        except ValueError:
+            invalid += 1
+    return invalid
+
+def validate_batch(rows, chunk_size):
+    """
+    Validates rows with the batch engine in chunks.
+
+    Args:
+        rows (list[dict]): The rows to validate.
+        chunk_size (int): Rows per batch.
+
+    Returns:
+        int: The number of invalid rows.
+    """
+    invalid = 0
+    for start in range(0, len(rows), chunk_size):
+        invalid += len(PASSENGER_VALIDATOR.validate_rows(rows[start:start + chunk_size]).errors)
+    return invalid
+
+def best_of(repeat, func, *args):
+    """
+    Runs a function several times and keeps the fastest run.
+
+    Returns:
+        tuple: (seconds, result) of the fastest run.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call vs batch input validation.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.05)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows, args.invalid_ratio, args.seed)
+    results = [
+        ("per-call, uncompiled patterns", best_of(args.repeat, validate_per_call_uncompiled, rows)),
+        ("per-call, precompiled patterns", best_of(args.repeat, validate_per_call, rows)),
+        ("batch engine", best_of(args.repeat, validate_batch, rows, args.chunk_size)),
+    ]
+
+    baseline = results[0][1][0]
+    print(f"rows: {args.rows}, invalid ratio: {args.invalid_ratio}")
+    for label, (elapsed, invalid) in results:
+        print(f"{label:32} {elapsed:.3f}s  {args.rows / elapsed:>12,.0f} rows/s  "
+              f"{baseline / elapsed:.2f}x  invalid: {invalid}")
+
+if __name__ == "__main__":
+    main()
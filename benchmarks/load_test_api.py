@@ -0,0 +1,230 @@
+# load_test_api.py
+#
+# Load test of the HTTP/JSON API. Seeds a scratch database, starts the server in-process
+# and drives it with keep-alive connections running a mix of searches, bookings,
+# cancellations and my-bookings lookups. Run from the project root:
+#
+#   python -m benchmarks.load_test_api --connections 32 --duration 10
+#
+# Pass --url to target an already running server instead (it must already hold the
+# users loadtest<N>@example.com / loadtest123, e.g. from an earlier run's --db).
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+from src import services
+from src.api_server import ApiServer
+from src.utils import db_client, flight_generator, rate_limiter, schema
+from src.utils.metrics import percentile
+
+PASSWORD = "loadtest123"
+
+def seed_database(client, users, flights, seed):
+    """
+    Creates the schema, `flights` random flights and `users` passengers.
+
+    Returns:
+        list[str]: The emails of the seeded passengers.
+    """
+    random.seed(seed)
+    schema.create_schema(client)
+    generator = flight_generator.RandomFlightGenerator()
+    with services.transaction(client):
+        client.executemany("""
+            INSERT INTO flights (flight_schedule, flight_number, available_seats, from_location, to_location, departure_time, arrival_time, flight_time, gate, distance, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, generator.generate_flights(flights))
+
+    emails = [f"loadtest{i}@example.com" for i in range(users)]
+    for i, email in enumerate(emails):
+        services.register(client, f"Load Test {i}", 30, email, PASSWORD, "555-123-4567")
+    return emails
+
+class Connection:
+    """
+    Minimal keep-alive HTTP/1.1 client connection.
+    """
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.token = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if self.token:
+            head += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + payload)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+async def run_client(host, port, email, deadline, mix, latencies, statuses, rng):
+    connection = Connection(host, port)
+    await connection.open()
+    try:
+        while True:
+            status, body = await connection.request("POST", "/login", {"email": email, "password": PASSWORD})
+            statuses[f"login {status}"] = statuses.get(f"login {status}", 0) + 1
+            if status != 503 or time.perf_counter() >= deadline:
+                break
+            await asyncio.sleep(rng.uniform(0.01, 0.1))
+        if status != 200:
+            return
+        connection.token = body["token"]
+
+        status, flights = await connection.request("GET", "/flights")
+        flight_numbers = [flight["flight_number"] for flight in flights]
+        booking_ids = []
+        operations, weights = zip(*mix.items())
+
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation == "cancel" and not booking_ids:
+                operation = "book"
+
+            started = time.perf_counter()
+            if operation == "search":
+                status, _ = await connection.request("GET", "/flights")
+            elif operation == "my_bookings":
+                status, _ = await connection.request("GET", "/bookings")
+            elif operation == "book":
+                status, body = await connection.request("POST", "/bookings", {"flight_number": rng.choice(flight_numbers), "tickets": 1})
+                if status == 201:
+                    booking_ids.append(body["booking_id"])
+            else:
+                status, _ = await connection.request("DELETE", f"/bookings/{booking_ids.pop(rng.randrange(len(booking_ids)))}")
+            latencies.setdefault(operation, []).append(time.perf_counter() - started)
+            key = f"{operation} {status}"
+            statuses[key] = statuses.get(key, 0) + 1
+    finally:
+        connection.close()
+
+async def run_load(host, port, emails, connections, duration, mix, seed):
+    latencies = {}
+    statuses = {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        run_client(host, port, emails[i % len(emails)], deadline, mix, latencies, statuses, random.Random(seed + i))
+        for i in range(connections)
+    ])
+    return time.perf_counter() - started, latencies, statuses
+
+def summarize(elapsed, latencies, statuses):
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+    summary = {
+        "requests": len(all_latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(all_latencies, 0.50) * 1000, 3),
+            "p90": round(percentile(all_latencies, 0.90) * 1000, 3),
+            "p99": round(percentile(all_latencies, 0.99) * 1000, 3),
+            "max": round((all_latencies[-1] if all_latencies else 0.0) * 1000, 3),
+        },
+        "per_operation": {},
+        "statuses": dict(sorted(statuses.items())),
+    }
+    for operation, values in sorted(latencies.items()):
+        values.sort()
+        summary["per_operation"][operation] = {
+            "requests": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    return summary
+
+def start_server_thread(workers, max_pending):
+    """
+    Runs an ApiServer on a free local port in a background thread.
+
+    Returns:
+        tuple: (port, stop) where stop() shuts the server down.
+    """
+    loop = asyncio.new_event_loop()
+    server = ApiServer(db_client.DatabaseClient(), workers=workers, max_pending=max_pending)
+    port = loop.run_until_complete(server.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return port, stop
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP/JSON API.")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--db", help="database file to seed (default: a temporary file)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--flights", type=int, default=20)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--mix", default="search=50,my_bookings=20,book=20,cancel=10",
+                        help="operation weights, e.g. search=50,book=50")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+    emails = [f"loadtest{i}@example.com" for i in range(args.users)]
+
+    stop = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="airline-load-"), "load_test.db")
+        db_client.DatabaseClient.db_path = db_path
+        # every simulated passenger logs in from 127.0.0.1
+        rate_limiter.LoginRateLimiter.source_capacity = max(args.connections, rate_limiter.LoginRateLimiter.source_capacity)
+        client = db_client.DatabaseClient()
+        seed_database(client, args.users, args.flights, args.seed)
+        print(f"Seeded {args.users} users and {args.flights} flights into {db_path}")
+        host = "127.0.0.1"
+        port, stop = start_server_thread(args.workers, args.max_pending)
+
+    try:
+        elapsed, latencies, statuses = asyncio.run(run_load(host, port, emails, args.connections, args.duration, mix, args.seed))
+    finally:
+        if stop is not None:
+            stop()
+
+    summary = summarize(elapsed, latencies, statuses)
+    summary["config"] = {key: value for key, value in vars(args).items() if key != "json"}
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
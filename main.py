@@ -1,8 +1,12 @@
 # main.py
 
-from src import admin, auth, debug, passenger
+import argparse
+import json
+import sys
+from src import admin, auth, batch_runner, debug, passenger
+from src.hold_sweeper import HoldSweeper
 from src.models import Menu, MenuItem, MenuSystem
-from src.utils import db_client, flight_generator, user_manual
+from src.utils import db_client, flight_generator, logging_setup, profiling, schema, tracing, user_manual
 
 
 class ReservationSystem:
@@ -11,14 +15,20 @@ class ReservationSystem:
 
     It initializes the database, sets up menus, and handles user interactions.
     """
-    def __init__(self):
+    def __init__(self, profile_dir=None, profile_mode="cpu"):
         """
         Initializes the ReservationSystem instance.
 
         Sets up the menu system, database client, flight generator, and creates tables in the database.
         Generates initial flights and inserts them into the database.
         Configures the main, admin, and passenger menus.
+
+        Args:
+            profile_dir (str): If set, every menu action is profiled and its profile written to this directory.
+            profile_mode (str): "cpu" (cProfile), "memory" (tracemalloc) or "both".
         """
+        if profile_dir:
+            profiling.ActionProfiler().configure(profile_dir, profile_mode)
         self.menu_system = MenuSystem()
         self.db_client = db_client.DatabaseClient()
         self.flight_generator = flight_generator.RandomFlightGenerator()
@@ -28,46 +38,7 @@ class ReservationSystem:
         self.flight_generator.print_flights(flights)
 
         # setup db schema
-        self.db_client.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                phone_number TEXT NOT NULL,
-                is_admin BOOLEAN NOT NULL
-            )
-        """)
-
-        self.db_client.execute("""
-            CREATE TABLE IF NOT EXISTS flights (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                flight_schedule TEXT NOT NULL,
-                flight_number TEXT NOT NULL,
-                available_seats INTEGER NOT NULL,
-                from_location TEXT NOT NULL,
-                to_location TEXT NOT NULL,
-                departure_time DATETIME NOT NULL,
-                arrival_time DATETIME NOT NULL,
-                flight_time TEXT NOT NULL,
-                gate TEXT NOT NULL,
-                distance TEXT NOT NULL,
-                status TEXT NOT NULL
-            )
-        """)
-
-        self.db_client.execute("""
-            CREATE TABLE IF NOT EXISTS bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                flight_id TEXT NOT NULL,
-                tickets INTEGER NOT NULL,
-                booking_date DATE NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (flight_id) REFERENCES flights(id)
-            )
-        """)
+        schema.create_schema(self.db_client)
         
         #print(f"PRINTING FLIGHTS: {flights}")
         # update flights table
@@ -86,6 +57,9 @@ class ReservationSystem:
         self.db_client.commit()
         print("Database setup completed.")
 
+        # release the seat holds that expired since the last run and expire new ones in the background
+        self.hold_sweeper = HoldSweeper(self.db_client).start()
+
         # Set up main menu
         main_menu_items = [
             MenuItem("Exit", lambda x: exit()),
@@ -98,20 +72,26 @@ class ReservationSystem:
             MenuItem("(debug) fetch_flights_table", lambda x: debug.debug_fetch_flights_table(self.db_client)),
             MenuItem("(debug) fetch_bookings_table", lambda x: debug.debug_fetch_bookings_table(self.db_client)),
             MenuItem("(debug) clear_tables", lambda x: debug.debug_clear_tables(self.db_client)),
+            MenuItem("(debug) show metrics", lambda x: debug.debug_show_metrics()),
+            MenuItem("(debug) show profile summary", lambda x: debug.debug_show_profile_summary()),
         ]
         main_menu = Menu("Main Menu", main_menu_items)
         self.menu_system.add_menu('main', main_menu)
 
         # Set up admin menu
         admin_menu_items = [
-            MenuItem("Add new Passenger", lambda x: self.handle_admin_action(self.db_client, "add_new_passenger")),
-            MenuItem("Search for Passenger", lambda x: self.handle_admin_action(self.db_client, "search_for_passenger")),
-            MenuItem("Update Passenger data", lambda x: self.handle_admin_action(self.db_client, "update_passenger_data")),
-            MenuItem("Delete Passenger", lambda x: self.handle_admin_action(self.db_client, "delete_passenger")),
-            MenuItem("Display all Passengers", lambda x: self.handle_admin_action(self.db_client, "display_all_passengers")),
-            MenuItem("Display all flights registered by a Passenger", lambda x: self.handle_admin_action(self.db_client, "display_all_flights_registered_by_passenger", flight_generator=self.flight_generator)),
-            MenuItem("Display all registered passengers in a Flight", lambda x: self.handle_admin_action(self.db_client, "display_registered_passengers_for_flight")),
-            MenuItem("Delete Flight", lambda x: self.handle_admin_action(self.db_client, "delete_flight")),
+            MenuItem("Add new Passenger", lambda x: self.handle_admin_action(self.db_client, "add_new_passenger", self.menu_system.session)),
+            MenuItem("Import Passengers from CSV", lambda x: self.handle_admin_action(self.db_client, "import_passengers_from_csv", self.menu_system.session)),
+            MenuItem("Search for Passenger", lambda x: self.handle_admin_action(self.db_client, "search_for_passenger", self.menu_system.session)),
+            MenuItem("Find Passengers by name, email or phone", lambda x: self.handle_admin_action(self.db_client, "find_passengers", self.menu_system.session)),
+            MenuItem("Update Passenger data", lambda x: self.handle_admin_action(self.db_client, "update_passenger_data", self.menu_system.session)),
+            MenuItem("Delete Passenger", lambda x: self.handle_admin_action(self.db_client, "delete_passenger", self.menu_system.session)),
+            MenuItem("Display all Passengers", lambda x: self.handle_admin_action(self.db_client, "display_all_passengers", self.menu_system.session)),
+            MenuItem("Display all flights registered by a Passenger", lambda x: self.handle_admin_action(self.db_client, "display_all_flights_registered_by_passenger", self.menu_system.session, self.flight_generator)),
+            MenuItem("Display all registered passengers in a Flight", lambda x: self.handle_admin_action(self.db_client, "display_registered_passengers_for_flight", self.menu_system.session)),
+            MenuItem("Cancel Flights", lambda x: self.handle_admin_action(self.db_client, "cancel_flights", self.menu_system.session)),
+            MenuItem("Occupancy report", lambda x: self.handle_admin_action(self.db_client, "occupancy_report", self.menu_system.session)),
+            MenuItem("Reconcile seat inventory", lambda x: self.handle_admin_action(self.db_client, "reconcile_seats", self.menu_system.session)),
             MenuItem("Back to Main Menu/Logout...", lambda x: self.menu_system.logout()),
         ]
         admin_menu = Menu("Admin Menu", admin_menu_items)
@@ -119,12 +99,12 @@ class ReservationSystem:
 
         # Set up passenger menu
         passenger_menu_items = [
-            MenuItem("Book a flight", lambda x: self.handle_passenger_action(self.db_client, "book_flight", self.flight_generator, self.menu_system)),
-            MenuItem("Update personal data", lambda x: self.handle_passenger_action(self.db_client, "update_personal_data", menu_system=self.menu_system)),
-            MenuItem("Delete Account", lambda x: self.handle_passenger_action(self.db_client, "delete_account", menu_system=self.menu_system)),
-            MenuItem("Display Flight Schedule", lambda x: self.handle_passenger_action(self.db_client, "display_flight_schedule", self.flight_generator)),
-            MenuItem("Cancel booking", lambda x: self.handle_passenger_action(self.db_client, "cancel_booking", menu_system=self.menu_system)),
-            MenuItem("View my bookings", lambda x: self.handle_passenger_action(self.db_client, "view_my_bookings", menu_system=self.menu_system)),
+            MenuItem("Book a flight", lambda x: self.handle_passenger_action(self.db_client, "book_flight", self.menu_system.session, self.flight_generator)),
+            MenuItem("Update personal data", lambda x: self.handle_passenger_action(self.db_client, "update_personal_data", self.menu_system.session)),
+            MenuItem("Delete Account", lambda x: self.handle_passenger_action(self.db_client, "delete_account", self.menu_system.session)),
+            MenuItem("Display Flight Schedule", lambda x: self.handle_passenger_action(self.db_client, "display_flight_schedule", self.menu_system.session, self.flight_generator)),
+            MenuItem("Cancel booking", lambda x: self.handle_passenger_action(self.db_client, "cancel_booking", self.menu_system.session)),
+            MenuItem("View my bookings", lambda x: self.handle_passenger_action(self.db_client, "view_my_bookings", self.menu_system.session)),
             MenuItem("Back to Main Menu/Logout...", lambda x: self.menu_system.logout()),
         ]
         passenger_menu = Menu("Passenger Menu", passenger_menu_items)
@@ -145,58 +125,48 @@ class ReservationSystem:
             auth_result, current_user_id, current_user_name, current_user_email, current_user_role = auth.auth_action(action, db_client)
             #print(f"auth_result: {auth_result}, current_user_id: {current_user_id}, current_user_name: {current_user_name}, current_user_email: {current_user_email}, current_user_role: {current_user_role}")
             if auth_result:
-                self.menu_system.current_user_id = current_user_id
-                self.menu_system.current_user_name = current_user_name
-                self.menu_system.current_user_role = current_user_role
-                self.menu_system.current_user_email = current_user_email
+                self.menu_system.login(current_user_id, current_user_name, current_user_email, current_user_role)
             else:
                 print("Login failed")
         else:
             auth.auth_action(action, db_client)
 
-    def handle_passenger_action(self, db_client, action, flight_generator=None, menu_system=None):
+    def handle_passenger_action(self, db_client, action, session, flight_generator=None):
         """
         Handles passenger actions.
 
         Args:
             db_client: The database client instance.
             action: The passenger action to perform.
+            session: The session of the logged-in passenger.
             flight_generator: An optional flight generator instance.
-            menu_system: An optional menu system instance.
 
         Returns:
             None
         """
-        result = passenger.passenger_action(action, db_client, flight_generator, menu_system)
+        result = passenger.passenger_action(action, db_client, flight_generator, session)
         if result == "deleted":
-            self.menu_system.current_menu = 'main'
-            self.menu_system.current_user_id = None
-            self.menu_system.current_user_name = None
-            self.menu_system.current_user_email = None
-            self.menu_system.current_user_role = None
+            self.menu_system.logout()
+            self.menu_system.session_store.revoke_user(session.user_id)
         else:
             pass
 
-    def handle_admin_action(self, db_client, action, flight_generator=None, menu_system=None):
+    def handle_admin_action(self, db_client, action, session, flight_generator=None):
         """
         Handles admin actions.
 
         Args:
             db_client: The database client instance.
             action: The admin action to perform.
+            session: The session of the logged-in admin.
             flight_generator: An optional flight generator instance.
-            menu_system: An optional menu system instance.
 
         Returns:
             None
         """
-        result = admin.admin_action(action, db_client, flight_generator, menu_system)
+        result = admin.admin_action(action, db_client, flight_generator, session, self.menu_system.session_store)
         if result == "deleted":
-            self.menu_system.current_menu = 'main'
-            self.menu_system.current_user_id = None
-            self.menu_system.current_user_name = None
-            self.menu_system.current_user_email = None
-            self.menu_system.current_user_role = None
+            self.menu_system.logout()
         else:
             pass
 
@@ -207,14 +177,64 @@ class ReservationSystem:
         It determines which menu to display based on the user's role.
         """
         while True:
-            if self.menu_system.current_user_email is None:
+            session = self.menu_system.session
+            if session is None:
+                if self.menu_system.session_token is not None:
+                    print("Your session has expired, please log in again")
+                    self.menu_system.logout()
                 self.menu_system.run_menu('main', self.db_client)
-            elif self.menu_system.current_user_role == 1:
+            elif session.is_admin:
                 self.menu_system.run_menu('admin', self.db_client)
             else:
                 self.menu_system.run_menu('passenger', self.db_client)
 
+def run_batch(path, verbose=False, json_path=None):
+    """
+    Runs a JSON Lines command file without the menus and prints a throughput and latency summary.
+
+    Args:
+        path (str): The command file, or '-' to read the commands from stdin.
+        verbose (bool): Whether to print the result of every command.
+        json_path (str): Optional file to write the summary to as JSON.
+
+    Returns:
+        dict: The summary.
+    """
+    client = db_client.DatabaseClient()
+    schema.create_schema(client)
+    runner = batch_runner.BatchRunner(client, verbose=verbose)
+    if path == "-":
+        summary = runner.run(sys.stdin)
+    else:
+        with open(path) as f:
+            summary = runner.run(f)
+
+    batch_runner.print_summary(summary)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
 # Main execution
 if __name__ == "__main__":
-    reservation_system = ReservationSystem()
+    parser = argparse.ArgumentParser(description="Airline Reservation System")
+    parser.add_argument("--batch", metavar="FILE", help="run the JSON Lines commands in FILE ('-' for stdin) instead of the menus")
+    parser.add_argument("--verbose", action="store_true", help="print the result of every batch command")
+    parser.add_argument("--json", metavar="FILE", help="also write the batch summary to FILE")
+    parser.add_argument("--trace-sample", type=float, metavar="RATE", help="record this share of actions as trace spans (0-1)")
+    parser.add_argument("--trace-file", metavar="FILE", help="Chrome trace JSON file written on exit (default: trace.json)")
+    parser.add_argument("--profile", metavar="DIR", help="profile every menu action and write the profiles to DIR")
+    parser.add_argument("--profile-mode", choices=profiling.ActionProfiler.MODES, default=profiling.ActionProfiler.mode,
+                        help="cpu (cProfile), memory (tracemalloc) or both")
+    args = parser.parse_args()
+
+    logging_setup.configure_logging()
+    if args.trace_sample is not None:
+        tracing.Tracer().configure(args.trace_sample, args.trace_file)
+
+    if args.batch:
+        summary = run_batch(args.batch, args.verbose, args.json)
+        sys.exit(1 if summary["failed"] else 0)
+
+    reservation_system = ReservationSystem(args.profile, args.profile_mode)
     reservation_system.run()
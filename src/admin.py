@@ -1,12 +1,27 @@
-from src.models import Admin, Passenger
-from src.utils import ascii_art, validate_inputs
+from src import services
+from src.utils import ascii_art, bulk_import, metrics, seat_reconciliation, tracing, validate_inputs
 import logging
 from tabulate import tabulate
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
-def admin_action(action, db_client, flight_generator, menu_system):
+MANIFEST_LINE = "{:>8}  {:>8}  {:<25}  {:>3}  {:<40}  {:<14}  {:>7}"
+CANCELLED_FLIGHTS_SHOWN = 20
+
+def print_passengers(passengers):
+    """
+    Prints passengers in a tabular format.
+
+    Args:
+        passengers (list[UserRecord]): The passengers to print.
+    """
+    headers = ["ID", "Name", "Age", "Email", "Phone Number"]
+    print(tabulate([passenger[:5] for passenger in passengers],
+    headers=headers, tablefmt="grid", colalign=("center",) * len(headers)))
+
+@metrics.timed_action("admin")
+@tracing.traced_action("admin")
+def admin_action(action, db_client, flight_generator, session, session_store=None):
     """
     Handles admin actions based on the given action string.
 
@@ -14,7 +29,8 @@ def admin_action(action, db_client, flight_generator, menu_system):
         action (str): The action to perform (e.g., "add_new_passenger", "search_for_passenger", etc.)
         db_client: The database client instance.
         flight_generator (Optional[RandomFlightGenerator]): An optional flight generator instance.
-        menu_system (Optional[MenuSystem]): An optional menu system instance.
+        session (Optional[Session]): The session of the logged-in admin.
+        session_store (Optional[SessionStore]): The sessions of the menu, so those of deleted passengers are revoked.
 
     Raises:
         ValueError: If an unknown action is provided.
@@ -22,24 +38,32 @@ def admin_action(action, db_client, flight_generator, menu_system):
     Returns:
         None
     """
-    logging.debug(f"Admin action called with action: {action}")
+    logger.debug("Admin action called with action: %s", action)
     
     if action == "add_new_passenger":
         add_new_passenger(db_client)
+    elif action == "import_passengers_from_csv":
+        import_passengers_from_csv(db_client)
     elif action == "search_for_passenger":
         search_for_passenger(db_client)
+    elif action == "find_passengers":
+        find_passengers(db_client)
     elif action == "update_passenger_data":
         update_passenger_data(db_client)
     elif action == "delete_passenger":
-        delete_passenger(db_client)
+        delete_passenger(db_client, session_store)
     elif action == "display_all_passengers":
         display_all_passengers(db_client)
     elif action == "display_all_flights_registered_by_passenger":
         display_all_flights_registered_by_passenger(db_client, flight_generator)
     elif action == "display_registered_passengers_for_flight":
         display_registered_passengers_for_flight(db_client)
-    elif action == "delete_flight":
-        delete_flight(db_client)
+    elif action == "cancel_flights":
+        cancel_flights(db_client)
+    elif action == "occupancy_report":
+        occupancy_report(db_client)
+    elif action == "reconcile_seats":
+        reconcile_seats(db_client)
     else:
         raise ValueError("Unknown action")
 
@@ -68,17 +92,37 @@ def add_new_passenger(db_client):
         return
 
     try:
-        db_client.execute("""
-            INSERT INTO users (name, age, email, password, phone_number, is_admin)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, age, email, password, phone_number, False))
-
-        db_client.commit()
+        services.register(db_client, name, age, email, password, phone_number)
         print("Passenger registered successfully")
     except Exception as e:
-        db_client.rollback()
         print(f"Error registering passenger: {str(e)}")
 
+def import_passengers_from_csv(db_client):
+    """
+    Bulk imports passengers from a CSV file.
+
+    Prompts the user for the CSV file and the path of the error report, then imports every
+    valid row. See `bulk_import.import_passengers` for the expected format.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    ascii_art.ascii_admin_add_new_passenger()
+
+    csv_path = validate_inputs.validate_non_empty_string(input("Enter the path of the CSV file: "), "CSV file")
+    report_path = input("Enter the path of the error report (default: import_errors.csv): ").strip() or "import_errors.csv"
+
+    try:
+        result = bulk_import.import_passengers(db_client, csv_path, report_path)
+        print(f"Read {result['read']} rows: {result['imported']} passengers imported, {result['rejected']} rejected")
+        if result["rejected"]:
+            print(f"See {report_path} for the rejected rows")
+    except Exception as e:
+        db_client.rollback()
+        print(f"Error importing passengers: {str(e)}")
 
 def search_for_passenger(db_client):
     """
@@ -92,25 +136,52 @@ def search_for_passenger(db_client):
     """
     ascii_art.ascii_admin_search_for_passenger()
     email = validate_inputs.validate_email(input("Enter the passenger email: "))
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ?", (email,))
-    passenger_data = cursor.fetchone()
-
-    if passenger_data:
-        passenger = Passenger(
-                passenger_data[0],
-                passenger_data[1],
-                passenger_data[2],
-                passenger_data[3],
-                passenger_data[4],
-                passenger_data[5]
-            ) 
-        headers = ["ID", "Name", "Age", "Email", "Phone Number"]
-        print(tabulate([
-        [passenger.id, passenger.name, passenger.age, passenger.email, passenger.phone_number]
-    ], headers=headers, tablefmt="grid", colalign=("center",) * len(headers)))
-        
-    else:
-        print("No passenger found with that email")
+
+    try:
+        passenger = services.get_user(db_client, email)
+    except services.NotFoundError as e:
+        print(str(e))
+        return
+
+    print_passengers([passenger])
+
+def find_passengers(db_client, page_size=20):
+    """
+    Finds passengers by any part of their name, email or phone number and displays them page by page.
+
+    Args:
+        db_client: The database client instance.
+        page_size (int): Passengers per page.
+
+    Returns:
+        None
+    """
+    ascii_art.ascii_admin_search_for_passenger()
+    try:
+        text = validate_inputs.validate_non_empty_string(input("Enter part of a name, email or phone number: "), "Search")
+
+        page = 1
+        while True:
+            result = services.search_passengers(db_client, text, page, page_size)
+            if not result.passengers:
+                print("No passengers found" if page == 1 else "No more passengers")
+                return
+
+            first = (page - 1) * page_size + 1
+            last = first + len(result.passengers) - 1
+            print_passengers(result.passengers)
+            print(f"Passengers {first}-{last} of {result.matches}{'+' if result.truncated else ''}")
+            if last >= result.matches:
+                if result.truncated:
+                    print("Only the first matches are ranked, add words to narrow the search")
+                return
+            if input("Press Enter for the next page, or q to stop: ").strip().lower() == "q":
+                return
+            page += 1
+    except ValueError as e:
+        print(str(e))
+    except Exception as e:
+        print(f"Error finding passengers: {str(e)}")
 
 def update_passenger_data(db_client):
     """
@@ -126,49 +197,32 @@ def update_passenger_data(db_client):
     """
     ascii_art.ascii_admin_update_passenger_data()
     email = validate_inputs.validate_email(input("Enter the passenger email: "))
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ?", (email,))
-    passenger_data = cursor.fetchone()
-
-    if passenger_data:
-        passenger = Passenger(
-                passenger_data[0],
-                passenger_data[1],
-                passenger_data[2],
-                passenger_data[3],
-                passenger_data[4],
-                passenger_data[5]
-            ) 
-        headers = ["ID","Name", "Age", "Email", "Phone Number"]
-        print(tabulate([
-        [passenger.id, passenger.name, passenger.age, passenger.email, passenger.phone_number]
-    ], headers=headers, tablefmt="grid", colalign=("center",) * len(headers)))
-
-        new_name = validate_inputs.validate_non_empty_string(input("Enter new passenger name: "), "Name")
-        new_age = validate_inputs.validate_positive_integer(input("Enter new passenger's age: "), "Age")
-        new_email = validate_inputs.validate_email(input("Enter new passenger email: "))
-        new_password = validate_inputs.validate_password(input("Enter new passenger password: "))
-        new_phone_number = validate_inputs.validate_phone_number(input("Enter new passenger phone number: "))
-
-        if not new_password or not new_phone_number:
-            print("Invalid input")
-            return
 
-        try:
-            db_client.execute("""
-                UPDATE users
-                SET name = ?, age = ?, email = ?, password = ?, phone_number = ?
-                WHERE email = ?
-            """, (new_name, new_age, new_email, new_password, new_phone_number, email))
-
-            db_client.commit()
-            print("Passenger data updated successfully")
-        except Exception as e:
-            db_client.rollback()
-            print(f"Error updating passenger data: {str(e)}")
-    else:
-        print("No passenger found with that email")
+    try:
+        passenger = services.get_user(db_client, email)
+    except services.NotFoundError as e:
+        print(str(e))
+        return
+
+    print_passengers([passenger])
+
+    new_name = validate_inputs.validate_non_empty_string(input("Enter new passenger name: "), "Name")
+    new_age = validate_inputs.validate_positive_integer(input("Enter new passenger's age: "), "Age")
+    new_email = validate_inputs.validate_email(input("Enter new passenger email: "))
+    new_password = validate_inputs.validate_password(input("Enter new passenger password: "))
+    new_phone_number = validate_inputs.validate_phone_number(input("Enter new passenger phone number: "))
+
+    if not new_password or not new_phone_number:
+        print("Invalid input")
+        return
+
+    try:
+        services.update_user(db_client, passenger.id, new_name, new_age, new_email, new_phone_number, new_password)
+        print("Passenger data updated successfully")
+    except Exception as e:
+        print(f"Error updating passenger data: {str(e)}")
 
-def delete_passenger(db_client):
+def delete_passenger(db_client, session_store=None):
     """
     Deletes a passenger from the system.
 
@@ -176,43 +230,32 @@ def delete_passenger(db_client):
 
     Args:
         db_client: The database client instance.
+        session_store (SessionStore): If given, the passenger's sessions are revoked.
 
     Returns:
         None
     """
     ascii_art.ascii_admin_delete_passenger()
     email = validate_inputs.validate_email(input("Enter the passenger email: "))
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ?", (email,))
-    passenger_data = cursor.fetchone()
-
-    if passenger_data:
-        # Create a Passenger object with the fetched data
-        passenger = Passenger(
-                passenger_data[0],
-                passenger_data[1],
-                passenger_data[2],
-                passenger_data[3],
-                passenger_data[4],
-                passenger_data[5]
-            ) 
-        headers = ["ID", "Name", "Age", "Email", "Phone Number"]
-        print(tabulate([
-        [passenger.id, passenger.name, passenger.age, passenger.email, passenger.phone_number]
-    ], headers=headers, tablefmt="grid", colalign=("center",) * len(headers)))
-
-        confirmation = input("Are you sure you want to delete this passenger? (yes/no): ")
-        if confirmation.lower() == "yes":
-            try:
-                db_client.execute("DELETE FROM users WHERE email = ?", (email,))
-                db_client.commit()
-                print("Passenger deleted successfully")
-            except Exception as e:
-                db_client.rollback()
-                print(f"Error deleting passenger: {str(e)}")
-        else:
-            print("Passenger deletion cancelled")
+
+    try:
+        passenger = services.get_user(db_client, email)
+    except services.NotFoundError as e:
+        print(str(e))
+        return
+
+    print_passengers([passenger])
+
+    confirmation = input("Are you sure you want to delete this passenger? (yes/no): ")
+    if confirmation.lower() == "yes":
+        try:
+            deletion = services.delete_user(db_client, passenger.id, session_store)
+            print(f"Passenger deleted successfully; {deletion.bookings} booking(s) cancelled, {deletion.seats} seat(s) released"
+                  + (f", {len(deletion.promoted)} waitlisted request(s) booked" if deletion.promoted else ""))
+        except Exception as e:
+            print(f"Error deleting passenger: {str(e)}")
     else:
-        print("No passenger found with that name")
+        print("Passenger deletion cancelled")
 
 def display_all_passengers(db_client):
     """
@@ -227,23 +270,10 @@ def display_all_passengers(db_client):
         None
     """
     ascii_art.ascii_admin_display_all_passengers()
-    cursor = db_client.execute("SELECT * FROM users WHERE is_admin = 0")
-    passengers = cursor.fetchall()
+    passengers = services.list_passengers(db_client)
 
     if passengers:
-        passenger_list = [
-            Passenger(
-                passenger_data[0],
-                passenger_data[1],
-                passenger_data[2],
-                passenger_data[3],
-                passenger_data[4],
-                passenger_data[5]
-            ) for passenger_data in passengers
-        ]
-        headers = ["ID", "Name", "Age", "Email", "Phone Number"]
-        print(tabulate([passenger.to_dict().values() for passenger in passenger_list],
-        headers=headers, tablefmt="grid", colalign=("center",) * len(headers)))
+        print_passengers(passengers)
     else:
         print("No passengers found")
 
@@ -263,32 +293,24 @@ def display_all_flights_registered_by_passenger(db_client, flight_generator):
     ascii_art.ascii_admin_display_flights_by_passenger()
     
     email = validate_inputs.validate_email(input("Enter the passenger email: "))
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ?", (email,))
-    passenger_data = cursor.fetchone()
-
-    if passenger_data:
-        passenger = Passenger(
-                passenger_data[0],
-                passenger_data[1],
-                passenger_data[2],
-                passenger_data[3],
-                passenger_data[4],
-                passenger_data[5]
-            ) 
-
-        # search for flights
-        flights = db_client.execute("SELECT * FROM flights WHERE id IN (SELECT flight_id FROM bookings WHERE user_id = ?)", (passenger.id,)).fetchall()
-        print(f"Flights registered by {passenger.name}:")
-        flight_generator.print_flights(flights)
 
-    else:
-        print("No passenger found with that email")
+    try:
+        passenger = services.get_user(db_client, email)
+    except services.NotFoundError as e:
+        print(str(e))
+        return
+
+    # search for flights
+    flights = services.flights_for_user(db_client, passenger.id)
+    print(f"Flights registered by {passenger.name}:")
+    flight_generator.print_flights(flights)
 
 def display_registered_passengers_for_flight(db_client):
     """
     Displays all passengers registered for a specific flight.
 
-    Prompts the user for a flight number, fetches the associated passengers, and prints them.
+    Prompts the user for a flight number and prints its manifest in booking order, line by
+    line as the bookings are read, so large flights start printing right away.
 
     Args:
         db_client: The database client instance.
@@ -300,39 +322,31 @@ def display_registered_passengers_for_flight(db_client):
     
     flight_number = validate_inputs.validate_non_empty_string(input("Enter the flight number: "), "Flight Number")
     
-    cursor = db_client.execute(
-        """
-        SELECT users.*, bookings.*
-        FROM flights
-        INNER JOIN bookings ON flights.id = bookings.flight_id
-        INNER JOIN users ON bookings.user_id = users.id
-        WHERE flights.flight_number = ?
-        """,
-        (flight_number,)
-    )
-    
-    passengers = cursor.fetchall()
-    
-    if passengers:
-        print(f"Registered passengers for Flight {flight_number}:")
-        
-        first_5_elements = []
-        
-        for passenger in passengers:
-            first_5 = [passenger[i] for i in range(6)] 
-            first_5_elements.append(first_5)
-        
-        headers = ["ID", "Name", "Age", "Email", "Password", "Phone Number"]
-        print(tabulate(first_5_elements, headers=headers, tablefmt="grid"))
-        
+    try:
+        manifest = services.flight_manifest(db_client, flight_number)
+        bookings = seats = 0
+        for entry in manifest:
+            if not bookings:
+                print(f"Registered passengers for Flight {flight_number}:")
+                print(MANIFEST_LINE.format("Booking", "ID", "Name", "Age", "Email", "Phone Number", "Tickets"))
+            print(MANIFEST_LINE.format(entry.booking_id, entry.passenger_id, entry.name, entry.age, entry.email, entry.phone_number, entry.tickets))
+            bookings += 1
+            seats += entry.tickets
+    except services.NotFoundError as e:
+        print(str(e))
+        return
+
+    if bookings:
+        print(f"{bookings} bookings, {seats} seats")
     else:
         print(f"No registered passengers found for Flight {flight_number}")
 
-def delete_flight(db_client):
+def cancel_flights(db_client):
     """
-    Deletes a flight from the system.
+    Cancels one or more flights and refunds their bookings.
 
-    Prompts the user for a flight number and removes the corresponding flight from the database.
+    Prompts the user for flight numbers, a route or a range of departure days, shows the
+    flights and passengers affected and cancels them once confirmed.
 
     Args:
         db_client: The database client instance.
@@ -341,13 +355,116 @@ def delete_flight(db_client):
         None
     """
     ascii_art.ascii_admin_delete_flight()
-    
-    flight_number = validate_inputs.validate_non_empty_string(input("Enter the flight number: "), "Flight Number")
-    
+
+    print("Cancel flights by:\n1. Flight number(s)\n2. Route\n3. Departure days")
+    choice = input("Enter your choice: ").strip()
+    criteria = {}
+    if choice == "1":
+        numbers = validate_inputs.validate_non_empty_string(input("Enter the flight numbers, separated by commas: "), "Flight Number")
+        criteria["flight_numbers"] = [number.strip() for number in numbers.split(",") if number.strip()]
+    elif choice == "2":
+        criteria["from_location"] = input("From (city, or the start of its name; blank for any): ").strip()
+        criteria["to_location"] = input("To (city, or the start of its name; blank for any): ").strip()
+    elif choice == "3":
+        criteria["departure_from"] = input("First departure day (YYYY-MM-DD): ").strip()
+        criteria["departure_to"] = input("Last departure day (YYYY-MM-DD, blank for the same day): ").strip() or criteria["departure_from"]
+    else:
+        print("Invalid choice")
+        return
+
     try:
-        db_client.execute("DELETE FROM flights WHERE flight_number = ?", (flight_number,))
-        db_client.commit()
-        print(f"Flight {flight_number} deleted successfully")
+        preview = services.cancel_flights(db_client, dry_run=True, **criteria)
+        if not preview.flights:
+            print("No matching flights found")
+            return
+        print_cancelled_flights(preview)
+        if input("Cancel these flights and refund their bookings? (y/n): ").strip().lower() != "y":
+            print("No flights cancelled")
+            return
+        reason = input("Reason (default: Flight cancelled): ").strip() or "Flight cancelled"
+        cancellation = services.cancel_flights(db_client, reason=reason, **criteria)
+        print(f"Cancelled {len(cancellation.flights)} flight(s); refunded {cancellation.bookings} booking(s) "
+              f"of {cancellation.passengers} passenger(s), {cancellation.seats} seat(s)"
+              + (f"; dropped {cancellation.waitlisted} waitlist request(s)" if cancellation.waitlisted else ""))
+    except (services.ServiceError, ValueError) as e:
+        print(str(e))
     except Exception as e:
-        db_client.rollback()
-        print(f"Error deleting flight: {str(e)}")
+        print(f"Error cancelling flights: {str(e)}")
+
+def print_cancelled_flights(cancellation):
+    """
+    Prints the flights of a cancellation and the passengers affected.
+
+    Args:
+        cancellation (FlightCancellation): The cancellation, usually a dry run.
+    """
+    shown = cancellation.flights[:CANCELLED_FLIGHTS_SHOWN]
+    print(tabulate([(flight.flight_number, flight.departure_time, flight.bookings, flight.passengers, flight.seats) for flight in shown],
+                   headers=["Flight Number", "Departure", "Bookings", "Passengers", "Seats"], tablefmt="grid"))
+    if len(cancellation.flights) > len(shown):
+        print(f"... and {len(cancellation.flights) - len(shown)} more flight(s)")
+    print(f"{len(cancellation.flights)} flight(s), {cancellation.bookings} booking(s) of {cancellation.passengers} "
+          f"passenger(s), {cancellation.seats} seat(s)"
+          + (f", {cancellation.waitlisted} waitlist request(s)" if cancellation.waitlisted else ""))
+
+def occupancy_report(db_client):
+    """
+    Displays the load factor (booked seats over capacity) per day, per route and of the fullest flights.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    ascii_art.ascii_admin_occupancy_report()
+    days = services.daily_occupancy(db_client)
+    if not days:
+        print("No flights found")
+        return
+
+    limit = input("How many flights should be listed? (default: 20): ").strip() or "20"
+    try:
+        limit = validate_inputs.validate_positive_integer(limit, "Number of flights")
+    except ValueError as e:
+        print(str(e))
+        return
+
+    print("Load factor per day:")
+    print(tabulate([(day.day, day.flights, day.capacity, day.booked_seats, _percent(day.load_factor)) for day in days],
+                   headers=["Day", "Flights", "Capacity", "Booked", "Load Factor"], tablefmt="grid"))
+
+    print("Load factor per route:")
+    print(tabulate([(_city(route.from_location), _city(route.to_location), route.flights, route.capacity,
+                     route.booked_seats, _percent(route.load_factor)) for route in services.route_occupancy(db_client)],
+                   headers=["From", "To", "Flights", "Capacity", "Booked", "Load Factor"], tablefmt="grid"))
+
+    print(f"Fullest {limit} flights:")
+    print(tabulate([(flight.flight_number, _city(flight.from_location), _city(flight.to_location), flight.departure_time,
+                     flight.capacity, flight.booked_seats, _percent(flight.load_factor))
+                    for flight in services.flight_occupancy(db_client, limit)],
+                   headers=["Flight Number", "From", "To", "Departure", "Capacity", "Booked", "Load Factor"], tablefmt="grid"))
+
+def reconcile_seats(db_client):
+    """
+    Checks every flight's available seats against its bookings and optionally repairs the drift.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    ascii_art.ascii_admin_reconcile_seats()
+    repair = input("Delete orphaned bookings and reset drifted seat counters? (y/n): ").strip().lower() == "y"
+    try:
+        seat_reconciliation.print_report(seat_reconciliation.reconcile_seats(db_client, repair=repair))
+    except Exception as e:
+        print(f"Error reconciling seats: {str(e)}")
+
+def _city(location):
+    # Locations are stored as "City, latitude, longitude".
+    return location.split(",", 1)[0]
+
+def _percent(fraction):
+    return f"{fraction * 100:.1f}%"
@@ -0,0 +1,521 @@
+# api_server.py
+#
+# HTTP/JSON front-end for the reservation system, built on asyncio and the standard library.
+#
+#   python -m src.api_server --host 127.0.0.1 --port 8080 --workers 8 --max-pending 64
+#
+# With --inventory, bookings are admitted by the in-memory SeatInventory and persisted with
+# group commits instead of one transaction each. Expired seat holds are released by a
+# HoldSweeper thread.
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+from src import services
+from src.hold_sweeper import HoldSweeper
+from src.inventory import SeatInventory
+from src.utils import db_client, logging_setup, metrics, schema, tracing
+from src.utils.session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    410: "Gone",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_HEADER_LINES = 100
+KEEP_ALIVE_TIMEOUT = 30
+
+API_SECONDS = "airline_api_request_duration_seconds"
+API_REJECTED = "airline_api_rejected_total"
+metrics.MetricsRegistry().describe(API_SECONDS, "histogram", "Time from dispatch to response of API requests, by route.")
+metrics.MetricsRegistry().describe(API_REJECTED, "counter", "API requests shed with 503 because too many were pending.")
+
+class HttpError(Exception):
+    """
+    An error that is sent back to the client as a JSON response.
+
+    Attributes:
+        status (int): The HTTP status code.
+        message (str): The error message.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class Request:
+    """
+    A parsed HTTP request, as seen by the route handlers.
+
+    Attributes:
+        method (str): The HTTP method.
+        path (str): The request path.
+        params (tuple[str]): The groups captured by the route pattern.
+        query (dict[str, str]): The query string parameters.
+        body (dict): The decoded JSON body (empty if there is none).
+        session (Session): The session of the caller, if a valid token was sent.
+        source (str): The address of the client.
+    """
+    __slots__ = ("method", "path", "params", "query", "body", "session", "source")
+
+    def __init__(self, method, path, params, query, body, session, source):
+        self.method = method
+        self.path = path
+        self.params = params
+        self.query = query
+        self.body = body
+        self.session = session
+        self.source = source
+
+def to_json(value):
+    """
+    Converts service results (NamedTuples and lists of them) to JSON-compatible values.
+
+    Args:
+        value (Any): The value to convert.
+
+    Returns:
+        Any: The converted value.
+    """
+    if hasattr(value, "_asdict"):
+        return {key: to_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+def list_field(body, name, item_type):
+    """
+    Returns a field of a request body that must be a non-empty list of one type.
+
+    Args:
+        body (dict): The decoded JSON body.
+        name (str): The name of the field.
+        item_type (type): The type of every item, e.g. int or str.
+
+    Returns:
+        list: The items.
+
+    Raises:
+        HttpError: 400 if the field is not a non-empty list of `item_type` values.
+    """
+    value = body.get(name)
+    # bool is a subclass of int, but true/false are not ids
+    if (not isinstance(value, list) or not value
+            or any(not isinstance(item, item_type) or isinstance(item, bool) for item in value)):
+        raise HttpError(400, f"'{name}' must be a non-empty list of {'integers' if item_type is int else 'strings'}")
+    return value
+
+class ApiServer:
+    """
+    Asyncio HTTP/JSON server exposing the service layer.
+
+    Connections and HTTP parsing are handled on the event loop; every service call runs on a
+    bounded thread pool so the loop never blocks on SQLite. At most `max_pending` calls may be
+    queued or running at once; beyond that the server sheds load with 503 responses instead
+    of letting latency grow without bound.
+
+    Attributes:
+        db_client: The database client instance.
+        session_store (SessionStore): The store holding the API sessions.
+        workers (int): Number of threads running service calls.
+        max_pending (int): Maximum number of queued or running service calls.
+        inventory (SeatInventory): The running seat inventory bookings go through, if any.
+    """
+    def __init__(self, db_client, session_store=None, workers=8, max_pending=64, inventory=None):
+        self.db_client = db_client
+        self.session_store = session_store if session_store is not None else SessionStore()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.inventory = inventory
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        self._server = None
+        self._routes = []
+
+        self.route("GET", r"/health", self._health)
+        self.route("GET", r"/metrics", self._metrics, auth="admin")
+        self.route("POST", r"/register", self._register)
+        self.route("POST", r"/login", self._login)
+        self.route("POST", r"/logout", self._logout, auth="user")
+        self.route("GET", r"/flights", self._search_flights)
+        self.route("GET", r"/flights/([^/]+)/seats", self._seat_map)
+        self.route("GET", r"/bookings", self._my_bookings, auth="user")
+        self.route("POST", r"/bookings", self._book, auth="user")
+        self.route("DELETE", r"/bookings/(\d+)", self._cancel, auth="user")
+        self.route("GET", r"/holds", self._my_holds, auth="user")
+        self.route("POST", r"/holds", self._hold, auth="user")
+        self.route("POST", r"/holds/(\d+)/confirm", self._confirm_hold, auth="user")
+        self.route("DELETE", r"/holds/(\d+)", self._release_hold, auth="user")
+        self.route("GET", r"/waitlist", self._my_waitlist, auth="user")
+        self.route("POST", r"/waitlist", self._join_waitlist, auth="user")
+        self.route("DELETE", r"/waitlist/(\d+)", self._leave_waitlist, auth="user")
+        self.route("GET", r"/admin/passengers", self._list_passengers, auth="admin")
+        self.route("GET", r"/admin/passengers/([^/]+)", self._get_passenger, auth="admin")
+        self.route("GET", r"/admin/passengers/([^/]+)/flights", self._passenger_flights, auth="admin")
+        self.route("GET", r"/admin/flights/([^/]+)/passengers", self._flight_passengers, auth="admin")
+        self.route("POST", r"/admin/flights/cancel", self._cancel_flights, auth="admin")
+        self.route("POST", r"/admin/passengers/purge", self._purge_passengers, auth="admin")
+
+    def route(self, method, pattern, handler, auth=None):
+        """
+        Registers a route.
+
+        Args:
+            method (str): The HTTP method.
+            pattern (str): Regular expression the whole path must match.
+            handler (callable): Function taking a Request and returning (status, payload).
+            auth (str): None for public routes, "user" or "admin" for authenticated ones.
+        """
+        self._routes.append((method, re.compile(pattern + "$"), handler, auth))
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Starts listening for connections.
+
+        Args:
+            host (str): The address to bind.
+            port (int): The port to bind (0 picks a free one).
+
+        Returns:
+            int: The port the server listens on.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Serves connections until cancelled.
+        """
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting connections and shuts the thread pool down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    # ************************************************************ HTTP ************************************************************
+
+    async def _handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        source = peer[0] if peer else "unknown"
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = await self._read_headers(reader)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    body = await self._read_body(reader, headers)
+                    status, payload = await self._dispatch(method, target, headers, body, source)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                    if e.status in (400, 413):
+                        keep_alive = False
+                except ValueError:
+                    status, payload, keep_alive = 400, {"error": "Malformed request"}, False
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_headers(self, reader):
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raise HttpError(400, "Too many headers")
+
+    async def _read_body(self, reader, headers):
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, "Request body too large")
+        if not length:
+            return {}
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except json.JSONDecodeError:
+            raise HttpError(400, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Request body must be a JSON object")
+        return body
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+    async def _dispatch(self, method, target, headers, body, source):
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        allowed = False
+        for route_method, pattern, handler, auth in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            break
+        else:
+            raise HttpError(405 if allowed else 404, "Method not allowed" if allowed else "Not found")
+
+        session = None
+        authorization = headers.get("authorization", "")
+        if authorization.startswith("Bearer "):
+            session = self.session_store.get(authorization[7:].strip())
+        if auth is not None and session is None:
+            raise HttpError(401, "Login required")
+        if auth == "admin" and not session.is_admin:
+            raise HttpError(403, "Admin access required")
+
+        request = Request(method, path, match.groups(), query, body, session, source)
+        labels = (("method", method), ("route", pattern.pattern[:-1]))
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            metrics.MetricsRegistry().inc(API_REJECTED, labels)
+            raise HttpError(503, "Server is busy, please retry")
+        self.pending += 1
+        try:
+            with metrics.MetricsRegistry().time(API_SECONDS, labels):
+                return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, handler, request)
+        finally:
+            self.pending -= 1
+
+    def _call(self, handler, request):
+        # runs on a worker thread
+        try:
+            with tracing.span(f"{request.method} {request.path}", "api"):
+                return handler(request)
+        except HttpError as e:
+            return e.status, {"error": e.message}
+        except services.NotFoundError as e:
+            return 404, {"error": str(e)}
+        except services.AuthenticationError as e:
+            return 401, {"error": str(e)}
+        except services.RateLimitedError as e:
+            return 429, {"error": str(e)}
+        except services.HoldExpiredError as e:
+            return 410, {"error": str(e)}
+        except (services.NotEnoughSeatsError, services.SeatTakenError, sqlite3.IntegrityError) as e:
+            return 409, {"error": str(e)}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception:
+            logger.exception("Unhandled error in %s %s", request.method, request.path)
+            self.db_client.rollback()
+            return 500, {"error": "Internal server error"}
+
+    # ************************************************************ Handlers ************************************************************
+
+    def _health(self, request):
+        return 200, {"status": "ok", "pending": self.pending, "workers": self.workers}
+
+    def _metrics(self, request):
+        return 200, metrics.MetricsRegistry().render()
+
+    def _register(self, request):
+        body = request.body
+        user = services.register(self.db_client, body["name"], body["age"], body["email"], body["password"], body["phone_number"])
+        return 201, to_json(user)
+
+    def _login(self, request):
+        body = request.body
+        session = services.login(self.db_client, self.session_store, body["email"], body["password"],
+                                 as_admin=bool(body.get("admin")), source=request.source)
+        return 200, {"token": session.token, "user_id": session.user_id, "name": session.name,
+                     "email": session.email, "is_admin": session.is_admin}
+
+    def _logout(self, request):
+        self.session_store.delete(request.session.token)
+        return 200, {}
+
+    def _search_flights(self, request):
+        query = request.query
+        flights = services.search_flights(self.db_client, query.get("from"), query.get("to"), query.get("min_seats"))
+        return 200, to_json(flights)
+
+    def _seat_map(self, request):
+        seat_map = services.get_seat_map(self.db_client, request.params[0])
+        return 200, {"layout": seat_map.layout.name, "blocks": list(seat_map.layout.blocks), "rows": seat_map.rows,
+                     "capacity": seat_map.capacity, "free_seats": seat_map.capacity - seat_map.taken_count,
+                     "taken": seat_map.labels(seat for seat in range(seat_map.capacity) if not seat_map.is_free(seat))}
+
+    def _my_bookings(self, request):
+        return 200, to_json(services.my_bookings(self.db_client, request.session.user_id))
+
+    def _book(self, request):
+        body = request.body
+        if self.inventory is not None:
+            booking = self.inventory.book(request.session.user_id, body["flight_number"], body["tickets"], body.get("seats"))
+        else:
+            booking = services.book(self.db_client, request.session.user_id, body["flight_number"], body["tickets"], body.get("seats"))
+        return 201, to_json(booking)
+
+    def _cancel(self, request):
+        if self.inventory is not None:
+            cancellation = self.inventory.cancel(int(request.params[0]), request.session.user_id)
+        else:
+            cancellation = services.cancel(self.db_client, int(request.params[0]), request.session.user_id)
+        return 200, to_json(cancellation)
+
+    def _my_holds(self, request):
+        return 200, to_json(services.my_holds(self.db_client, request.session.user_id))
+
+    def _hold(self, request):
+        body = request.body
+        ttl = body.get("ttl", services.DEFAULT_HOLD_TTL)
+        if self.inventory is not None:
+            hold = self.inventory.hold(request.session.user_id, body["flight_number"], body["tickets"], body.get("seats"), ttl)
+        else:
+            hold = services.hold_seats(self.db_client, request.session.user_id, body["flight_number"], body["tickets"], body.get("seats"), ttl)
+        return 201, to_json(hold)
+
+    def _confirm_hold(self, request):
+        if self.inventory is not None:
+            booking = self.inventory.confirm_hold(int(request.params[0]), request.session.user_id)
+        else:
+            booking = services.confirm_hold(self.db_client, int(request.params[0]), request.session.user_id)
+        return 201, to_json(booking)
+
+    def _release_hold(self, request):
+        if self.inventory is not None:
+            release = self.inventory.release_hold(int(request.params[0]), request.session.user_id)
+        else:
+            release = services.release_hold(self.db_client, int(request.params[0]), request.session.user_id)
+        return 200, to_json(release)
+
+    def _my_waitlist(self, request):
+        return 200, to_json(services.my_waitlist(self.db_client, request.session.user_id))
+
+    def _join_waitlist(self, request):
+        body = request.body
+        if "priority" in body and not request.session.is_admin:
+            raise HttpError(403, "Only admins can set a waitlist priority")
+        entry = services.join_waitlist(self.db_client, request.session.user_id, body["flight_number"], body["tickets"],
+                                       body.get("priority", services.DEFAULT_WAITLIST_PRIORITY))
+        return 201, to_json(entry)
+
+    def _leave_waitlist(self, request):
+        services.leave_waitlist(self.db_client, int(request.params[0]), request.session.user_id)
+        return 200, {}
+
+    def _list_passengers(self, request):
+        return 200, to_json(services.list_passengers(self.db_client))
+
+    def _get_passenger(self, request):
+        return 200, to_json(services.get_user(self.db_client, request.params[0]))
+
+    def _passenger_flights(self, request):
+        user = services.get_user(self.db_client, request.params[0])
+        return 200, to_json(services.flights_for_user(self.db_client, user.id))
+
+    def _flight_passengers(self, request):
+        return 200, [
+            {"id": entry.passenger_id, "name": entry.name, "age": entry.age, "email": entry.email,
+             "phone_number": entry.phone_number, "booking_id": entry.booking_id, "tickets": entry.tickets}
+            for entry in services.flight_manifest(self.db_client, request.params[0])
+        ]
+
+    def _purge_passengers(self, request):
+        deletion = services.delete_users(self.db_client, list_field(request.body, "user_ids", int), self.session_store)
+        if self.inventory is not None:
+            self.inventory.refresh()
+        return 200, to_json(deletion)
+
+    def _cancel_flights(self, request):
+        body = request.body
+        flight_numbers = list_field(body, "flight_numbers", str) if "flight_numbers" in body else None
+        cancellation = services.cancel_flights(self.db_client, flight_numbers, body.get("from"), body.get("to"),
+                                               body.get("departure_from"), body.get("departure_to"),
+                                               body.get("reason", "Flight cancelled"), bool(body.get("dry_run")))
+        if self.inventory is not None and not body.get("dry_run"):
+            self.inventory.refresh()
+        return 200, to_json(cancellation)
+
+async def serve(host, port, workers, max_pending, inventory=False):
+    """
+    Creates the schema if needed and runs the API server until cancelled.
+    """
+    client = db_client.DatabaseClient()
+    schema.create_schema(client)
+    seat_inventory = SeatInventory(client).start() if inventory else None
+    sweeper = HoldSweeper(client, seat_inventory).start()
+    server = ApiServer(client, workers=workers, max_pending=max_pending, inventory=seat_inventory)
+    port = await server.start(host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers" + (" and the seat inventory" if inventory else ""))
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        sweeper.close()
+        if seat_inventory is not None:
+            seat_inventory.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the reservation system HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=8, help="threads running database work")
+    parser.add_argument("--max-pending", type=int, default=64, help="queued calls before answering 503")
+    parser.add_argument("--inventory", action="store_true", help="admit bookings in memory and persist them with group commits")
+    args = parser.parse_args()
+    logging_setup.configure_logging()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.inventory))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
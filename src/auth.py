@@ -1,15 +1,18 @@
 # auth.py
 
-from src.models import Admin, Passenger
-from src.utils import ascii_art, validate_inputs
+from src import services
+from src.utils import ascii_art, metrics, tracing, validate_inputs
 
-def auth_action(action, db_client):
+@metrics.timed_action("auth")
+@tracing.traced_action("auth")
+def auth_action(action, db_client, source="console"):
     """
     Handles authentication actions based on the given action string.
 
     Args:
         action (str): The action to perform (e.g., "login_as_admin", "register_as_admin", etc.)
         db_client: The database client instance.
+        source (str): Where login attempts come from, used for rate limiting.
 
     Raises:
         ValueError: If an unknown action is provided.
@@ -18,25 +21,27 @@ def auth_action(action, db_client):
         The result of the performed action (varies depending on the action).
     """
     if action == "login_as_admin":
-        return login_as_admin(db_client)
+        return login_as_admin(db_client, source)
     elif action == "register_as_admin":
         register_as_admin(db_client)
     elif action == "login_as_passenger":
-        return login_as_passenger(db_client)
+        return login_as_passenger(db_client, source)
     elif action == "register_as_passenger":
         register_as_passenger(db_client)
     else:
         raise ValueError("Unknown action")
 
-def login_as_admin(db_client):
+def login_as_admin(db_client, source="console"):
     """
     Attempts to log in an admin user.
 
     Prompts the user for email and password, checks against the database,
     and returns success status along with admin details if authenticated.
+    Attempts over the login rate limit are rejected before touching the database.
 
     Args:
         db_client: The database client instance.
+        source (str): Where the attempt comes from, used for rate limiting.
 
     Returns:
         tuple: (success_status, id, name, email, is_admin)
@@ -49,21 +54,15 @@ def login_as_admin(db_client):
         print("Invalid credentials")
         return False, None, None, None, None
 
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ? AND is_admin = 1", (email,))
-    admin_data = cursor.fetchone()
-
-    if admin_data:
-        admin = Admin(admin_data[0], admin_data[1], admin_data[2], admin_data[3], admin_data[4], admin_data[5])
-        if admin.authenticate(password):
-            print(f"Admin {admin_data[3]} logged in successfully")
-            return True, admin_data[0], admin_data[1], admin_data[3], admin_data[6]
-        else:
-            print("Invalid credentials")
-            return False, None, None, None, None
-    else:
-        print("No admin found with that name")
+    try:
+        user = services.authenticate(db_client, email, password, as_admin=True, source=source)
+    except services.ServiceError as e:
+        print(str(e))
         return False, None, None, None, None
 
+    print(f"Admin {user.email} logged in successfully")
+    return True, user.id, user.name, user.email, user.is_admin
+
 def register_as_admin(db_client):
     """
     Registers a new admin user in the system.
@@ -84,26 +83,22 @@ def register_as_admin(db_client):
     phone_number = validate_inputs.validate_phone_number(input("Enter the admin's phone number: "))
 
     try:
-        db_client.execute("""
-            INSERT INTO users (name, age, email, password, phone_number, is_admin)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, age, email, password, phone_number, True))
-        
-        db_client.commit()
+        services.register(db_client, name, age, email, password, phone_number, is_admin=True)
         print(f"Admin {email} registered successfully")
     except Exception as e:
-        db_client.rollback()
         print(f"Error registering admin: {str(e)}")
 
-def login_as_passenger(db_client):
+def login_as_passenger(db_client, source="console"):
     """
     Attempts to log in a passenger user.
 
     Prompts the user for email and password, checks against the database,
     and returns success status along with passenger details if authenticated.
+    Attempts over the login rate limit are rejected before touching the database.
 
     Args:
         db_client: The database client instance.
+        source (str): Where the attempt comes from, used for rate limiting.
 
     Returns:
         tuple: (success_status, id, name, email, is_admin)
@@ -116,29 +111,15 @@ def login_as_passenger(db_client):
         print("Invalid credentials")
         return False, None, None, None, None
 
-    cursor = db_client.execute("SELECT * FROM users WHERE email = ?", (email,))
-    passenger_data = cursor.fetchone()
-    #print(passenger_data)
-
-    if passenger_data:
-        passenger = Passenger(
-            passenger_data[0],
-            passenger_data[1],
-            passenger_data[2],
-            passenger_data[3],
-            passenger_data[4],
-            passenger_data[5]
-        )
-        if passenger.authenticate(password):
-            print(f"Passenger {passenger_data[3]} logged in successfully")
-            return True, passenger_data[0], passenger_data[1], passenger_data[3], passenger_data[6]
-        else:
-            print("Invalid credentials")
-            return False, None, None, None, None
-    else:
-        print("No passenger found with that name")
+    try:
+        user = services.authenticate(db_client, email, password, as_admin=False, source=source)
+    except services.ServiceError as e:
+        print(str(e))
         return False, None, None, None, None
 
+    print(f"Passenger {user.email} logged in successfully")
+    return True, user.id, user.name, user.email, user.is_admin
+
 def register_as_passenger(db_client):
     """
     Registers a new passenger user in the system.
@@ -159,12 +140,7 @@ def register_as_passenger(db_client):
     phone_number = validate_inputs.validate_phone_number(input("Enter the passenger phone number: "))
 
     try:
-        db_client.execute("""
-            INSERT INTO users (name, age, email, password, phone_number, is_admin)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, age, email, password, phone_number, False))
-        db_client.commit()
+        services.register(db_client, name, age, email, password, phone_number, is_admin=False)
         print(f"Passenger {email} registered successfully")
     except Exception as e:
-        db_client.rollback()
-        print(f"Error registering passenger: {str(e)}")
\ No newline at end of file
+        print(f"Error registering passenger: {str(e)}")
@@ -0,0 +1,349 @@
+# batch_runner.py
+#
+# Non-interactive driver for the reservation system. Reads high-level commands as JSON Lines,
+# one object per line, and runs them back-to-back through the service layer:
+#
+#   {"op": "login", "email": "jane@example.com", "password": "secret123"}
+#   {"op": "search", "from": "Lon", "min_seats": 2}
+#   {"op": "book", "flight_number": "AB1234", "tickets": 2, "seats": "12A 12B"}
+#   {"op": "cancel", "booking_id": "$last.booking_id"}
+#
+# Every command may carry a "session" key naming the login it runs under (default "default"),
+# so traffic of several users can be interleaved. String values of the form "$last.<field>"
+# are replaced by that field of the previous successful result of the same session.
+
+import json
+import sqlite3
+import time
+from src import services
+from src.utils import bulk_import, flight_generator, tracing
+from src.utils.metrics import percentile
+from src.utils.session_store import SessionStore
+
+class BatchCommandError(Exception):
+    """
+    Raised when a command line is malformed or needs a session it does not have.
+    """
+
+def _require_session(runner, command, admin=False):
+    session = runner.session_store.get(runner.tokens.get(command.get("session", "default")))
+    if session is None:
+        raise BatchCommandError("Login required")
+    if admin and not session.is_admin:
+        raise BatchCommandError("Admin access required")
+    return session
+
+def _register(runner, command):
+    return services.register(runner.db_client, command["name"], command["age"], command["email"],
+                             command["password"], command["phone_number"], bool(command.get("admin")))
+
+def _login(runner, command):
+    # batch files are trusted input, so their logins are not rate limited
+    session = services.login(runner.db_client, runner.session_store, command["email"], command["password"],
+                             as_admin=bool(command.get("admin")), source=None)
+    runner.tokens[command.get("session", "default")] = session.token
+    return session
+
+def _logout(runner, command):
+    token = runner.tokens.pop(command.get("session", "default"), None)
+    if token is not None:
+        runner.session_store.delete(token)
+
+def _search(runner, command):
+    return services.search_flights(runner.db_client, command.get("from"), command.get("to"), command.get("min_seats"))
+
+def _list_flights(runner, command):
+    return services.list_flights(runner.db_client)
+
+def _book(runner, command):
+    session = _require_session(runner, command)
+    return services.book(runner.db_client, session.user_id, command["flight_number"], command.get("tickets", 1), command.get("seats"))
+
+def _cancel(runner, command):
+    session = _require_session(runner, command)
+    if "booking_id" in command:
+        return services.cancel(runner.db_client, int(command["booking_id"]), session.user_id)
+    booking = services.find_booking(runner.db_client, session.user_id, command["flight_number"])
+    return services.cancel(runner.db_client, booking.booking_id, session.user_id)
+
+def _my_bookings(runner, command):
+    session = _require_session(runner, command)
+    return services.my_bookings(runner.db_client, session.user_id)
+
+def _hold(runner, command):
+    session = _require_session(runner, command)
+    return services.hold_seats(runner.db_client, session.user_id, command["flight_number"], command["tickets"],
+                               command.get("seats"), command.get("ttl", services.DEFAULT_HOLD_TTL))
+
+def _confirm_hold(runner, command):
+    session = _require_session(runner, command)
+    return services.confirm_hold(runner.db_client, int(command["hold_id"]), session.user_id)
+
+def _release_hold(runner, command):
+    session = _require_session(runner, command)
+    return services.release_hold(runner.db_client, int(command["hold_id"]), session.user_id)
+
+def _my_holds(runner, command):
+    session = _require_session(runner, command)
+    return services.my_holds(runner.db_client, session.user_id)
+
+def _join_waitlist(runner, command):
+    session = _require_session(runner, command)
+    if "priority" in command and not session.is_admin:
+        raise BatchCommandError("Only admins can set a waitlist priority")
+    return services.join_waitlist(runner.db_client, session.user_id, command["flight_number"], command["tickets"],
+                                  command.get("priority", services.DEFAULT_WAITLIST_PRIORITY))
+
+def _leave_waitlist(runner, command):
+    session = _require_session(runner, command)
+    services.leave_waitlist(runner.db_client, int(command["waitlist_id"]), session.user_id)
+
+def _my_waitlist(runner, command):
+    session = _require_session(runner, command)
+    return services.my_waitlist(runner.db_client, session.user_id)
+
+def _update_profile(runner, command):
+    session = _require_session(runner, command)
+    user = services.update_user(runner.db_client, session.user_id, command["name"], command["age"], command["email"],
+                                command["phone_number"], command.get("password"))
+    session.name = user.name
+    session.email = user.email
+    return user
+
+def _delete_account(runner, command):
+    session = _require_session(runner, command)
+    return services.delete_user(runner.db_client, session.user_id, runner.session_store)
+
+def _get_passenger(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.get_user(runner.db_client, command["email"])
+
+def _search_passengers(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.search_passengers(runner.db_client, command["text"], command.get("page", 1), command.get("page_size", 20))
+
+def _list_passengers(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.list_passengers(runner.db_client)
+
+def _update_passenger(runner, command):
+    _require_session(runner, command, admin=True)
+    user = services.get_user(runner.db_client, command["email"])
+    return services.update_user(runner.db_client, user.id, command.get("name", user.name), command.get("age", user.age),
+                                command.get("new_email", user.email), command.get("phone_number", user.phone_number),
+                                command.get("password"))
+
+def _delete_passenger(runner, command):
+    _require_session(runner, command, admin=True)
+    user = services.get_user(runner.db_client, command["email"])
+    return services.delete_user(runner.db_client, user.id, runner.session_store)
+
+def _purge_passengers(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.delete_users(runner.db_client, command["user_ids"], runner.session_store)
+
+def _passenger_flights(runner, command):
+    _require_session(runner, command, admin=True)
+    user = services.get_user(runner.db_client, command["email"])
+    return services.flights_for_user(runner.db_client, user.id)
+
+def _flight_passengers(runner, command):
+    _require_session(runner, command, admin=True)
+    return list(services.flight_manifest(runner.db_client, command["flight_number"]))
+
+def _delete_flight(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.delete_flight(runner.db_client, command["flight_number"], command.get("reason", "Flight cancelled"))
+
+def _cancel_flights(runner, command):
+    _require_session(runner, command, admin=True)
+    return services.cancel_flights(runner.db_client, command.get("flight_numbers"), command.get("from"), command.get("to"),
+                                   command.get("departure_from"), command.get("departure_to"),
+                                   command.get("reason", "Flight cancelled"), bool(command.get("dry_run")))
+
+def _import_passengers(runner, command):
+    _require_session(runner, command, admin=True)
+    return bulk_import.import_passengers(runner.db_client, command["csv_path"], command.get("report_path", "import_errors.csv"))
+
+def _generate_flights(runner, command):
+    flights = flight_generator.RandomFlightGenerator().generate_flights(int(command.get("count", 5)))
+    with services.transaction(runner.db_client):
+        runner.db_client.executemany("""
+            INSERT INTO flights (flight_schedule, flight_number, available_seats, from_location, to_location, departure_time, arrival_time, flight_time, gate, distance, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, flights)
+    return [flight[1] for flight in flights]
+
+COMMANDS = {
+    "register": _register,
+    "login": _login,
+    "logout": _logout,
+    "search": _search,
+    "list_flights": _list_flights,
+    "book": _book,
+    "cancel": _cancel,
+    "my_bookings": _my_bookings,
+    "hold": _hold,
+    "confirm_hold": _confirm_hold,
+    "release_hold": _release_hold,
+    "my_holds": _my_holds,
+    "join_waitlist": _join_waitlist,
+    "leave_waitlist": _leave_waitlist,
+    "my_waitlist": _my_waitlist,
+    "update_profile": _update_profile,
+    "delete_account": _delete_account,
+    "get_passenger": _get_passenger,
+    "list_passengers": _list_passengers,
+    "search_passengers": _search_passengers,
+    "update_passenger": _update_passenger,
+    "delete_passenger": _delete_passenger,
+    "purge_passengers": _purge_passengers,
+    "passenger_flights": _passenger_flights,
+    "flight_passengers": _flight_passengers,
+    "delete_flight": _delete_flight,
+    "cancel_flights": _cancel_flights,
+    "import_passengers": _import_passengers,
+    "generate_flights": _generate_flights,
+}
+
+class BatchRunner:
+    """
+    Runs JSON Lines commands against the database and records their latencies.
+
+    Attributes:
+        db_client: The database client instance.
+        session_store (SessionStore): The store holding the sessions opened by "login" commands.
+        tokens (dict[str, str]): Session tokens keyed by the session names used in the commands.
+        last (dict[str, object]): The last successful result of every session.
+        latencies (dict[str, list[float]]): Seconds taken by every command, keyed by op.
+        failures (dict[str, int]): Number of failed commands, keyed by op.
+    """
+    def __init__(self, db_client, session_store=None, verbose=False):
+        self.db_client = db_client
+        self.session_store = session_store or SessionStore()
+        self.verbose = verbose
+        self.tokens = {}
+        self.last = {}
+        self.latencies = {}
+        self.failures = {}
+        self.elapsed = 0.0
+
+    def _resolve(self, command):
+        last = self.last.get(command.get("session", "default"))
+        resolved = {}
+        for key, value in command.items():
+            if isinstance(value, str) and value.startswith("$last."):
+                field = value[6:]
+                if last is None or not hasattr(last, field):
+                    raise BatchCommandError(f"No previous result with a '{field}' field")
+                value = getattr(last, field)
+            resolved[key] = value
+        return resolved
+
+    def run_command(self, command):
+        """
+        Runs a single command.
+
+        Args:
+            command (dict): The decoded command, with its operation under "op".
+
+        Returns:
+            object: The result of the service call.
+
+        Raises:
+            BatchCommandError: If the op is unknown or the command lacks a session.
+            ServiceError, sqlite3.Error, ValueError, KeyError: If the service call fails.
+            TypeError, AttributeError, IndexError: If a field has the wrong type.
+        """
+        handler = COMMANDS.get(command.get("op"))
+        if handler is None:
+            raise BatchCommandError(f"Unknown op: {command.get('op')}")
+        with tracing.span(f"batch {command['op']}", "batch"):
+            result = handler(self, self._resolve(command))
+        if result is not None:
+            self.last[command.get("session", "default")] = result
+        return result
+
+    def run(self, lines):
+        """
+        Runs every command of a JSON Lines stream, carrying on past failed commands.
+
+        Blank lines and lines starting with '#' are skipped.
+
+        Args:
+            lines (Iterable[str]): The lines to run.
+
+        Returns:
+            dict: The summary, see `summary`.
+        """
+        started = time.perf_counter()
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            op = "invalid"
+            command_started = time.perf_counter()
+            try:
+                command = json.loads(line)
+                if not isinstance(command, dict):
+                    raise BatchCommandError("Command must be a JSON object")
+                op = str(command.get("op"))
+                result = self.run_command(command)
+                if self.verbose:
+                    print(f"{line_number}: {op}: {result}")
+            except (json.JSONDecodeError, BatchCommandError, services.ServiceError, sqlite3.Error,
+                    ValueError, KeyError, TypeError, AttributeError, IndexError) as e:
+                # Database errors and malformed fields (e.g. a number where text is expected)
+                # fail this command only; the run carries on with the next one.
+                self.db_client.rollback()
+                self.failures[op] = self.failures.get(op, 0) + 1
+                message = f"missing field {e}" if isinstance(e, KeyError) else e
+                print(f"{line_number}: {op} failed: {message}")
+            self.latencies.setdefault(op, []).append(time.perf_counter() - command_started)
+        self.elapsed += time.perf_counter() - started
+        return self.summary()
+
+    def summary(self):
+        """
+        Summarizes the commands run so far.
+
+        Returns:
+            dict: Totals, throughput, latency percentiles in milliseconds and per-op statistics.
+        """
+        all_latencies = sorted(value for values in self.latencies.values() for value in values)
+        summary = {
+            "commands": len(all_latencies),
+            "failed": sum(self.failures.values()),
+            "seconds": round(self.elapsed, 3),
+            "commands_per_second": round(len(all_latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(all_latencies, 0.50) * 1000, 3),
+                "p90": round(percentile(all_latencies, 0.90) * 1000, 3),
+                "p99": round(percentile(all_latencies, 0.99) * 1000, 3),
+                "max": round((all_latencies[-1] if all_latencies else 0.0) * 1000, 3),
+            },
+            "per_op": {},
+        }
+        for op, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            summary["per_op"][op] = {
+                "count": len(values),
+                "failed": self.failures.get(op, 0),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+            }
+        return summary
+
+def print_summary(summary):
+    """
+    Prints a batch summary in a human readable form.
+
+    Args:
+        summary (dict): The summary returned by `BatchRunner.run`.
+    """
+    latency = summary["latency_ms"]
+    print(f"\n{summary['commands']} commands ({summary['failed']} failed) in {summary['seconds']:.3f}s, "
+          f"{summary['commands_per_second']:.1f} commands/s")
+    print(f"latency ms: p50 {latency['p50']:.3f}  p90 {latency['p90']:.3f}  p99 {latency['p99']:.3f}  max {latency['max']:.3f}")
+    for op, stats in summary["per_op"].items():
+        print(f"  {op:20} {stats['count']:>8}  failed {stats['failed']:>6}  p50 {stats['p50_ms']:.3f}ms  p99 {stats['p99_ms']:.3f}ms")
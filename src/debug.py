@@ -1,3 +1,5 @@
+from src.utils import metrics, profiling, user_cache
+from tabulate import tabulate
 
 def debug_aciton(action, db_client):
     """
@@ -21,6 +23,10 @@ def debug_aciton(action, db_client):
         return debug_fetch_bookings_table(db_client)
     elif action == "clear_tables":
         return debug_clear_tables(db_client)
+    elif action == "show_metrics":
+        return debug_show_metrics()
+    elif action == "show_profile_summary":
+        return debug_show_profile_summary()
     else:
         raise ValueError("Unknown action")
 
@@ -71,7 +77,7 @@ def debug_fetch_bookings_table(db_client):
 
 def debug_clear_tables(db_client):
     """
-    Clears all data from the 'users', 'flights', and 'bookings' tables.
+    Clears all data from the 'users', 'flights', 'bookings' and 'refunds' tables.
 
     Prompts the user for confirmation before performing the operation.
 
@@ -88,17 +94,84 @@ def debug_clear_tables(db_client):
             db_client.execute("DELETE FROM users")
             db_client.execute("DELETE FROM flights")
             db_client.execute("DELETE FROM bookings")
+            db_client.execute("DELETE FROM refunds")
+            db_client.execute("DELETE FROM waitlist")
+            db_client.execute("DELETE FROM seat_holds")
             
             # Reset sequences for auto-incrementing IDs
             db_client.execute("DELETE FROM sqlite_sequence WHERE name='users'")
             db_client.execute("DELETE FROM sqlite_sequence WHERE name='flights'")
             db_client.execute("DELETE FROM sqlite_sequence WHERE name='bookings'")
+            db_client.execute("DELETE FROM sqlite_sequence WHERE name='refunds'")
+            db_client.execute("DELETE FROM sqlite_sequence WHERE name='waitlist'")
+            db_client.execute("DELETE FROM sqlite_sequence WHERE name='seat_holds'")
             
             db_client.commit()
+            user_cache.UserCache().clear()
             print("Tables cleared successfully and auto-increment IDs reset.")
         except Exception as e:
             db_client.rollback()
             print(f"Error clearing tables: {str(e)}")
     else:
         print("Table clearing cancelled.")
-        return
\ No newline at end of file
+        return
+
+def debug_show_metrics():
+    """
+    Displays the recorded latency histograms and counters and writes them in the Prometheus
+    text format to `metrics.METRICS_FILE`.
+
+    Returns:
+        str: The path of the written metrics file.
+    """
+    counters, histograms, collected = metrics.MetricsRegistry().snapshot()
+    rows = []
+    for (name, labels), histogram in sorted(histograms.items()):
+        rows.append([
+            name,
+            ", ".join(f"{key}={value}" for key, value in labels),
+            histogram.count,
+            f"{histogram.sum / histogram.count * 1000:.3f}" if histogram.count else "-",
+            f"{histogram.quantile(0.5) * 1000:.3f}",
+            f"{histogram.quantile(0.99) * 1000:.3f}",
+            f"{histogram.max * 1000:.3f}",
+        ])
+    print(tabulate(rows, headers=["Histogram", "Labels", "Count", "Mean ms", "~p50 ms", "~p99 ms", "Max ms"], tablefmt="grid"))
+
+    values = sorted(list(counters.items()) + list(collected.items()))
+    print(tabulate([[name, ", ".join(f"{key}={value}" for key, value in labels), value] for (name, labels), value in values],
+                   headers=["Metric", "Labels", "Value"], tablefmt="grid"))
+
+    path = metrics.MetricsRegistry().write()
+    print(f"Metrics written to {path}")
+    return path
+
+def debug_show_profile_summary():
+    """
+    Displays the profiled menu actions, most CPU-expensive first.
+
+    Returns:
+        list: (label, ActionStats) for every profiled action.
+    """
+    profiler = profiling.ActionProfiler()
+    if not profiler.enabled:
+        print("Profiling is off. Start with --profile DIR or set AIRLINE_PROFILE_DIR.")
+        return []
+
+    summary = profiler.summary()
+    rows = [
+        [
+            label,
+            stats.calls,
+            f"{stats.cpu_seconds * 1000:.1f}",
+            f"{stats.cpu_seconds / stats.calls * 1000:.1f}",
+            f"{stats.max_cpu_seconds * 1000:.1f}",
+            f"{stats.wall_seconds:.2f}",
+            f"{stats.peak_bytes / 1024:.0f}" if stats.peak_bytes else "-",
+            stats.hottest or "-",
+        ]
+        for label, stats in summary
+    ]
+    print(tabulate(rows, headers=["Action", "Calls", "CPU ms", "Mean CPU ms", "Max CPU ms", "Wall s", "Peak KiB", "Hottest function"], tablefmt="grid"))
+    print(f"Profiles ({profiler.mode}) are written to {profiler.directory}")
+    return summary
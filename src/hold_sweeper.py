@@ -0,0 +1,104 @@
+# hold_sweeper.py
+#
+# Background expiry of seat holds (see services.hold_seats). The holds table is the queue:
+# its index on the deadline keeps the holds in the order they expire, so every tick only
+# looks at the front of it, and holds made before a restart or by another process are
+# expired like any other.
+
+import logging
+import threading
+from src import services
+
+logger = logging.getLogger(__name__)
+
+class HoldSweeper:
+    """
+    Releases expired seat holds on a background thread.
+
+    The sweeper sleeps until the earliest deadline (at most `interval` seconds), then
+    releases the due holds `batch_size` at a time with services.expire_holds, one
+    transaction per batch. Finding the next deadline and the due holds are lookups at the
+    front of the deadline index, so a tick costs the same with ten pending holds or ten
+    million. A hold made during a sleep with a deadline before its end is released up to
+    `interval` seconds late; confirming it after its deadline fails all the same.
+
+    Attributes:
+        interval (float): Most seconds between sweeps.
+        batch_size (int): Most holds released per transaction.
+        inventory (SeatInventory): Counters the released seats go back to, if any.
+        expired (int): Holds released.
+        batches (int): Transactions that released holds.
+    """
+    interval = 5.0
+    batch_size = 1000
+
+    def __init__(self, db_client, inventory=None, interval=None, batch_size=None):
+        self.db_client = db_client
+        self.inventory = inventory
+        if interval is not None:
+            self.interval = interval
+        if batch_size is not None:
+            self.batch_size = batch_size
+        self.expired = 0
+        self.batches = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Releases the holds that expired while nothing was sweeping and starts the thread.
+
+        Returns:
+            HoldSweeper: The sweeper itself.
+        """
+        self.sweep()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hold-sweeper", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """
+        Stops the thread.
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join()
+
+    def sweep(self):
+        """
+        Releases every hold that is due, `batch_size` at a time.
+
+        Returns:
+            int: The number of holds released.
+        """
+        released = 0
+        while True:
+            release = services.expire_holds(self.db_client, self.batch_size)
+            if not release.holds:
+                break
+            self.batches += 1
+            released += len(release.holds)
+            if self.inventory is not None:
+                self.inventory.released(release)
+            if len(release.holds) < self.batch_size:
+                break
+        self.expired += released
+        return released
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    self.sweep()
+                    wait = services.next_hold_expiry(self.db_client)
+                except Exception:
+                    logger.exception("Could not release expired seat holds")
+                    wait = None
+                self._wake.wait(self.interval if wait is None else min(wait, self.interval))
+        finally:
+            self.db_client.close()
@@ -0,0 +1,580 @@
+# inventory.py
+
+import datetime
+import logging
+import queue
+import threading
+from threading import Lock
+from src import services
+from src.utils import validate_inputs
+
+logger = logging.getLogger(__name__)
+
+# A flight's seats as the bookings and seat holds have them: its capacity minus the seats of
+# its bookings and holds (the counter itself if no capacity was recorded), next to the stored
+# counter.
+FLIGHT_SEATS_QUERY = """
+    SELECT f.id, f.flight_number, f.available_seats,
+           COALESCE(c.seats - COALESCE(SUM(b.tickets), 0)
+                    - (SELECT COALESCE(SUM(h.tickets), 0) FROM seat_holds h WHERE h.flight_id = f.id), f.available_seats)
+    FROM flights f
+    LEFT JOIN flight_capacity c ON c.flight_id = f.id
+    LEFT JOIN bookings b ON b.flight_id = CAST(f.id AS TEXT)
+"""
+
+_STOP = object()
+_REFRESH = object()
+
+class Reservation:
+    """
+    Seats admitted by the SeatInventory, persisted by its writer thread.
+
+    Attributes:
+        user_id (int): The ID of the passenger.
+        flight_id (int): The ID of the flight.
+        flight_number (str): The flight number.
+        tickets (int): The number of seats.
+        available_seats (int): Seats left on the flight once these were admitted.
+        booking_id (int): The ID of the booking, once it is committed.
+        seats (list[str]): The labels of the seats assigned, once it is committed.
+        error (ServiceError): Why the booking could not be saved, if it could not.
+    """
+    __slots__ = ("user_id", "flight_id", "flight_number", "tickets", "available_seats", "booking_id", "seats", "error", "_done")
+
+    def __init__(self, user_id, flight_id, flight_number, tickets, available_seats):
+        self.user_id = user_id
+        self.flight_id = flight_id
+        self.flight_number = flight_number
+        self.tickets = tickets
+        self.available_seats = available_seats
+        self.booking_id = None
+        self.seats = None
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        """
+        bool: Whether the reservation was committed or failed.
+        """
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the booking is committed.
+
+        Args:
+            timeout (float): Seconds to wait, None to wait as long as it takes.
+
+        Returns:
+            BookingResult: The booking.
+
+        Raises:
+            TimeoutError: If the booking was not committed in time.
+            ServiceError: If the booking could not be saved.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("The booking was not saved in time")
+        if self.error is not None:
+            raise self.error
+        return services.BookingResult(self.booking_id, self.flight_number, self.tickets, self.available_seats, self.seats)
+
+    def _finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+class _Shard:
+    __slots__ = ("lock", "seats", "pending", "admitted", "rejected")
+
+    def __init__(self):
+        self.lock = Lock()
+        self.seats = {}
+        self.pending = {}
+        self.admitted = 0
+        self.rejected = 0
+
+class SeatInventory:
+    """
+    Per-flight seat counters held in memory in front of the flights and bookings tables.
+
+    The counters are spread over `shards` dicts by flight id, each behind its own lock, so
+    admitting or rejecting a reservation is a dict update under a lock that is rarely
+    contended and never waits on SQLite. Admitted reservations are queued for a single
+    writer thread, which takes everything that queued up while it was busy (up to
+    `batch_size` reservations) and persists it in one transaction: one conditional seat
+    UPDATE and one seat map update per flight, one bookings INSERT per reservation and a
+    single commit. Callers that need the booking id wait for that commit, so concurrent
+    bookings share its cost.
+
+    The database stays the authority. The UPDATE only takes seats the flight still has,
+    so if bookings were made around the inventory the reservations of that flight are
+    saved one at a time as far as its seats go, the rest fail, and its counter is
+    reloaded. Writes that free or remove seats
+    behind its back (cancelling flights, deleting passengers) are picked up by `refresh`.
+    On start the counters are recovered from the bookings table, as every flight's
+    capacity minus its booked seats, and stored counters that drifted are corrected.
+
+    Attributes:
+        shards (int): Number of lock shards, rounded up to a power of two.
+        batch_size (int): Most reservations persisted per transaction.
+        wait_timeout (float): Seconds `book` waits for the commit.
+        admitted (int): Reservations admitted.
+        rejected (int): Reservations rejected for lack of seats at admission.
+        persisted (int): Reservations committed.
+        failed (int): Admitted reservations that could not be saved.
+        batches (int): Transactions committed by the writer.
+    """
+    shards = 64
+    batch_size = 1000
+    wait_timeout = 30.0
+
+    def __init__(self, db_client, shards=None, batch_size=None):
+        self.db_client = db_client
+        if shards is not None:
+            self.shards = shards
+        if batch_size is not None:
+            self.batch_size = batch_size
+        count = 1
+        while count < self.shards:
+            count *= 2
+        self._mask = count - 1
+        self._shards = [_Shard() for _ in range(count)]
+        self._flight_ids = {}
+        self._load_lock = Lock()
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self.persisted = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def running(self):
+        """
+        bool: Whether the writer thread is accepting reservations.
+        """
+        return self._writer is not None
+
+    @property
+    def admitted(self):
+        """
+        int: Reservations admitted.
+        """
+        # Counted per shard under its lock, so admissions on different shards never race.
+        return sum(shard.admitted for shard in self._shards)
+
+    @property
+    def rejected(self):
+        """
+        int: Reservations rejected for lack of seats at admission.
+        """
+        return sum(shard.rejected for shard in self._shards)
+
+    def start(self):
+        """
+        Recovers the counters from the database and starts the writer thread.
+
+        Returns:
+            SeatInventory: The inventory itself.
+        """
+        self.recover()
+        self._writer = threading.Thread(target=self._run, name="inventory-writer", daemon=True)
+        self._writer.start()
+        return self
+
+    def close(self):
+        """
+        Persists the queued reservations and stops the writer thread.
+        """
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
+
+    def recover(self):
+        """
+        Loads every flight's counter as its capacity minus the seats of its bookings.
+
+        Stored available_seats counters that disagree are corrected in the same pass, so
+        the conditional updates of the writer start from the truth.
+
+        Returns:
+            int: The number of flights whose stored counter was corrected.
+        """
+        db_client = self.db_client
+        rows = db_client.execute(FLIGHT_SEATS_QUERY + " GROUP BY f.id ORDER BY f.id").fetchall()
+        corrections = [(max(expected, 0), flight_id) for flight_id, _, available, expected in rows if available != max(expected, 0)]
+        if corrections:
+            try:
+                db_client.executemany("UPDATE flights SET available_seats = ? WHERE id = ?", corrections)
+                db_client.commit()
+            except BaseException:
+                db_client.rollback()
+                raise
+            logger.warning("Corrected the available seats of %d flights from their bookings", len(corrections))
+
+        with self._load_lock:
+            for shard in self._shards:
+                with shard.lock:
+                    shard.seats.clear()
+                    shard.pending.clear()
+            self._flight_ids = {}
+            for flight_id, flight_number, _, expected in rows:
+                # Only resolves the flight a booking by number goes to, the first one by id
+                # like services.book picks; counters are kept and credited by flight id.
+                self._flight_ids.setdefault(flight_number, flight_id)
+                self._shards[flight_id & self._mask].seats[flight_id] = max(expected, 0)
+        return len(corrections)
+
+    def seats(self, flight_number):
+        """
+        Returns the seats the inventory would still admit on a flight.
+
+        Args:
+            flight_number (str): The flight number.
+
+        Returns:
+            int: The available seats.
+
+        Raises:
+            NotFoundError: If the flight does not exist.
+        """
+        flight_id = self._flight_id(flight_number)
+        shard = self._shards[flight_id & self._mask]
+        with shard.lock:
+            seats = shard.seats.get(flight_id)
+        if seats is None:
+            raise services.NotFoundError("Flight not found.")
+        return seats
+
+    def reserve(self, user_id, flight_number, tickets):
+        """
+        Admits or rejects a reservation in memory and queues it to be persisted.
+
+        Args:
+            user_id (int): The ID of the passenger.
+            flight_number (str): The flight number.
+            tickets (int | str): The number of seats to book.
+
+        Returns:
+            Reservation: The admitted reservation; `wait` for its booking id.
+
+        Raises:
+            ValueError: If the number of tickets is invalid.
+            ServiceError: If the inventory is not running.
+            NotFoundError: If the flight does not exist.
+            NotEnoughSeatsError: If the flight has too few seats left.
+        """
+        tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+        reservation = self._admit(user_id, flight_number, tickets)
+        self._queue.put(reservation)
+        return reservation
+
+    def book(self, user_id, flight_number, tickets, seats=None):
+        """
+        Books seats through the inventory and waits for the booking to be committed.
+
+        Bookings of specific seats are admitted like any other, then made right away with
+        services.book, since only the flight's seat map knows whether the seats are free.
+
+        Args:
+            user_id (int): The ID of the passenger.
+            flight_number (str): The flight number.
+            tickets (int | str): The number of seats to book.
+            seats (Iterable[str] | str): Labels of the seats to book, one per ticket.
+
+        Returns:
+            BookingResult: The new booking.
+
+        Raises:
+            See reserve, Reservation.wait and services.book.
+        """
+        if seats is None:
+            return self.reserve(user_id, flight_number, tickets).wait(self.wait_timeout)
+        tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+        reservation = self._admit(user_id, flight_number, tickets)
+        try:
+            booking = services.book(self.db_client, user_id, flight_number, tickets, seats)
+        except BaseException:
+            self._settle(reservation, give_back=True)
+            raise
+        self._settle(reservation)
+        return booking
+
+    def cancel(self, booking_id, user_id=None):
+        """
+        Cancels a booking (see services.cancel) and returns the seats that the flight's
+        waitlist did not take to the counter.
+
+        Returns:
+            CancellationResult: The cancelled booking.
+        """
+        cancellation = services.cancel(self.db_client, booking_id, user_id)
+        self.release(cancellation.flight_id, cancellation.tickets - sum(promotion.tickets for promotion in cancellation.promoted))
+        return cancellation
+
+    def hold(self, user_id, flight_number, tickets, seats=None, ttl=services.DEFAULT_HOLD_TTL):
+        """
+        Holds seats through the inventory: they are admitted like a booking, then held
+        right away with services.hold_seats.
+
+        Returns:
+            SeatHold: The new hold.
+
+        Raises:
+            See reserve and services.hold_seats.
+        """
+        tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+        reservation = self._admit(user_id, flight_number, tickets)
+        try:
+            hold = services.hold_seats(self.db_client, user_id, flight_number, tickets, seats, ttl)
+        except BaseException:
+            self._settle(reservation, give_back=True)
+            raise
+        self._settle(reservation)
+        return hold
+
+    def confirm_hold(self, hold_id, user_id=None):
+        """
+        Books the seats of a hold (see services.confirm_hold). They are already off the
+        counter, unless the hold expired and they were released.
+
+        Returns:
+            BookingResult: The new booking.
+        """
+        try:
+            return services.confirm_hold(self.db_client, hold_id, user_id)
+        except services.HoldExpiredError:
+            self.refresh()
+            raise
+
+    def release_hold(self, hold_id, user_id=None):
+        """
+        Releases a hold (see services.release_hold) and returns its seats to the counter.
+
+        Returns:
+            HoldRelease: The released hold.
+        """
+        release = services.release_hold(self.db_client, hold_id, user_id)
+        self.released(release)
+        return release
+
+    def released(self, release):
+        """
+        Adds the seats of holds released in the database, e.g. expired ones, to their
+        flights' counters, less the seats the flights' waitlists took.
+
+        Args:
+            release (HoldRelease): The released holds.
+        """
+        freed = {}
+        for hold in release.holds:
+            freed[hold.flight_id] = freed.get(hold.flight_id, 0) + hold.tickets
+        for promotion in release.promoted:
+            freed[promotion.flight_id] = freed.get(promotion.flight_id, 0) - promotion.tickets
+        for flight_id, tickets in freed.items():
+            self.release(flight_id, tickets)
+
+    def release(self, flight_id, tickets):
+        """
+        Adds seats that were freed in the database, e.g. by a cancellation, to a flight's counter.
+
+        Flight numbers are not unique, so the flight is given by the id the service layer
+        reported; flights without a counter (or None, for a flight that is gone) are ignored.
+
+        Args:
+            flight_id (int): The ID of the flight.
+            tickets (int): The number of seats freed.
+        """
+        if flight_id is None:
+            return
+        shard = self._shards[flight_id & self._mask]
+        with shard.lock:
+            if flight_id in shard.seats:
+                shard.seats[flight_id] += tickets
+
+    def refresh(self):
+        """
+        Reloads every counter from the stored available seats once the reservations
+        queued so far are persisted, e.g. after flights were cancelled or passengers
+        deleted without going through the inventory.
+        """
+        self._queue.put(_REFRESH)
+
+    def _admit(self, user_id, flight_number, tickets):
+        if self._writer is None:
+            raise services.ServiceError("The seat inventory is not running")
+        flight_id = self._flight_id(flight_number)
+        shard = self._shards[flight_id & self._mask]
+        with shard.lock:
+            seats = shard.seats.get(flight_id)
+            if seats is None:
+                raise services.NotFoundError("Flight not found.")
+            if seats < tickets:
+                shard.rejected += 1
+                raise services.NotEnoughSeatsError("Not enough seats available.")
+            shard.seats[flight_id] = seats - tickets
+            shard.pending[flight_id] = shard.pending.get(flight_id, 0) + tickets
+            shard.admitted += 1
+        return Reservation(user_id, flight_id, flight_number, tickets, seats - tickets)
+
+    def _flight_id(self, flight_number):
+        flight_id = self._flight_ids.get(flight_number)
+        if flight_id is not None:
+            return flight_id
+        # A flight created since the inventory started: its counter cannot have pending
+        # reservations yet, so it is loaded as it is stored (or lower, if its bookings say so).
+        with self._load_lock:
+            flight_id = self._flight_ids.get(flight_number)
+            if flight_id is not None:
+                return flight_id
+            row = self.db_client.execute(FLIGHT_SEATS_QUERY + " WHERE f.flight_number = ? GROUP BY f.id ORDER BY f.id LIMIT 1",
+                                         (flight_number,)).fetchone()
+            if row is None:
+                raise services.NotFoundError("Flight not found.")
+            flight_id, _, available, expected = row
+            shard = self._shards[flight_id & self._mask]
+            with shard.lock:
+                shard.seats.setdefault(flight_id, max(min(available, expected), 0))
+            self._flight_ids[flight_number] = flight_id
+            return flight_id
+
+    # ************************************************************ Writer ************************************************************
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch = []
+            for item in items:
+                if isinstance(item, Reservation):
+                    batch.append(item)
+                    continue
+                if batch:
+                    self._persist(batch)
+                    batch = []
+                if item is _REFRESH:
+                    self._reload()
+                elif item is _STOP:
+                    return
+            if batch:
+                self._persist(batch)
+
+    def _persist(self, batch):
+        db_client = self.db_client
+        by_flight = {}
+        for reservation in batch:
+            by_flight.setdefault(reservation.flight_id, []).append(reservation)
+        today = datetime.date.today().isoformat()
+
+        try:
+            conflicts = set()
+            failed = set()
+            for flight_id, reservations in by_flight.items():
+                seats = sum(reservation.tickets for reservation in reservations)
+                available = self._take(flight_id, seats)
+                if available is None:
+                    # Seats were taken around the inventory: save the reservations that
+                    # still fit one at a time, in the order they were admitted.
+                    conflicts.add(flight_id)
+                    fitting = []
+                    for reservation in reservations:
+                        left = self._take(flight_id, reservation.tickets)
+                        if left is None:
+                            failed.add(reservation)
+                        else:
+                            fitting.append(reservation)
+                            available = left
+                    if not fitting:
+                        continue
+                    reservations = fitting
+                    seats = sum(reservation.tickets for reservation in reservations)
+                tickets = [reservation.tickets for reservation in reservations]
+                for reservation, labels in zip(reservations, services.assign_seats(db_client, flight_id, available + seats, tickets)):
+                    reservation.seats = labels
+            for reservation in batch:
+                if reservation not in failed:
+                    reservation.booking_id = db_client.execute(
+                        "INSERT INTO bookings (user_id, flight_id, tickets, booking_date, seats) VALUES (?, ?, ?, ?, ?)",
+                        (reservation.user_id, reservation.flight_id, reservation.tickets, today, ",".join(reservation.seats) or None),
+                    ).lastrowid
+            db_client.commit()
+        except Exception as e:
+            db_client.rollback()
+            logger.exception("Could not persist %d reservations", len(batch))
+            self.failed += len(batch)
+            for reservation in batch:
+                self._settle(reservation, give_back=True)
+                reservation._finish(services.ServiceError(f"The booking could not be saved: {e}"))
+            return
+
+        self.batches += 1
+        for reservation in batch:
+            if reservation in failed:
+                continue
+            self._settle(reservation)
+            self.persisted += 1
+            reservation._finish()
+        if conflicts:
+            # Seats were taken around the inventory, or the flight is gone: the stored
+            # counter is the truth, less whatever is still queued for the flight.
+            logger.warning("Stored seats of %d flights disagreed with the inventory", len(conflicts))
+            self.failed += len(failed)
+            for reservation in failed:
+                self._settle(reservation)
+            self._reload(conflicts)
+            for reservation in failed:
+                if self._flight_ids.get(reservation.flight_number) == reservation.flight_id:
+                    reservation._finish(services.NotEnoughSeatsError("Not enough seats available."))
+                else:
+                    reservation._finish(services.NotFoundError("Flight not found."))
+
+    def _take(self, flight_id, seats):
+        # Takes seats off a flight's stored counter if it still has them; returns the seats left, or None.
+        updated = self.db_client.execute(
+            "UPDATE flights SET available_seats = available_seats - ? WHERE id = ? AND available_seats >= ? RETURNING available_seats",
+            (seats, flight_id, seats),
+        ).fetchone()
+        return None if updated is None else updated[0]
+
+    def _settle(self, reservation, give_back=False):
+        shard = self._shards[reservation.flight_id & self._mask]
+        with shard.lock:
+            pending = shard.pending.get(reservation.flight_id, 0) - reservation.tickets
+            if pending > 0:
+                shard.pending[reservation.flight_id] = pending
+            else:
+                shard.pending.pop(reservation.flight_id, None)
+            if give_back and reservation.flight_id in shard.seats:
+                shard.seats[reservation.flight_id] += reservation.tickets
+
+    def _reload(self, flight_ids=None):
+        # Runs on the writer thread between transactions, so every committed reservation
+        # is already settled and only queued ones are pending.
+        if flight_ids is None:
+            stored = dict(self.db_client.execute("SELECT id, available_seats FROM flights").fetchall())
+        else:
+            stored = {}
+            for flight_id in flight_ids:
+                row = self.db_client.execute("SELECT available_seats FROM flights WHERE id = ?", (flight_id,)).fetchone()
+                if row is not None:
+                    stored[flight_id] = row[0]
+
+        with self._load_lock:
+            gone = set()
+            for shard in self._shards:
+                with shard.lock:
+                    for flight_id in list(shard.seats):
+                        if flight_ids is not None and flight_id not in flight_ids:
+                            continue
+                        if flight_id in stored:
+                            shard.seats[flight_id] = max(stored[flight_id] - shard.pending.get(flight_id, 0), 0)
+                        else:
+                            del shard.seats[flight_id]
+                            gone.add(flight_id)
+            if gone:
+                self._flight_ids = {number: flight_id for number, flight_id in self._flight_ids.items() if flight_id not in gone}
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from src.utils import ascii_art
+from src.utils import ascii_art, profiling, tracing
+from src.utils.session_store import SessionStore
 
 class User(ABC):
     """
@@ -9,10 +10,25 @@ class User(ABC):
         name (str): The user's name.
         password (str): The user's password.
     """
+    __slots__ = ("name", "password")
+
     def __init__(self, name, password):
         self.name = name
         self.password = password
 
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a user from a row of the 'users' table.
+
+        Args:
+            row (tuple): (id, name, age, email, password, phone_number, is_admin).
+
+        Returns:
+            User: The user.
+        """
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5])
+
     @abstractmethod
     def authenticate(self, password):
         """
@@ -38,6 +54,8 @@ class Admin(User):
         password (str): The admin's password.
         phone_number (str): The admin's phone number.
     """
+    __slots__ = ("id", "age", "email", "phone_number")
+
     def __init__(self, _id, name, age, email, password=None, phone_number=None):
         super().__init__(name, password)
         self.id = _id
@@ -69,6 +87,8 @@ class Passenger(User):
         password (str): The passenger's password.
         phone_number (str): The passenger's phone number.
     """
+    __slots__ = ("id", "age", "email", "phone_number")
+
     def __init__(self, _id, name, age, email, password=None, phone_number=None):
         super().__init__(name, password)
         self.id = _id
@@ -114,12 +134,49 @@ class Flight:
         capacity (int): The maximum number of passengers the flight can accommodate.
     """
     # not used anywhere really
+    __slots__ = ("flight_number", "departure", "arrival", "capacity")
+
     def __init__(self, flight_number, departure, arrival, capacity):
         self.flight_number = flight_number
         self.departure = departure
         self.arrival = arrival
         self.capacity = capacity
 
+class Booking:
+    """
+    Represents a booking.
+
+    Attributes:
+        id (int): The unique identifier for the booking.
+        user_id (int): The ID of the passenger.
+        flight_id (int): The ID of the flight.
+        tickets (int): The number of booked seats.
+        booking_date (str): The date the booking was made.
+        seats (str): The labels of the booked seats, separated by commas, if they were assigned.
+    """
+    __slots__ = ("id", "user_id", "flight_id", "tickets", "booking_date", "seats")
+
+    def __init__(self, _id, user_id, flight_id, tickets, booking_date, seats=None):
+        self.id = _id
+        self.user_id = user_id
+        self.flight_id = flight_id
+        self.tickets = tickets
+        self.booking_date = booking_date
+        self.seats = seats
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a booking from a row of the 'bookings' table.
+
+        Args:
+            row (tuple): (id, user_id, flight_id, tickets, booking_date, seats).
+
+        Returns:
+            Booking: The booking.
+        """
+        return cls(row[0], row[1], row[2], row[3], row[4], row[5] if len(row) > 5 else None)
+
 
 # menus
 
@@ -146,7 +203,11 @@ class MenuItem:
         Returns:
             Any: The result of calling the action function.
         """
-        return self.action(*args, **kwargs)
+        with tracing.span(f"menu {self.label}", "menu"):
+            profiler = profiling.ActionProfiler()
+            if profiler.enabled:
+                return profiler.call(self.label, self.action, *args, **kwargs)
+            return self.action(*args, **kwargs)
 
 class Menu:
     """
@@ -166,11 +227,12 @@ class Menu:
 
         Prints the title and each menu item with its index.
         """
-        if self.title == 'Main Menu':
-            ascii_art.ascii_main_menu()
-        print(f"\n{self.title}\n{'-' * len(self.title)}")
-        for i, item in enumerate(self.items, 1):
-            print(f"{i}. {item.label}")
+        with tracing.span(f"display {self.title}", "menu"):
+            if self.title == 'Main Menu':
+                ascii_art.ascii_main_menu()
+            print(f"\n{self.title}\n{'-' * len(self.title)}")
+            for i, item in enumerate(self.items, 1):
+                print(f"{i}. {item.label}")
 
     def execute(self, db_client=None):
         """
@@ -202,18 +264,21 @@ class MenuSystem:
     Attributes:
         menus (dict[str, Menu]): Dictionary of menus keyed by menu name.
         current_menu (str): The name of the currently active menu.
-        current_user_id (int): The ID of the currently logged-in user.
-        current_user_name (str): The name of the currently logged-in user.
-        current_user_email (str): The email of the currently logged-in user.
-        current_user_role (str): The role of the currently logged-in user.
+        session_store (SessionStore): The store holding every live session.
+        session_token (str): The token of the session driving this menu system, if any.
     """
-    def __init__(self):
+    def __init__(self, session_store=None):
         self.menus = {}
         self.current_menu = 'main'
-        self.current_user_id = None
-        self.current_user_name = None
-        self.current_user_email = None
-        self.current_user_role = None
+        self.session_store = session_store if session_store is not None else SessionStore()
+        self.session_token = None
+
+    @property
+    def session(self):
+        """
+        Session: The live session driving this menu system, or None if logged out or expired.
+        """
+        return self.session_store.get(self.session_token)
 
     def add_menu(self, menu_name, menu):
         """
@@ -240,18 +305,32 @@ class MenuSystem:
             print("Menu not found")
             return
 
-        if self.current_user_email is None and menu_name != 'main':
+        if self.session is None and menu_name != 'main':
             print("Please log in first")
             return
 
         self.menus[menu_name].display()
         self.menus[menu_name].execute(db_client)
 
+    def login(self, user_id, name, email, role):
+        """
+        Opens a new session for the given user and makes it the current one.
+
+        Args:
+            user_id (int): The ID of the user.
+            name (str): The name of the user.
+            email (str): The email of the user.
+            role (int): The role of the user.
+
+        Returns:
+            Session: The newly created session.
+        """
+        session = self.session_store.create(user_id, name, email, role)
+        self.session_token = session.token
+        return session
+
     def logout(self):
         self.current_menu = 'main'
-        self.current_user_id = None
-        self.current_user_name = None
-        self.current_user_email = None
-        self.current_user_role = None
-
-        
\ No newline at end of file
+        if self.session_token is not None:
+            self.session_store.delete(self.session_token)
+        self.session_token = None
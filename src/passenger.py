@@ -1,13 +1,18 @@
-from src.models import Admin, Passenger
-from src.utils import ascii_art, validate_inputs
+from src import services
+from src.utils import ascii_art, metrics, tracing, validate_inputs
 import logging
-import datetime
 from tabulate import tabulate
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
-def passenger_action(action, db_client, flight_generator, menu_system):
+BOOKING_HEADERS = ["ID", "BookingDate", "FlightNumber", "BookedTickets", "FromLocation", "ToLocation",
+                   "DepartureTime", "ArrivalTime", "FlightTime", "Gate", "Status", "Seats"]
+REFUND_HEADERS = ["BookingID", "FlightNumber", "DepartureTime", "Tickets", "BookingDate", "RefundDate", "Reason"]
+WAITLIST_HEADERS = ["ID", "FlightNumber", "Tickets", "Priority", "RequestedAt", "Position"]
+
+@metrics.timed_action("passenger")
+@tracing.traced_action("passenger")
+def passenger_action(action, db_client, flight_generator, session):
     """
     Handles passenger actions based on the given action string.
 
@@ -15,7 +20,7 @@ def passenger_action(action, db_client, flight_generator, menu_system):
         action (str): The action to perform (e.g., "book_flight", "update_personal_data", etc.)
         db_client: The database client instance.
         flight_generator: An instance of the flight generator class.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Raises:
         ValueError: If an unknown action is provided.
@@ -23,32 +28,32 @@ def passenger_action(action, db_client, flight_generator, menu_system):
     Returns:
         str: "deleted" if the delete_account action is performed successfully, otherwise None.
     """
-    logging.debug(f"Passenger action called with action: {action}")
+    logger.debug("Passenger action called with action: %s", action)
 
     if action == "book_flight":
-        book_flight(db_client, flight_generator, menu_system)
+        book_flight(db_client, flight_generator, session)
     elif action == "update_personal_data":
-        update_personal_data(db_client, menu_system)
+        update_personal_data(db_client, session)
     elif action == "delete_account":
-        return delete_account(db_client, menu_system)
+        return delete_account(db_client, session)
     elif action == "display_flight_schedule":
         display_flight_schedule(db_client, flight_generator)
     elif action == "cancel_booking":
-        cancel_booking(db_client, menu_system)
+        cancel_booking(db_client, session)
     elif action == "view_my_bookings":
-        view_my_bookings(db_client, menu_system)
+        view_my_bookings(db_client, session)
     else:
         raise ValueError("Unknown action")
 
 
-def book_flight(db_client, flight_generator, menu_system):
+def book_flight(db_client, flight_generator, session):
     """
     Books a flight for the current passenger.
 
     Args:
         db_client: The database client instance.
         flight_generator: An instance of the flight generator class.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Returns:
         None
@@ -57,46 +62,49 @@ def book_flight(db_client, flight_generator, menu_system):
     
     try:
         # fetch all flights and print them
-        flights = db_client.execute("SELECT * FROM flights").fetchall()
+        flights = services.list_flights(db_client)
         flight_generator.print_flights(flights)
         flight_no = validate_inputs.validate_non_empty_string(input("Enter the flight number: "), "Flight Number")
         tickets_required = validate_inputs.validate_positive_integer(input("Enter the number of tickets required: "), "Number of tickets")
 
-        # check if the flight exists
-        flight = db_client.execute("SELECT * FROM flights WHERE flight_number = ?", (flight_no,)).fetchone()
-        if flight is None:
-            print("Flight not found.")
-            return
-
-        # check if there are enough seats available
-        available_seats = flight[3]
-        if tickets_required > available_seats:
-            print("Not enough seats available.")
+        seat_map = services.get_seat_map(db_client, flight_no)
+        if seat_map.capacity - seat_map.taken_count < tickets_required:
+            raise services.NotEnoughSeatsError("Not enough seats available.")
+        print(seat_map.render())
+        seats = input(f"Enter {tickets_required} seat(s) from the map (e.g. 12A 12B), or press Enter to be seated together: ").strip()
+
+        hold = services.hold_seats(db_client, session.user_id, flight_no, tickets_required, seats or None)
+        print(f"{hold.tickets} seat(s) on flight {hold.flight_number}" + (f" ({', '.join(hold.seats)})" if hold.seats else "")
+              + f" are held for you until {hold.expires_at[11:19]}.")
+        if input("Confirm the booking? (yes/no): ").strip().lower() != "yes":
+            services.release_hold(db_client, hold.hold_id, session.user_id)
+            print("Booking cancelled; the seats were released.")
             return
-
-        # book the flight
-        db_client.execute("UPDATE flights SET available_seats = available_seats - ? WHERE flight_number = ?", (tickets_required, flight_no))
-
-        # get the flight id by flight number
-        flight_id = db_client.execute("SELECT id FROM flights WHERE flight_number = ?", (flight_no,)).fetchone()[0]
-
-        # add the booking to the database
-        db_client.execute("INSERT INTO bookings (user_id, flight_id, tickets, booking_date) VALUES (?, ?, ?, ?)", (menu_system.current_user_id, flight_id, tickets_required, datetime.date.today().isoformat()))
-       
-        db_client.commit()
-        print(f"Successfully booked {tickets_required} seat(s) on flight {flight_no}.")
+        booking = services.confirm_hold(db_client, hold.hold_id, session.user_id)
+        print(f"Successfully booked {booking.tickets} seat(s) on flight {booking.flight_number}"
+              + (f": {', '.join(booking.seats)}." if booking.seats else "."))
+    except services.NotEnoughSeatsError as e:
+        print(str(e))
+        if input("Join the waitlist for this flight? (yes/no): ").strip().lower() == "yes":
+            try:
+                entry = services.join_waitlist(db_client, session.user_id, flight_no, tickets_required)
+                print(f"You are number {entry.position} on the waitlist of flight {entry.flight_number}; "
+                      "you will be booked automatically when seats are released.")
+            except (services.ServiceError, ValueError) as e:
+                print(str(e))
+    except services.ServiceError as e:
+        print(str(e))
     except Exception as e:
-        db_client.rollback()
         print(f"Error booking flight: {str(e)}")
 
 
-def update_personal_data(db_client, menu_system):
+def update_personal_data(db_client, session):
     """
     Updates the personal data of the current passenger.
 
     Args:
         db_client: The database client instance.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Returns:
         None
@@ -108,20 +116,21 @@ def update_personal_data(db_client, menu_system):
     phone_number = validate_inputs.validate_phone_number(input("Enter the passenger phone number: "))
 
     try:
-        db_client.execute("UPDATE users SET name = ?, age = ?, email = ?, phone_number = ? WHERE id = ?", (name, age, email, phone_number, menu_system.current_user_id))
-        db_client.commit()
+        user = services.update_user(db_client, session.user_id, name, age, email, phone_number)
+        session.name = user.name
+        session.email = user.email
         print("Personal data updated successfully.")
     except Exception as e:
-        db_client.rollback()
         print(f"Error updating personal data: {str(e)}")
 
-def delete_account(db_client, menu_system):
+
+def delete_account(db_client, session):
     """
     Deletes the account of the current passenger after confirmation.
 
     Args:
         db_client: The database client instance.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Returns:
         str: "deleted" if the account was deleted successfully, otherwise None.
@@ -134,14 +143,13 @@ def delete_account(db_client, menu_system):
         return
 
     try:
-        db_client.execute("DELETE FROM users WHERE id = ?", (menu_system.current_user_id,))
-        db_client.commit()
+        services.delete_user(db_client, session.user_id)
         print("Account deleted successfully.")
         return "deleted"
     except Exception as e:
-        db_client.rollback()
         print(f"Error deleting account: {str(e)}")
 
+
 def display_flight_schedule(db_client, flight_generator):
     """
     Displays the flight schedule for the passenger.
@@ -156,7 +164,7 @@ def display_flight_schedule(db_client, flight_generator):
     ascii_art.ascii_customer_flight_schedule()
     try:
         # fetch all flights and print them
-        flights = db_client.execute("SELECT * FROM flights").fetchall()
+        flights = services.list_flights(db_client)
         flight_generator.print_flights(flights)
 
     except Exception as e:
@@ -164,13 +172,13 @@ def display_flight_schedule(db_client, flight_generator):
         print(f"Error displaying flight schedule: {str(e)}")
 
 
-def cancel_booking(db_client, menu_system):
+def cancel_booking(db_client, session):
     """
     Cancels a booking made by the current passenger.
 
     Args:
         db_client: The database client instance.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Returns:
         None
@@ -178,63 +186,50 @@ def cancel_booking(db_client, menu_system):
     ascii_art.ascii_customer_cancel_flight()
     
     try:
-        # Fetch all bookings for the current user
-        bookings = db_client.execute("""
-            SELECT 
-                b.id AS BookingID,
-                b.booking_date AS BookingDate,
-                f.flight_number AS FlightNumber,
-                b.tickets AS BookedTickets,
-                f.from_location AS FromLocation,
-                f.to_location AS ToLocation,
-                f.departure_time AS DepartureTime,
-                f.arrival_time AS ArrivalTime,
-                f.flight_time AS FlightTime,
-                f.gate AS Gate,
-                f.status AS Status
-            FROM bookings b
-            JOIN flights f ON b.flight_id = f.id
-            WHERE b.user_id = ?
-        """, (menu_system.current_user_id,)).fetchall()
-
-        # Print the bookings using tabulate
-        headers = ["ID", "BookingDate", "FlightNumber", "BookedTickets", "FromLocation", "ToLocation", 
-                   "DepartureTime", "ArrivalTime", "FlightTime", "Gate", "Status"]
-        
-        print(tabulate(bookings, headers=headers, tablefmt="grid"))
+        # Print all bookings for the current user
+        print(tabulate(services.my_bookings(db_client, session.user_id), headers=BOOKING_HEADERS, tablefmt="grid"))
+        waitlist = services.my_waitlist(db_client, session.user_id)
+        if waitlist:
+            print("Waitlisted:")
+            print(tabulate(waitlist, headers=WAITLIST_HEADERS, tablefmt="grid"))
 
         flight_number = validate_inputs.validate_non_empty_string(input("Enter the flight number to cancel booking: "), "Flight Number")
 
-        # check if the flight exists
-        flight = db_client.execute("SELECT * FROM flights WHERE flight_number = ?", (flight_number,)).fetchone()
-        if flight is None:
-            print("Flight not found.")
-            return
-
-        # check if the booking exists
-        booking = db_client.execute("SELECT * FROM bookings WHERE flight_id = ? AND user_id = ?", (flight[0], menu_system.current_user_id)).fetchone()
-        if booking is None:
-            print("Booking not found.")
+        entry = next((entry for entry in waitlist if entry.flight_number == flight_number), None)
+        try:
+            booking = services.find_booking(db_client, session.user_id, flight_number)
+        except services.NotFoundError:
+            if entry is None:
+                raise
+            booking = None
+        if entry is not None and booking is not None:
+            choice = input("You have a booking and a waitlist request on this flight. "
+                           "Cancel the (b)ooking or leave the (w)aitlist? ").strip().lower()
+            if choice == "b":
+                entry = None
+            elif choice != "w":
+                print("Nothing was canceled.")
+                return
+        if entry is not None:
+            services.leave_waitlist(db_client, entry.waitlist_id, session.user_id)
+            print("Left the waitlist successfully.")
             return
-
-        # cancel the booking and update the flight availability
-        db_client.execute("UPDATE flights SET available_seats = available_seats + ? WHERE id = ?", (booking[3], flight[0]))
-        db_client.execute("DELETE FROM bookings WHERE id = ?", (booking[0],))
-        db_client.commit()
+        services.cancel(db_client, booking.booking_id, session.user_id)
         print("Booking canceled successfully.")
 
-
+    except services.ServiceError as e:
+        print(str(e))
     except Exception as e:
-        db_client.rollback()
         print(f"Error canceling booking: {str(e)}")
 
-def view_my_bookings(db_client, menu_system):
+
+def view_my_bookings(db_client, session):
     """
     Displays all bookings made by the current passenger.
 
     Args:
         db_client: The database client instance.
-        menu_system: The current menu system instance.
+        session (Session): The session of the logged-in passenger.
 
     Returns:
         None
@@ -242,30 +237,18 @@ def view_my_bookings(db_client, menu_system):
     ascii_art.ascii_customer_registered_flights()
 
     try:
-        # Fetch all bookings for the current user
-        bookings = db_client.execute("""
-            SELECT 
-                b.id AS BookingID,
-                b.booking_date AS BookingDate,
-                f.flight_number AS FlightNumber,
-                b.tickets AS BookedTickets,
-                f.from_location AS FromLocation,
-                f.to_location AS ToLocation,
-                f.departure_time AS DepartureTime,
-                f.arrival_time AS ArrivalTime,
-                f.flight_time AS FlightTime,
-                f.gate AS Gate,
-                f.status AS Status
-            FROM bookings b
-            JOIN flights f ON b.flight_id = f.id
-            WHERE b.user_id = ?
-        """, (menu_system.current_user_id,)).fetchall()
-
-        # Print the bookings using tabulate
-        headers = ["ID", "BookingDate", "FlightNumber", "BookedTickets", "FromLocation", "ToLocation", 
-                   "DepartureTime", "ArrivalTime", "FlightTime", "Gate", "Status"]
-        
-        print(tabulate(bookings, headers=headers, tablefmt="grid"))
+        # Print all bookings for the current user
+        print(tabulate(services.my_bookings(db_client, session.user_id), headers=BOOKING_HEADERS, tablefmt="grid"))
+
+        waitlist = services.my_waitlist(db_client, session.user_id)
+        if waitlist:
+            print("Waitlisted:")
+            print(tabulate(waitlist, headers=WAITLIST_HEADERS, tablefmt="grid"))
+
+        refunds = services.refunds_for_user(db_client, session.user_id)
+        if refunds:
+            print("Refunded bookings of cancelled flights:")
+            print(tabulate([refund[1:] for refund in refunds], headers=REFUND_HEADERS, tablefmt="grid"))
 
     except Exception as e:
         print(f"Error fetching bookings: {str(e)}")
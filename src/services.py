@@ -0,0 +1,1518 @@
+# services.py
+
+import datetime
+import json
+from contextlib import contextmanager
+from typing import NamedTuple
+from src.models import Admin, Booking, Passenger
+from src.utils import rate_limiter, user_cache, validate_inputs
+from src.utils.db_client import record_factory
+from src.utils.seat_map import SeatMap
+
+# Business logic of the reservation system, free of input()/print() so it can be called
+# from the menus, scripts, servers and benchmarks alike. Every function takes the database
+# client first, returns typed results and reports failures by raising a ServiceError
+# (or ValueError for invalid input).
+
+class ServiceError(Exception):
+    """
+    Base class for errors reported by the service layer.
+    """
+
+class NotFoundError(ServiceError):
+    """
+    Raised when a user, flight or booking does not exist.
+    """
+
+class AuthenticationError(ServiceError):
+    """
+    Raised when credentials are invalid.
+    """
+
+class RateLimitedError(ServiceError):
+    """
+    Raised when a login attempt is rejected by the login rate limiter.
+    """
+
+class NotEnoughSeatsError(ServiceError):
+    """
+    Raised when a flight does not have enough available seats.
+    """
+
+class SeatTakenError(ServiceError):
+    """
+    Raised when a seat asked for is already taken.
+    """
+
+class HoldExpiredError(ServiceError):
+    """
+    Raised when a seat hold is confirmed after it expired.
+    """
+
+class UserRecord(NamedTuple):
+    """
+    A user, without the password.
+    """
+    id: int
+    name: str
+    age: int
+    email: str
+    phone_number: str
+    is_admin: int
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], row[1], row[2], row[3], row[5], row[6])
+
+class UserDeletion(NamedTuple):
+    """
+    The outcome of deleting users. `promoted` lists the waitlisted requests booked onto the
+    released seats.
+    """
+    users: int
+    bookings: int
+    seats: int
+    promoted: list
+
+class PassengerSearch(NamedTuple):
+    """
+    A page of passenger search results.
+    """
+    passengers: list
+    page: int
+    matches: int
+    truncated: bool
+
+class FlightRecord(NamedTuple):
+    """
+    A row of the 'flights' table.
+    """
+    id: int
+    flight_schedule: str
+    flight_number: str
+    available_seats: int
+    from_location: str
+    to_location: str
+    departure_time: str
+    arrival_time: str
+    flight_time: str
+    gate: str
+    distance: str
+    status: str
+
+class BookingRecord(NamedTuple):
+    """
+    A booking joined with the flight it is for.
+    """
+    booking_id: int
+    booking_date: str
+    flight_number: str
+    tickets: int
+    from_location: str
+    to_location: str
+    departure_time: str
+    arrival_time: str
+    flight_time: str
+    gate: str
+    status: str
+    seats: str
+
+class BookingResult(NamedTuple):
+    """
+    The outcome of a successful booking. `seats` lists the labels of the booked seats.
+    """
+    booking_id: int
+    flight_number: str
+    tickets: int
+    available_seats: int
+    seats: list
+
+class CancellationResult(NamedTuple):
+    """
+    The outcome of a successful cancellation. `promoted` lists the waitlisted requests
+    booked onto the released seats.
+    """
+    booking_id: int
+    flight_id: int
+    flight_number: str
+    tickets: int
+    promoted: list
+
+class WaitlistEntry(NamedTuple):
+    """
+    A request waiting for seats on a full flight. `position` is 1 for the next request served.
+    """
+    waitlist_id: int
+    flight_number: str
+    tickets: int
+    priority: int
+    requested_at: str
+    position: int
+
+class Promotion(NamedTuple):
+    """
+    A waitlisted request that was booked.
+    """
+    booking_id: int
+    waitlist_id: int
+    user_id: int
+    flight_id: int
+    flight_number: str
+    tickets: int
+    seats: list
+
+class SeatHold(NamedTuple):
+    """
+    Seats taken off a flight until they are confirmed as a booking, released or expire.
+    """
+    hold_id: int
+    flight_id: int
+    flight_number: str
+    tickets: int
+    seats: list
+    expires_at: str
+
+class HoldRelease(NamedTuple):
+    """
+    The outcome of releasing seat holds. `promoted` lists the waitlisted requests booked
+    onto the released seats.
+    """
+    holds: list
+    seats: int
+    promoted: list
+
+class CancelledFlight(NamedTuple):
+    """
+    A cancelled flight and the bookings that were refunded with it.
+    """
+    flight_number: str
+    departure_time: str
+    bookings: int
+    passengers: int
+    seats: int
+
+class FlightCancellation(NamedTuple):
+    """
+    The outcome of cancelling flights. Passengers are counted once even if they had
+    bookings on several of the flights; `waitlisted` counts the dropped waitlist requests.
+    """
+    flights: list
+    bookings: int
+    passengers: int
+    seats: int
+    waitlisted: int
+
+class RefundRecord(NamedTuple):
+    """
+    A booking refunded because its flight was cancelled.
+    """
+    refund_id: int
+    booking_id: int
+    flight_number: str
+    departure_time: str
+    tickets: int
+    booking_date: str
+    refund_date: str
+    reason: str
+
+class ManifestEntry(NamedTuple):
+    """
+    A booking on a flight's passenger manifest.
+    """
+    booking_id: int
+    passenger_id: int
+    name: str
+    age: int
+    email: str
+    phone_number: str
+    tickets: int
+
+class FlightOccupancy(NamedTuple):
+    """
+    The load factor of a flight.
+    """
+    flight_number: str
+    from_location: str
+    to_location: str
+    departure_time: str
+    capacity: int
+    booked_seats: int
+    load_factor: float
+
+class RouteOccupancy(NamedTuple):
+    """
+    The load factor of all flights on a route.
+    """
+    from_location: str
+    to_location: str
+    flights: int
+    capacity: int
+    booked_seats: int
+    load_factor: float
+
+class DailyOccupancy(NamedTuple):
+    """
+    The load factor of all flights departing on a day.
+    """
+    day: str
+    flights: int
+    capacity: int
+    booked_seats: int
+    load_factor: float
+
+# Matches of a passenger search that are ranked; narrower searches find the rest.
+SEARCH_CANDIDATES = 200
+
+BOOKINGS_QUERY = """
+    SELECT
+        b.id AS BookingID,
+        b.booking_date AS BookingDate,
+        f.flight_number AS FlightNumber,
+        b.tickets AS BookedTickets,
+        f.from_location AS FromLocation,
+        f.to_location AS ToLocation,
+        f.departure_time AS DepartureTime,
+        f.arrival_time AS ArrivalTime,
+        f.flight_time AS FlightTime,
+        f.gate AS Gate,
+        f.status AS Status,
+        b.seats AS Seats
+    FROM bookings b
+    JOIN flights f ON b.flight_id = f.id
+"""
+
+# The flights a cancel_flights call works on, per connection. flight_key is the id as text,
+# the way bookings.flight_id stores it, so their bookings are found through its index.
+CANCELLED_FLIGHTS_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS cancelled_flights (
+        id INTEGER PRIMARY KEY,
+        flight_key TEXT NOT NULL,
+        flight_number TEXT NOT NULL,
+        departure_time TEXT NOT NULL
+    )
+"""
+
+# Priority tier of waitlist requests unless another is given; tier 1 is served first.
+DEFAULT_WAITLIST_PRIORITY = 5
+
+# Seconds a seat hold lasts unless another time is given.
+DEFAULT_HOLD_TTL = 600
+
+# The users a delete_users call works on, per connection.
+DELETED_USERS_TABLE = "CREATE TEMP TABLE IF NOT EXISTS deleted_users (id INTEGER PRIMARY KEY)"
+
+@contextmanager
+def transaction(db_client):
+    """
+    Commits the statements run inside the block, or rolls them back if it raises.
+
+    Args:
+        db_client: The database client instance.
+    """
+    try:
+        yield db_client
+        db_client.commit()
+    except BaseException:
+        db_client.rollback()
+        raise
+
+#        ************************************************************ Users ************************************************************
+
+def authenticate(db_client, email, password, as_admin=False, source="console"):
+    """
+    Checks a user's credentials.
+
+    Attempts over the login rate limit are rejected before touching the database. Attempts
+    without a source come from trusted input (batch files) and are not rate limited.
+
+    Args:
+        db_client: The database client instance.
+        email (str): The user's email.
+        password (str): The user's password.
+        as_admin (bool): Whether the user must be an admin.
+        source (str): Where the attempt comes from, used for rate limiting; None to skip it.
+
+    Returns:
+        UserRecord: The authenticated user.
+
+    Raises:
+        RateLimitedError: If there were too many attempts.
+        NotFoundError: If no matching user exists.
+        AuthenticationError: If the password is wrong.
+    """
+    if source is not None and not rate_limiter.LoginRateLimiter().allow(email, source):
+        raise RateLimitedError("Too many login attempts, please try again later")
+
+    row = user_cache.UserCache().get_by_email(db_client, email)
+    if row is None or (as_admin and row[6] != 1):
+        raise NotFoundError(f"No {'admin' if as_admin else 'passenger'} found with that name")
+    user = (Admin if as_admin else Passenger).from_row(row)
+    if not user.authenticate(password):
+        raise AuthenticationError("Invalid credentials")
+    return UserRecord.from_row(row)
+
+def login(db_client, session_store, email, password, as_admin=False, source="console"):
+    """
+    Authenticates a user and opens a session for them.
+
+    Args:
+        db_client: The database client instance.
+        session_store (SessionStore): The store to open the session in.
+        email (str): The user's email.
+        password (str): The user's password.
+        as_admin (bool): Whether the user must be an admin.
+        source (str): Where the attempt comes from, used for rate limiting; None to skip it.
+
+    Returns:
+        Session: The new session.
+    """
+    user = authenticate(db_client, email, password, as_admin, source)
+    return session_store.create(user.id, user.name, user.email, user.is_admin)
+
+def register(db_client, name, age, email, password, phone_number, is_admin=False):
+    """
+    Registers a new user.
+
+    Args:
+        db_client: The database client instance.
+        name (str): The user's name.
+        age (int | str): The user's age.
+        email (str): The user's email.
+        password (str): The user's password.
+        phone_number (str): The user's phone number.
+        is_admin (bool): Whether the user is an admin.
+
+    Returns:
+        UserRecord: The registered user.
+
+    Raises:
+        ValueError: If any input is invalid.
+        sqlite3.IntegrityError: If the email is already registered.
+    """
+    name = validate_inputs.validate_non_empty_string(name, "Name")
+    age = validate_inputs.validate_positive_integer(age, "Age")
+    email = validate_inputs.validate_email(email)
+    password = validate_inputs.validate_password(password)
+    phone_number = validate_inputs.validate_phone_number(phone_number)
+
+    with transaction(db_client):
+        cursor = db_client.execute("""
+            INSERT INTO users (name, age, email, password, phone_number, is_admin)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (name, age, email, password, phone_number, is_admin))
+    user_cache.UserCache().invalidate(email=email)
+    return UserRecord(cursor.lastrowid, name, age, email, phone_number, int(is_admin))
+
+def get_user(db_client, email):
+    """
+    Looks up a user by email.
+
+    Args:
+        db_client: The database client instance.
+        email (str): The user's email.
+
+    Returns:
+        UserRecord: The user.
+
+    Raises:
+        NotFoundError: If no user has that email.
+    """
+    row = user_cache.UserCache().get_by_email(db_client, email)
+    if row is None:
+        raise NotFoundError("No passenger found with that email")
+    return UserRecord.from_row(row)
+
+def list_passengers(db_client):
+    """
+    Lists every passenger.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        list[UserRecord]: All non-admin users.
+    """
+    return db_client.query(
+        "SELECT id, name, age, email, phone_number, is_admin FROM users WHERE is_admin = 0",
+        row_factory=record_factory(UserRecord),
+    ).fetchall()
+
+def search_passengers(db_client, text, page=1, page_size=20):
+    """
+    Finds passengers whose name, email or phone number contain every word of a search text.
+
+    An exact email address or phone number is looked up through its B-tree index first.
+    Other candidates come from the trigram full-text index on users, so any fragment of
+    three or more characters matches without scanning the table: the first
+    SEARCH_CANDIDATES passengers it yields (admins and email addresses that do not contain
+    the full words are filtered out in the same query) are ranked exact match first, then
+    prefix matches, then names with a word starting with every search word, then any other
+    match. Only those candidates are ranked, so a search stays fast however many users
+    share a fragment; narrower searches find the rest.
+
+    Args:
+        db_client: The database client instance.
+        text (str): The search words, e.g. "ahmed 0142" or "@example.org".
+        page (int): The page to return, starting at 1.
+        page_size (int): Passengers per page.
+
+    Returns:
+        PassengerSearch: The passengers on the page.
+
+    Raises:
+        ValueError: If there are no search words or one is shorter than three characters.
+    """
+    words = text.lower().split()
+    if not words or any(len(word) < 3 for word in words):
+        raise ValueError("Search words must be at least 3 characters long")
+    page = validate_inputs.validate_positive_integer(page, "Page")
+    page_size = validate_inputs.validate_positive_integer(page_size, "Page size")
+
+    exact = []
+    if len(words) == 1:
+        typed = text.strip()
+        exact = db_client.query("""
+            SELECT id, name, age, email, phone_number, is_admin FROM users WHERE email IN (?, ?) AND is_admin = 0
+            UNION
+            SELECT id, name, age, email, phone_number, is_admin FROM users WHERE phone_number = ? AND is_admin = 0
+        """, (typed, words[0], typed), record_factory(UserRecord)).fetchall()
+
+    # Every word becomes a quoted phrase, so the input is never parsed as query syntax. The
+    # domain of an email address is shared by countless users and only slows the index
+    # lookup down, so words are looked up up to their "@" and checked in full by instr().
+    phrases = [word[:word.index("@") + 1] if word.find("@") >= 2 else word for word in words]
+    match = " ".join('"' + phrase.replace('"', '""') + '"' for phrase in phrases)
+    query = """
+        SELECT u.id, u.name, u.age, u.email, u.phone_number, u.is_admin
+        FROM users_fts
+        JOIN users u ON u.id = users_fts.rowid
+        WHERE users_fts MATCH ? AND u.is_admin = 0
+    """
+    params = [match]
+    for word, phrase in zip(words, phrases):
+        if word != phrase:
+            query += " AND (instr(lower(u.name), ?) OR instr(lower(u.email), ?) OR instr(u.phone_number, ?))"
+            params.extend((word, word, word))
+    # No ORDER BY: the index yields matches in rowid order and the query stops at the limit.
+    candidates = db_client.query(query + " LIMIT ?", (*params, SEARCH_CANDIDATES + 1), record_factory(UserRecord)).fetchall()
+
+    truncated = len(candidates) > SEARCH_CANDIDATES
+    found = {user.id for user in exact}
+    candidates = exact + [user for user in candidates[:SEARCH_CANDIDATES] if user.id not in found]
+    phrase = " ".join(words)
+    candidates.sort(key=lambda user: (_search_rank(user, phrase, words), user.name, user.id))
+    first = (page - 1) * page_size
+    return PassengerSearch(candidates[first:first + page_size], page, len(candidates), truncated)
+
+def _search_rank(user, phrase, words):
+    name = user.name.lower()
+    email = user.email.lower()
+    if phrase in (name, email, user.phone_number):
+        return 0
+    if name.startswith(phrase) or email.startswith(phrase) or user.phone_number.startswith(phrase):
+        return 1
+    name_words = name.split()
+    if all(any(name_word.startswith(word) for name_word in name_words) for word in words):
+        return 2
+    return 3
+
+def update_user(db_client, user_id, name, age, email, phone_number, password=None):
+    """
+    Updates a user's personal data.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the user.
+        name (str): The new name.
+        age (int | str): The new age.
+        email (str): The new email.
+        phone_number (str): The new phone number.
+        password (str): The new password, or None to keep the current one.
+
+    Returns:
+        UserRecord: The updated user.
+
+    Raises:
+        ValueError: If any input is invalid.
+        NotFoundError: If the user does not exist.
+    """
+    name = validate_inputs.validate_non_empty_string(name, "Name")
+    age = validate_inputs.validate_positive_integer(age, "Age")
+    email = validate_inputs.validate_email(email)
+    phone_number = validate_inputs.validate_phone_number(phone_number)
+    if password is not None:
+        password = validate_inputs.validate_password(password)
+
+    cache = user_cache.UserCache()
+    old = cache.get_by_id(db_client, user_id)
+    if old is None:
+        raise NotFoundError("No passenger found with that ID")
+    if password is None:
+        password = old[4]
+
+    with transaction(db_client):
+        db_client.execute("""
+            UPDATE users
+            SET name = ?, age = ?, email = ?, password = ?, phone_number = ?
+            WHERE id = ?
+        """, (name, age, email, password, phone_number, user_id))
+    row = (user_id, name, age, email, password, phone_number, old[6])
+    cache.put(row)
+    return UserRecord.from_row(row)
+
+def delete_user(db_client, user_id, session_store=None):
+    """
+    Deletes a user with their bookings, returning the booked seats. See delete_users.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the user.
+        session_store (SessionStore): If given, the user's sessions are revoked.
+
+    Returns:
+        UserDeletion: The deleted user, bookings and seats.
+
+    Raises:
+        NotFoundError: If the user does not exist.
+    """
+    deletion = delete_users(db_client, [user_id], session_store)
+    if not deletion.users:
+        raise NotFoundError("No passenger found with that ID")
+    return deletion
+
+def delete_users(db_client, user_ids, session_store=None):
+    """
+    Deletes passengers together with their bookings, refunds, waitlist requests and seat
+    holds, in one transaction.
+
+    The seats of the bookings go back to their flights through a single UPDATE joined to
+    the bookings grouped by flight (and those of the seat holds through another), and
+    everything else is deleted by one statement per table, so purging thousands of accounts
+    at once costs a handful of statements. The released seats are then offered to the
+    flights' waitlists. Unknown ids and admin accounts are ignored.
+
+    Args:
+        db_client: The database client instance.
+        user_ids (Iterable[int]): The IDs of the users.
+        session_store (SessionStore): If given, the users' sessions are revoked.
+
+    Returns:
+        UserDeletion: The number of users and bookings deleted, seats returned and the promotions.
+    """
+    user_ids = [int(user_id) for user_id in user_ids]
+    with transaction(db_client):
+        db_client.execute(DELETED_USERS_TABLE)
+        db_client.execute("DELETE FROM temp.deleted_users")
+        db_client.execute("""
+            INSERT OR IGNORE INTO temp.deleted_users (id)
+            SELECT id FROM users WHERE id IN (SELECT value FROM json_each(?)) AND is_admin = 0
+        """, (json.dumps(user_ids),))
+
+        bookings, seats = db_client.execute("""
+            SELECT COUNT(*), COALESCE(SUM(tickets), 0) FROM bookings
+            WHERE user_id IN (SELECT id FROM temp.deleted_users)
+        """).fetchone()
+        released = db_client.execute("""
+            UPDATE flights SET available_seats = available_seats + released.seats
+            FROM (
+                SELECT CAST(flight_id AS INTEGER) AS flight_id, SUM(tickets) AS seats
+                FROM bookings
+                WHERE user_id IN (SELECT id FROM temp.deleted_users)
+                GROUP BY 1
+            ) AS released
+            WHERE flights.id = released.flight_id
+            RETURNING flights.id
+        """).fetchall()
+        db_client.execute("DELETE FROM bookings WHERE user_id IN (SELECT id FROM temp.deleted_users)")
+        db_client.execute("DELETE FROM refunds WHERE user_id IN (SELECT id FROM temp.deleted_users)")
+        db_client.execute("DELETE FROM waitlist WHERE user_id IN (SELECT id FROM temp.deleted_users)")
+        _, held = _release_holds(db_client, _delete_holds(db_client, "user_id IN (SELECT id FROM temp.deleted_users)", ()))
+        deleted = db_client.execute("DELETE FROM users WHERE id IN (SELECT id FROM temp.deleted_users) RETURNING id").fetchall()
+        db_client.execute("DELETE FROM temp.deleted_users")
+        promoted = promote_waitlist(db_client, sorted({flight_id for (flight_id,) in released} | set(held)))
+
+    cache = user_cache.UserCache()
+    for (user_id,) in deleted:
+        cache.invalidate(user_id=user_id)
+        if session_store is not None:
+            session_store.revoke_user(user_id)
+    return UserDeletion(len(deleted), bookings, seats, promoted)
+
+#        ************************************************************ Flights ************************************************************
+
+def list_flights(db_client):
+    """
+    Lists every flight.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        list[FlightRecord]: All flights.
+    """
+    return db_client.query("SELECT * FROM flights", row_factory=record_factory(FlightRecord)).fetchall()
+
+def search_flights(db_client, from_location=None, to_location=None, min_seats=None):
+    """
+    Searches flights by route and availability.
+
+    Args:
+        db_client: The database client instance.
+        from_location (str): Only flights departing from a city starting with this text.
+        to_location (str): Only flights arriving in a city starting with this text.
+        min_seats (int): Only flights with at least this many available seats.
+
+    Returns:
+        list[FlightRecord]: The matching flights.
+    """
+    conditions = []
+    params = []
+    if from_location:
+        conditions.append("from_location LIKE ? ESCAPE '\\'")
+        params.append(_like_prefix(from_location))
+    if to_location:
+        conditions.append("to_location LIKE ? ESCAPE '\\'")
+        params.append(_like_prefix(to_location))
+    if min_seats is not None:
+        conditions.append("available_seats >= ?")
+        params.append(int(min_seats))
+
+    query = "SELECT * FROM flights"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return db_client.query(query, params, record_factory(FlightRecord)).fetchall()
+
+def _like_prefix(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def get_flight(db_client, flight_number):
+    """
+    Looks up a flight by number.
+
+    Args:
+        db_client: The database client instance.
+        flight_number (str): The flight number.
+
+    Returns:
+        FlightRecord: The flight.
+
+    Raises:
+        NotFoundError: If the flight does not exist.
+    """
+    flight = db_client.query("SELECT * FROM flights WHERE flight_number = ?", (flight_number,), record_factory(FlightRecord)).fetchone()
+    if flight is None:
+        raise NotFoundError("Flight not found.")
+    return flight
+
+def flights_for_user(db_client, user_id):
+    """
+    Lists the flights a user has bookings on.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the user.
+
+    Returns:
+        list[FlightRecord]: The booked flights.
+    """
+    return db_client.query(
+        "SELECT * FROM flights WHERE id IN (SELECT flight_id FROM bookings WHERE user_id = ?)",
+        (user_id,),
+        record_factory(FlightRecord),
+    ).fetchall()
+
+def flight_manifest(db_client, flight_number, batch_size=500):
+    """
+    Streams the passenger manifest of a flight, in booking order.
+
+    The bookings are found through the covering index on bookings (flight_id, user_id,
+    tickets) by the flight's id, bound as a parameter so it is compared as stored; joining
+    on flights.id instead would compare numerically and scan every booking. Rows are
+    fetched `batch_size` at a time as the result is iterated.
+
+    Args:
+        db_client: The database client instance.
+        flight_number (str): The flight number.
+        batch_size (int): Rows fetched from SQLite at a time.
+
+    Returns:
+        Iterator[ManifestEntry]: One entry per booking.
+
+    Raises:
+        NotFoundError: If the flight does not exist.
+    """
+    flight = get_flight(db_client, flight_number)
+    cursor = db_client.query("""
+        SELECT b.id, u.id, u.name, u.age, u.email, u.phone_number, b.tickets
+        FROM bookings b
+        JOIN users u ON u.id = b.user_id
+        WHERE b.flight_id = ?
+        ORDER BY b.id
+    """, (flight.id,), record_factory(ManifestEntry))
+    return _stream(cursor, batch_size)
+
+def _stream(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+def delete_flight(db_client, flight_number, reason="Flight cancelled"):
+    """
+    Cancels a flight, refunding its bookings. See cancel_flights.
+
+    Args:
+        db_client: The database client instance.
+        flight_number (str): The flight number.
+        reason (str): Reason recorded with the refunds.
+
+    Returns:
+        FlightCancellation: The cancelled flight and its refunded bookings.
+
+    Raises:
+        NotFoundError: If the flight does not exist.
+    """
+    cancellation = cancel_flights(db_client, flight_numbers=[flight_number], reason=reason)
+    if not cancellation.flights:
+        raise NotFoundError(f"Flight {flight_number} not found")
+    return cancellation
+
+def cancel_flights(db_client, flight_numbers=None, from_location=None, to_location=None, departure_from=None,
+                   departure_to=None, reason="Flight cancelled", dry_run=False):
+    """
+    Cancels every flight matching all given criteria, in one transaction.
+
+    The bookings of the flights are copied to 'refunds' and deleted together with the
+    flights (and their waitlists and seat holds) by a handful of set-based statements,
+    however many flights and bookings are affected. The flights are deleted before their
+    bookings, so the occupancy triggers of the bookings find no summary rows left to update.
+
+    Args:
+        db_client: The database client instance.
+        flight_numbers (Iterable[str]): Only flights with one of these numbers.
+        from_location (str): Only flights departing from a city starting with this text.
+        to_location (str): Only flights arriving in a city starting with this text.
+        departure_from (str): Only flights departing on or after this day (YYYY-MM-DD).
+        departure_to (str): Only flights departing on or before this day (YYYY-MM-DD).
+        reason (str): Reason recorded with the refunds.
+        dry_run (bool): Only report what would be cancelled.
+
+    Returns:
+        FlightCancellation: The cancelled flights, in departure order, and the totals.
+
+    Raises:
+        ValueError: If no criteria are given or a date is invalid.
+    """
+    conditions = []
+    params = []
+    if flight_numbers is not None:
+        conditions.append("flight_number IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(flight_numbers)))
+    if from_location:
+        conditions.append("from_location LIKE ? ESCAPE '\\'")
+        params.append(_like_prefix(from_location))
+    if to_location:
+        conditions.append("to_location LIKE ? ESCAPE '\\'")
+        params.append(_like_prefix(to_location))
+    if departure_from:
+        conditions.append("departure_time >= ?")
+        params.append(validate_inputs.validate_date(departure_from, "First departure day"))
+    if departure_to:
+        conditions.append("departure_time < date(?, '+1 day')")
+        params.append(validate_inputs.validate_date(departure_to, "Last departure day"))
+    if not conditions:
+        raise ValueError("Specify the flights to cancel")
+
+    with transaction(db_client):
+        db_client.execute(CANCELLED_FLIGHTS_TABLE)
+        db_client.execute("DELETE FROM temp.cancelled_flights")
+        db_client.execute("""
+            INSERT INTO temp.cancelled_flights (id, flight_key, flight_number, departure_time)
+            SELECT id, CAST(id AS TEXT), flight_number, departure_time FROM flights
+            WHERE """ + " AND ".join(conditions), params)
+
+        flights = db_client.query("""
+            SELECT c.flight_number, c.departure_time, COUNT(b.id), COUNT(DISTINCT b.user_id), COALESCE(SUM(b.tickets), 0)
+            FROM temp.cancelled_flights c
+            LEFT JOIN bookings b ON b.flight_id = c.flight_key
+            GROUP BY c.id
+            ORDER BY c.departure_time, c.flight_number
+        """, row_factory=record_factory(CancelledFlight)).fetchall()
+        passengers = db_client.execute("""
+            SELECT COUNT(DISTINCT user_id) FROM bookings
+            WHERE flight_id IN (SELECT flight_key FROM temp.cancelled_flights)
+        """).fetchone()[0]
+        waitlisted = db_client.execute("SELECT COUNT(*) FROM waitlist WHERE flight_id IN (SELECT id FROM temp.cancelled_flights)").fetchone()[0]
+
+        if not dry_run:
+            db_client.execute("""
+                INSERT INTO refunds (booking_id, user_id, flight_number, departure_time, tickets, booking_date, refund_date, reason)
+                SELECT b.id, b.user_id, c.flight_number, c.departure_time, b.tickets, b.booking_date, ?, ?
+                FROM temp.cancelled_flights c
+                JOIN bookings b ON b.flight_id = c.flight_key
+            """, (datetime.date.today().isoformat(), reason))
+            db_client.execute("DELETE FROM flights WHERE id IN (SELECT id FROM temp.cancelled_flights)")
+            db_client.execute("DELETE FROM bookings WHERE flight_id IN (SELECT flight_key FROM temp.cancelled_flights)")
+            db_client.execute("DELETE FROM waitlist WHERE flight_id IN (SELECT id FROM temp.cancelled_flights)")
+            db_client.execute("DELETE FROM seat_holds WHERE flight_id IN (SELECT id FROM temp.cancelled_flights)")
+        db_client.execute("DELETE FROM temp.cancelled_flights")
+
+    return FlightCancellation(flights, sum(flight.bookings for flight in flights), passengers,
+                              sum(flight.seats for flight in flights), waitlisted)
+
+#        ************************************************************ Bookings ************************************************************
+
+def book(db_client, user_id, flight_number, tickets, seats=None):
+    """
+    Books seats on a flight.
+
+    The seat count is decremented with a conditional UPDATE, so concurrent bookings can
+    never take the counter below zero. In the same transaction the booking gets concrete
+    seats from the flight's seat map: the ones asked for, or else adjacent seats if a row
+    still has them and the frontmost free seats otherwise.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+        flight_number (str): The flight number.
+        tickets (int | str): The number of seats to book.
+        seats (Iterable[str] | str): Labels of the seats to book, one per ticket (e.g. "12A 12B").
+
+    Returns:
+        BookingResult: The new booking.
+
+    Raises:
+        ValueError: If the number of tickets or a seat is invalid.
+        NotFoundError: If the flight does not exist.
+        NotEnoughSeatsError: If the flight has too few seats left.
+        SeatTakenError: If one of the seats asked for is taken.
+    """
+    tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+
+    with transaction(db_client):
+        flight_id, available_seats, labels = _claim_seats(db_client, flight_number, tickets, seats)
+        cursor = db_client.execute(
+            "INSERT INTO bookings (user_id, flight_id, tickets, booking_date, seats) VALUES (?, ?, ?, ?, ?)",
+            (user_id, flight_id, tickets, datetime.date.today().isoformat(), ",".join(labels) or None),
+        )
+    return BookingResult(cursor.lastrowid, flight_number, tickets, available_seats, labels)
+
+def _claim_seats(db_client, flight_number, tickets, seats):
+    # Takes seats off a flight's counter and seat map for a booking or hold being made.
+    # Returns (flight_id, available_seats left, seat labels).
+    flight = db_client.query("SELECT id, available_seats FROM flights WHERE flight_number = ?", (flight_number,)).fetchone()
+    if flight is None:
+        raise NotFoundError("Flight not found.")
+
+    updated = db_client.execute(
+        "UPDATE flights SET available_seats = available_seats - ? WHERE id = ? AND available_seats >= ? RETURNING available_seats",
+        (tickets, flight["id"], tickets),
+    ).fetchone()
+    if updated is None:
+        raise NotEnoughSeatsError("Not enough seats available.")
+    available_seats = updated[0]
+
+    if seats is None:
+        labels = assign_seats(db_client, flight["id"], available_seats + tickets, [tickets])[0]
+    else:
+        labels = _take_seats(db_client, flight["id"], available_seats + tickets, tickets, seats)
+    return flight["id"], available_seats, labels
+
+def get_seat_map(db_client, flight_number):
+    """
+    Returns a flight's seat map, building it (and seating its bookings) on first use.
+
+    Args:
+        db_client: The database client instance.
+        flight_number (str): The flight number.
+
+    Returns:
+        SeatMap: The seat map.
+
+    Raises:
+        NotFoundError: If the flight does not exist or has no recorded capacity.
+    """
+    with transaction(db_client):
+        flight = db_client.query("SELECT id, available_seats FROM flights WHERE flight_number = ?", (flight_number,)).fetchone()
+        if flight is None:
+            raise NotFoundError("Flight not found.")
+        seat_map, changed = _seat_map(db_client, flight["id"], flight["available_seats"])
+        if seat_map is None:
+            raise NotFoundError("Flight has no seat map.")
+        if changed:
+            _save_seat_map(db_client, flight["id"], seat_map)
+    return seat_map
+
+def assign_seats(db_client, flight_id, available_seats, tickets):
+    """
+    Picks seats for bookings being made on a flight and marks them taken, within the
+    caller's transaction.
+
+    Args:
+        db_client: The database client instance.
+        flight_id (int): The ID of the flight.
+        available_seats (int): The flight's available seats before these bookings.
+        tickets (Iterable[int]): The number of seats of every booking.
+
+    Returns:
+        list[list[str]]: The seat labels of every booking, empty if the flight has no seat map.
+    """
+    seat_map, _ = _seat_map(db_client, flight_id, available_seats)
+    if seat_map is None:
+        return [[] for _ in tickets]
+    labels = []
+    for count in tickets:
+        seats = seat_map.allocate(count)
+        seat_map.hold(seats)
+        labels.append(seat_map.labels(seats))
+    _save_seat_map(db_client, flight_id, seat_map)
+    return labels
+
+def _take_seats(db_client, flight_id, available_seats, tickets, labels):
+    seat_map, _ = _seat_map(db_client, flight_id, available_seats)
+    if seat_map is None:
+        raise ValueError("Seats cannot be chosen on this flight")
+    seats = seat_map.parse(labels)
+    if len(seats) != tickets:
+        raise ValueError(f"Choose one seat per ticket ({tickets})")
+    taken = [seat for seat in seats if not seat_map.is_free(seat)]
+    if taken:
+        raise SeatTakenError(f"Seat(s) already taken: {', '.join(seat_map.labels(taken))}")
+    seat_map.hold(seats)
+    _save_seat_map(db_client, flight_id, seat_map)
+    return seat_map.labels(seats)
+
+def _seat_map(db_client, flight_id, available_seats):
+    # Writes that move seats without going through the map (bulk passenger deletion, the
+    # seat inventory, reconciliation repairs) leave its taken seats off from the flight's
+    # booked and held seats, and capacity changes leave it the wrong size. It is then rebuilt
+    # from the bookings and holds: valid seats are taken again and those without get new ones.
+    row = db_client.execute("""
+        SELECT c.seats, m.layout, m.capacity, m.taken
+        FROM flight_capacity c
+        LEFT JOIN seat_maps m ON m.flight_id = c.flight_id
+        WHERE c.flight_id = ?
+    """, (flight_id,)).fetchone()
+    if row is None:
+        return None, False
+    capacity = row[0]
+    if row[1] is not None and row[2] == capacity:
+        seat_map = SeatMap.from_row(row[1:])
+        if seat_map.taken_count == capacity - available_seats:
+            return seat_map, False
+
+    seat_map = SeatMap.for_capacity(capacity)
+    unseated = []
+    for table, row_id, tickets, labels in db_client.execute("""
+        SELECT 'bookings', id, tickets, seats FROM bookings WHERE flight_id = ?
+        UNION ALL
+        SELECT 'seat_holds', id, tickets, seats FROM seat_holds WHERE flight_id = ?
+        ORDER BY 1, 2
+    """, (str(flight_id), flight_id)).fetchall():
+        try:
+            seats = seat_map.parse(labels or "")
+        except ValueError:
+            seats = []
+        if seats and len(seats) == tickets and all(seat_map.is_free(seat) for seat in seats):
+            seat_map.hold(seats)
+        else:
+            unseated.append((table, row_id, tickets))
+    assigned = {"bookings": [], "seat_holds": []}
+    for table, row_id, tickets in unseated:
+        seats = seat_map.allocate(tickets)
+        seat_map.hold(seats)
+        assigned[table].append((",".join(seat_map.labels(seats)) or None, row_id))
+    for table, rows in assigned.items():
+        db_client.executemany(f"UPDATE {table} SET seats = ? WHERE id = ?", rows)
+    return seat_map, True
+
+def _save_seat_map(db_client, flight_id, seat_map):
+    db_client.execute("INSERT OR REPLACE INTO seat_maps (flight_id, layout, capacity, taken) VALUES (?, ?, ?, ?)",
+                      (flight_id, seat_map.layout.name, seat_map.capacity, seat_map.to_blob()))
+
+def _release_seats(db_client, flight_id, labels):
+    row = db_client.execute("SELECT layout, capacity, taken FROM seat_maps WHERE flight_id = ?", (flight_id,)).fetchone()
+    if row is None:
+        return
+    seat_map = SeatMap.from_row(row)
+    try:
+        seat_map.release(seat_map.parse(labels))
+    except ValueError:
+        return
+    db_client.execute("UPDATE seat_maps SET taken = ? WHERE flight_id = ?", (seat_map.to_blob(), flight_id))
+
+def my_bookings(db_client, user_id):
+    """
+    Lists a passenger's bookings.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+
+    Returns:
+        list[BookingRecord]: The passenger's bookings.
+    """
+    return db_client.query(BOOKINGS_QUERY + " WHERE b.user_id = ?", (user_id,), record_factory(BookingRecord)).fetchall()
+
+def find_booking(db_client, user_id, flight_number):
+    """
+    Looks up a passenger's booking on a flight.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+        flight_number (str): The flight number.
+
+    Returns:
+        BookingRecord: The booking.
+
+    Raises:
+        NotFoundError: If the flight or the booking does not exist.
+    """
+    get_flight(db_client, flight_number)
+    booking = db_client.query(
+        BOOKINGS_QUERY + " WHERE b.user_id = ? AND f.flight_number = ?",
+        (user_id, flight_number),
+        record_factory(BookingRecord),
+    ).fetchone()
+    if booking is None:
+        raise NotFoundError("Booking not found.")
+    return booking
+
+def refunds_for_user(db_client, user_id):
+    """
+    Lists a passenger's bookings that were refunded because their flight was cancelled.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+
+    Returns:
+        list[RefundRecord]: The refunds, latest first.
+    """
+    return db_client.query("""
+        SELECT id, booking_id, flight_number, departure_time, tickets, booking_date, refund_date, reason
+        FROM refunds
+        WHERE user_id = ?
+        ORDER BY id DESC
+    """, (user_id,), record_factory(RefundRecord)).fetchall()
+
+def cancel(db_client, booking_id, user_id=None):
+    """
+    Cancels a booking and returns its seats to the flight and its seat map, then offers
+    them to the flight's waitlist.
+
+    Args:
+        db_client: The database client instance.
+        booking_id (int): The ID of the booking.
+        user_id (int): If given, the booking must belong to this passenger.
+
+    Returns:
+        CancellationResult: The cancelled booking.
+
+    Raises:
+        NotFoundError: If the booking does not exist (or belongs to someone else).
+    """
+    with transaction(db_client):
+        booking = db_client.query("SELECT * FROM bookings WHERE id = ?", (booking_id,), record_factory(Booking)).fetchone()
+        if booking is None or (user_id is not None and booking.user_id != user_id):
+            raise NotFoundError("Booking not found.")
+
+        flight = db_client.query(
+            "UPDATE flights SET available_seats = available_seats + ? WHERE id = ? RETURNING flight_number",
+            (booking.tickets, booking.flight_id),
+        ).fetchone()
+        db_client.execute("DELETE FROM bookings WHERE id = ?", (booking.id,))
+        promoted = []
+        if flight is not None:
+            if booking.seats:
+                _release_seats(db_client, int(booking.flight_id), booking.seats)
+            promoted = promote_waitlist(db_client, [int(booking.flight_id)])
+    if flight is None:
+        return CancellationResult(booking.id, None, None, booking.tickets, promoted)
+    return CancellationResult(booking.id, int(booking.flight_id), flight["flight_number"], booking.tickets, promoted)
+
+#        ************************************************************ Waitlist ************************************************************
+
+def join_waitlist(db_client, user_id, flight_number, tickets, priority=DEFAULT_WAITLIST_PRIORITY):
+    """
+    Puts a passenger on the waitlist of a flight that has too few seats left.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+        flight_number (str): The flight number.
+        tickets (int | str): The number of seats wanted.
+        priority (int | str): The priority tier, from 1 (served first) up.
+
+    Returns:
+        WaitlistEntry: The request and its place in the waitlist.
+
+    Raises:
+        ValueError: If the number of tickets or the priority is invalid, or the flight has the seats.
+        NotFoundError: If the flight does not exist.
+    """
+    tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+    priority = validate_inputs.validate_positive_integer(priority, "Priority")
+    requested_at = datetime.datetime.now().isoformat(sep=" ", timespec="seconds")
+
+    with transaction(db_client):
+        flight = db_client.query("SELECT id, available_seats FROM flights WHERE flight_number = ?", (flight_number,)).fetchone()
+        if flight is None:
+            raise NotFoundError("Flight not found.")
+        if flight["available_seats"] >= tickets:
+            raise ValueError("The flight has enough seats available, book them instead")
+        waitlist_id = db_client.execute(
+            "INSERT INTO waitlist (flight_id, user_id, tickets, priority, requested_at) VALUES (?, ?, ?, ?, ?)",
+            (flight["id"], user_id, tickets, priority, requested_at),
+        ).lastrowid
+        position = db_client.execute(
+            "SELECT COUNT(*) FROM waitlist WHERE flight_id = ? AND (priority, id) <= (?, ?)",
+            (flight["id"], priority, waitlist_id),
+        ).fetchone()[0]
+    return WaitlistEntry(waitlist_id, flight_number, tickets, priority, requested_at, position)
+
+def leave_waitlist(db_client, waitlist_id, user_id=None):
+    """
+    Withdraws a waitlist request.
+
+    Args:
+        db_client: The database client instance.
+        waitlist_id (int): The ID of the request.
+        user_id (int): If given, the request must belong to this passenger.
+
+    Raises:
+        NotFoundError: If the request does not exist (or belongs to someone else).
+    """
+    with transaction(db_client):
+        query = "DELETE FROM waitlist WHERE id = ?"
+        params = [waitlist_id]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if not db_client.execute(query, params).rowcount:
+            raise NotFoundError("Waitlist request not found.")
+
+def my_waitlist(db_client, user_id):
+    """
+    Lists a passenger's waitlist requests with their place in line.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+
+    Returns:
+        list[WaitlistEntry]: The requests, oldest first.
+    """
+    return db_client.query("""
+        SELECT w.id, f.flight_number, w.tickets, w.priority, w.requested_at,
+               (SELECT COUNT(*) FROM waitlist ahead
+                WHERE ahead.flight_id = w.flight_id AND (ahead.priority, ahead.id) <= (w.priority, w.id))
+        FROM waitlist w
+        JOIN flights f ON f.id = w.flight_id
+        WHERE w.user_id = ?
+        ORDER BY w.id
+    """, (user_id,), record_factory(WaitlistEntry)).fetchall()
+
+def promote_waitlist(db_client, flight_ids):
+    """
+    Books waitlisted requests onto the free seats of flights, within the caller's transaction.
+
+    Requests are served in waitlist order, read front to back from the waitlist index and
+    only as far as the free seats go. A request needing more seats than are left is
+    skipped but keeps its place, so it does not hold up smaller requests behind it. All
+    promotions onto a flight are written together: one seat counter update, one seat map
+    update and one waitlist delete, whether a cancellation freed two seats or two hundred.
+
+    Args:
+        db_client: The database client instance.
+        flight_ids (Iterable[int]): The IDs of the flights that have had seats released.
+
+    Returns:
+        list[Promotion]: The requests that were booked.
+    """
+    today = datetime.date.today().isoformat()
+    promoted = []
+    for flight_id in flight_ids:
+        flight = db_client.execute("SELECT flight_number, available_seats FROM flights WHERE id = ?", (flight_id,)).fetchone()
+        if flight is None or flight[1] <= 0:
+            continue
+        flight_number, available = flight
+        free = available
+
+        chosen = []
+        cursor = db_client.execute("SELECT id, user_id, tickets FROM waitlist WHERE flight_id = ? AND tickets <= ? ORDER BY priority, id",
+                                   (flight_id, available))
+        for waitlist_id, user_id, tickets in _stream(cursor, 500):
+            if tickets <= free:
+                chosen.append((waitlist_id, user_id, tickets))
+                free -= tickets
+                if not free:
+                    break
+        if not chosen:
+            continue
+
+        db_client.execute("UPDATE flights SET available_seats = available_seats - ? WHERE id = ?", (available - free, flight_id))
+        labels = assign_seats(db_client, flight_id, available, [tickets for _, _, tickets in chosen])
+        for (waitlist_id, user_id, tickets), seats in zip(chosen, labels):
+            booking_id = db_client.execute(
+                "INSERT INTO bookings (user_id, flight_id, tickets, booking_date, seats) VALUES (?, ?, ?, ?, ?)",
+                (user_id, flight_id, tickets, today, ",".join(seats) or None),
+            ).lastrowid
+            promoted.append(Promotion(booking_id, waitlist_id, user_id, flight_id, flight_number, tickets, seats))
+        db_client.execute("DELETE FROM waitlist WHERE id IN (SELECT value FROM json_each(?))",
+                          (json.dumps([waitlist_id for waitlist_id, _, _ in chosen]),))
+    return promoted
+
+#        ************************************************************ Seat holds ************************************************************
+
+# Columns of a seat hold as _release_holds takes them.
+HOLD_COLUMNS = "id, flight_id, tickets, seats, expires_at"
+
+def hold_seats(db_client, user_id, flight_number, tickets, seats=None, ttl=DEFAULT_HOLD_TTL):
+    """
+    Takes seats off a flight for `ttl` seconds, e.g. while the passenger pays, until the
+    hold is confirmed as a booking or released.
+
+    The seats leave the flight's counter and seat map just as for a booking (see book), so
+    nobody else can book them meanwhile. Holds that are not confirmed in time are released
+    by expire_holds.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+        flight_number (str): The flight number.
+        tickets (int | str): The number of seats to hold.
+        seats (Iterable[str] | str): Labels of the seats to hold, one per ticket.
+        ttl (int | str): Seconds until the hold expires.
+
+    Returns:
+        SeatHold: The new hold.
+
+    Raises:
+        See book.
+    """
+    tickets = validate_inputs.validate_positive_integer(tickets, "Number of tickets")
+    ttl = validate_inputs.validate_positive_integer(ttl, "Hold time")
+
+    with transaction(db_client):
+        flight_id, _, labels = _claim_seats(db_client, flight_number, tickets, seats)
+        expires_at = _hold_clock(ttl)
+        hold_id = db_client.execute(
+            "INSERT INTO seat_holds (flight_id, user_id, tickets, seats, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (flight_id, user_id, tickets, ",".join(labels) or None, expires_at),
+        ).lastrowid
+    return SeatHold(hold_id, flight_id, flight_number, tickets, labels, expires_at)
+
+def confirm_hold(db_client, hold_id, user_id=None):
+    """
+    Turns a seat hold into a booking of the same seats.
+
+    Args:
+        db_client: The database client instance.
+        hold_id (int): The ID of the hold.
+        user_id (int): If given, the hold must belong to this passenger.
+
+    Returns:
+        BookingResult: The new booking.
+
+    Raises:
+        NotFoundError: If the hold does not exist (or belongs to someone else).
+        HoldExpiredError: If the hold expired; its seats are released.
+    """
+    with transaction(db_client):
+        hold = _delete_holds(db_client, "id = ?" + (" AND user_id = ?" if user_id is not None else ""),
+                             (hold_id,) if user_id is None else (hold_id, user_id), "user_id")
+        if not hold:
+            raise NotFoundError("Seat hold not found.")
+        hold_id, flight_id, tickets, seats, expires_at, user_id = hold[0]
+        expired = expires_at <= _hold_clock()
+        if expired:
+            _, flight_ids = _release_holds(db_client, [hold[0][:5]])
+            promote_waitlist(db_client, flight_ids)
+        else:
+            flight = db_client.execute("SELECT flight_number, available_seats FROM flights WHERE id = ?", (flight_id,)).fetchone()
+            if flight is None:
+                raise NotFoundError("Flight not found.")
+            booking_id = db_client.execute(
+                "INSERT INTO bookings (user_id, flight_id, tickets, booking_date, seats) VALUES (?, ?, ?, ?, ?)",
+                (user_id, flight_id, tickets, datetime.date.today().isoformat(), seats),
+            ).lastrowid
+    if expired:
+        raise HoldExpiredError("The seat hold has expired and its seats were released.")
+    return BookingResult(booking_id, flight[0], tickets, flight[1], seats.split(",") if seats else [])
+
+def release_hold(db_client, hold_id, user_id=None):
+    """
+    Gives the seats of a hold back to the flight, e.g. when the payment failed.
+
+    Args:
+        db_client: The database client instance.
+        hold_id (int): The ID of the hold.
+        user_id (int): If given, the hold must belong to this passenger.
+
+    Returns:
+        HoldRelease: The released hold and the waitlisted requests booked onto its seats.
+
+    Raises:
+        NotFoundError: If the hold does not exist (or belongs to someone else).
+    """
+    with transaction(db_client):
+        holds = _delete_holds(db_client, "id = ?" + (" AND user_id = ?" if user_id is not None else ""),
+                              (hold_id,) if user_id is None else (hold_id, user_id))
+        if not holds:
+            raise NotFoundError("Seat hold not found.")
+        released, flight_ids = _release_holds(db_client, holds)
+        promoted = promote_waitlist(db_client, flight_ids)
+    return HoldRelease(released, sum(hold.tickets for hold in released), promoted)
+
+def expire_holds(db_client, limit=1000):
+    """
+    Releases up to `limit` holds whose time is up, earliest first, in one transaction.
+
+    The due holds are read off the index on their deadline, so a call costs the same
+    however many holds are still pending. Their seats go back through one counter UPDATE
+    for all flights and one seat map update per flight, then to the flights' waitlists.
+
+    Args:
+        db_client: The database client instance.
+        limit (int): Most holds released.
+
+    Returns:
+        HoldRelease: The released holds; fewer than `limit` once none are due.
+    """
+    with transaction(db_client):
+        holds = _delete_holds(db_client, "id IN (SELECT id FROM seat_holds WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)",
+                              (_hold_clock(), limit))
+        released, flight_ids = _release_holds(db_client, holds)
+        promoted = promote_waitlist(db_client, flight_ids)
+    return HoldRelease(released, sum(hold.tickets for hold in released), promoted)
+
+def next_hold_expiry(db_client):
+    """
+    Returns:
+        float: Seconds until the next hold expires (0 if one is due), None if there are no holds.
+    """
+    expires_at = db_client.execute("SELECT MIN(expires_at) FROM seat_holds").fetchone()[0]
+    if expires_at is None:
+        return None
+    return max((datetime.datetime.fromisoformat(expires_at) - datetime.datetime.now()).total_seconds(), 0.0)
+
+def my_holds(db_client, user_id):
+    """
+    Lists a passenger's seat holds.
+
+    Args:
+        db_client: The database client instance.
+        user_id (int): The ID of the passenger.
+
+    Returns:
+        list[SeatHold]: The holds, oldest first.
+    """
+    rows = db_client.query("""
+        SELECT h.id, h.flight_id, f.flight_number, h.tickets, h.seats, h.expires_at
+        FROM seat_holds h
+        JOIN flights f ON f.id = h.flight_id
+        WHERE h.user_id = ?
+        ORDER BY h.id
+    """, (user_id,)).fetchall()
+    return [SeatHold(row[0], row[1], row[2], row[3], row[4].split(",") if row[4] else [], row[5]) for row in rows]
+
+def _hold_clock(seconds=0):
+    # Hold deadlines are local times with milliseconds, which order correctly as text.
+    return (datetime.datetime.now() + datetime.timedelta(seconds=seconds)).isoformat(sep=" ", timespec="milliseconds")
+
+def _delete_holds(db_client, where, params, extra=""):
+    return db_client.execute(f"DELETE FROM seat_holds WHERE {where} RETURNING {HOLD_COLUMNS}" + (f", {extra}" if extra else ""),
+                             params).fetchall()
+
+def _release_holds(db_client, holds):
+    # Gives the seats of deleted holds back to their flights: one UPDATE for all flights and
+    # one seat map update per flight. Returns the holds and the IDs of the flights.
+    if not holds:
+        return [], []
+    seats = {}
+    labels = {}
+    for _, flight_id, tickets, hold_labels, _ in holds:
+        seats[flight_id] = seats.get(flight_id, 0) + tickets
+        if hold_labels:
+            labels.setdefault(flight_id, []).extend(hold_labels.split(","))
+    flight_numbers = dict(db_client.execute("""
+        UPDATE flights SET available_seats = available_seats + released.seats
+        FROM (
+            SELECT value ->> 0 AS flight_id, value ->> 1 AS seats FROM json_each(?)
+        ) AS released
+        WHERE flights.id = released.flight_id
+        RETURNING flights.id, flights.flight_number
+    """, (json.dumps(list(seats.items())),)).fetchall())
+    for flight_id, flight_labels in labels.items():
+        if flight_id in flight_numbers:
+            _release_seats(db_client, flight_id, flight_labels)
+    released = [SeatHold(hold_id, flight_id if flight_id in flight_numbers else None, flight_numbers.get(flight_id), tickets,
+                         hold_labels.split(",") if hold_labels else [], expires_at)
+                for hold_id, flight_id, tickets, hold_labels, expires_at in holds]
+    return released, sorted(flight_numbers)
+
+#        ************************************************************ Reports ************************************************************
+
+def flight_occupancy(db_client, limit=None):
+    """
+    Lists the load factor (booked seats over capacity) of every flight, fullest first.
+
+    Reads the trigger-maintained summary, one row per flight, instead of the bookings table.
+
+    Args:
+        db_client: The database client instance.
+        limit (int): Only return this many flights.
+
+    Returns:
+        list[FlightOccupancy]: The flights.
+    """
+    query = """
+        SELECT f.flight_number, f.from_location, f.to_location, f.departure_time,
+               f.available_seats + o.booked_seats + o.held_seats, o.booked_seats,
+               COALESCE(CAST(o.booked_seats AS REAL) / NULLIF(f.available_seats + o.booked_seats + o.held_seats, 0), 0.0) AS load_factor
+        FROM flight_occupancy o
+        JOIN flights f ON f.id = o.flight_id
+        ORDER BY load_factor DESC, f.departure_time
+    """
+    params = ()
+    if limit is not None:
+        query += " LIMIT ?"
+        params = (int(limit),)
+    return db_client.query(query, params, record_factory(FlightOccupancy)).fetchall()
+
+def route_occupancy(db_client):
+    """
+    Lists the load factor of every route, fullest first.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        list[RouteOccupancy]: The routes.
+    """
+    return db_client.query("""
+        SELECT from_location, to_location, flights, capacity, booked_seats,
+               COALESCE(CAST(booked_seats AS REAL) / NULLIF(capacity, 0), 0.0) AS load_factor
+        FROM route_occupancy
+        ORDER BY load_factor DESC, from_location, to_location
+    """, row_factory=record_factory(RouteOccupancy)).fetchall()
+
+def daily_occupancy(db_client):
+    """
+    Lists the load factor of the flights departing on every day, by day.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        list[DailyOccupancy]: The days.
+    """
+    return db_client.query("""
+        SELECT day, flights, capacity, booked_seats,
+               COALESCE(CAST(booked_seats AS REAL) / NULLIF(capacity, 0), 0.0)
+        FROM daily_occupancy
+        ORDER BY day
+    """, row_factory=record_factory(DailyOccupancy)).fetchall()
@@ -245,4 +245,28 @@ def ascii_admin_delete_flight():
  |_____/|______|______|______|  |_|  |______| |_|    |______|_____\_____|_|  |_|  |_|   
                                                                                         
                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                                           
+""")
+
+def ascii_admin_occupancy_report():
+    print("""
+   ____   _____ _____ _    _ _____        _   _  _______     __  _____  ______ _____   ____  _____ _______ 
+  / __ \ / ____/ ____| |  | |  __ \ /\   | \ | |/ ____\ \   / / |  __ \|  ____|  __ \ / __ \|  __ \__   __|
+ | |  | | |   | |    | |  | | |__) /  \  |  \| | |     \ \_/ /  | |__) | |__  | |__) | |  | | |__) | | |   
+ | |  | | |   | |    | |  | |  ___/ /\ \ | . ` | |      \   /   |  _  /|  __| |  ___/| |  | |  _  /  | |   
+ | |__| | |___| |____| |__| | |  / ____ \| |\  | |____   | |    | | \ \| |____| |    | |__| | | \ \  | |   
+  \____/ \_____\_____|\____/|_| /_/    \_\_| \_|\_____|  |_|    |_|  \_\______|_|     \____/|_|  \_\ |_|   
+                                                                                                           
+                                                                                                           
+""")
+
+def ascii_admin_reconcile_seats():
+    print("""
+  _____  ______ _____ ____  _   _  _____ _____ _      ______    _____ ______       _______ _____ 
+ |  __ \|  ____/ ____/ __ \| \ | |/ ____|_   _| |    |  ____|  / ____|  ____|   /\|__   __/ ____|
+ | |__) | |__ | |   | |  | |  \| | |      | | | |    | |__    | (___ | |__     /  \  | | | (___  
+ |  _  /|  __|| |   | |  | | . ` | |      | | | |    |  __|    \___ \|  __|   / /\ \ | |  \___ \ 
+ | | \ \| |___| |___| |__| | |\  | |____ _| |_| |____| |____   ____) | |____ / ____ \| |  ____) |
+ |_|  \_\______\_____\____/|_| \_|\_____|_____|______|______| |_____/|______/_/    \_\_| |_____/ 
+                                                                                                 
+                                                                                                 
 """)
\ No newline at end of file
@@ -0,0 +1,135 @@
+# bulk_import.py
+
+import csv
+from src.utils import user_cache
+from src.utils.validation_engine import PASSENGER_VALIDATOR
+
+PASSENGER_COLUMNS = PASSENGER_VALIDATOR.columns
+
+def _stage_chunk(db_client, chunk, seen_emails, report):
+    """
+    Validates a chunk of CSV rows and stages the valid ones.
+
+    Args:
+        db_client: The database client instance.
+        chunk (list[tuple[int, dict]]): (line number, row) pairs.
+        seen_emails (set): Emails already staged from earlier rows of the file.
+        report (csv.writer): Writer of the error report.
+
+    Returns:
+        int: The number of rejected rows.
+    """
+    result = PASSENGER_VALIDATOR.validate_rows([row for _, row in chunk])
+    rejected = len(result.errors)
+    staged = []
+    for i, values in result.valid:
+        if values[2] in seen_emails:
+            result.errors[i] = ["Duplicate email in file"]
+            rejected += 1
+            continue
+        seen_emails.add(values[2])
+        staged.append((chunk[i][0],) + values)
+
+    for i in sorted(result.errors):
+        line, row = chunk[i]
+        report.writerow([line, row.get("email"), "; ".join(result.errors[i])])
+    if staged:
+        db_client.executemany("INSERT INTO temp.passenger_import VALUES (?, ?, ?, ?, ?, ?)", staged)
+    return rejected
+
+def import_passengers(db_client, csv_path, report_path, chunk_size=1000):
+    """
+    Bulk imports passengers from a CSV file.
+
+    The file is streamed once and validated column-wise in chunks of `chunk_size` rows.
+    Duplicate emails within the file are caught in memory and valid rows are staged in a
+    temporary table. Emails that are already registered are then found with a single join
+    against 'users', and the remaining rows are inserted with `executemany` in transactions of
+    `chunk_size` rows. Rejected rows are written to a CSV report with their line number and
+    reasons.
+
+    Args:
+        db_client: The database client instance.
+        csv_path (str): Path of the CSV file, with a header naming the PASSENGER_COLUMNS.
+        report_path (str): Path of the CSV error report to write.
+        chunk_size (int): Number of rows per staging batch and per insert transaction.
+
+    Returns:
+        dict: Counts of "read", "imported" and "rejected" rows.
+
+    Raises:
+        ValueError: If the CSV header is missing required columns.
+    """
+    read = 0
+    rejected = 0
+    imported = 0
+    seen_emails = set()
+
+    db_client.execute("DROP TABLE IF EXISTS temp.passenger_import")
+    db_client.execute("""
+        CREATE TEMP TABLE passenger_import (
+            line INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            phone_number TEXT NOT NULL
+        )
+    """)
+
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as csv_file, \
+                open(report_path, "w", newline="", encoding="utf-8") as report_file:
+            reader = csv.DictReader(csv_file)
+            missing = [column for column in PASSENGER_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"CSV file is missing columns: {', '.join(missing)}")
+
+            report = csv.writer(report_file)
+            report.writerow(["line", "email", "errors"])
+
+            chunk = []
+            for row in reader:
+                read += 1
+                chunk.append((reader.line_num, row))
+                if len(chunk) >= chunk_size:
+                    rejected += _stage_chunk(db_client, chunk, seen_emails, report)
+                    chunk = []
+            if chunk:
+                rejected += _stage_chunk(db_client, chunk, seen_emails, report)
+            seen_emails.clear()
+
+            # emails that are already registered, found with one join
+            existing = db_client.execute("""
+                SELECT s.line, s.email
+                FROM temp.passenger_import s
+                JOIN users u ON u.email = s.email
+                ORDER BY s.line
+            """).fetchall()
+            for line, email in existing:
+                report.writerow([line, email, "Email already registered"])
+            rejected += len(existing)
+            db_client.execute("DELETE FROM temp.passenger_import WHERE email IN (SELECT email FROM users)")
+
+            staged = db_client.execute(
+                "SELECT name, age, email, password, phone_number, 0 FROM temp.passenger_import ORDER BY line"
+            ).fetchall()
+            cache = user_cache.UserCache()
+            for start in range(0, len(staged), chunk_size):
+                chunk = staged[start:start + chunk_size]
+                try:
+                    db_client.executemany("""
+                        INSERT INTO users (name, age, email, password, phone_number, is_admin)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, chunk)
+                    db_client.commit()
+                except Exception:
+                    db_client.rollback()
+                    raise
+                imported += len(chunk)
+                for values in chunk:
+                    cache.invalidate(email=values[2])
+    finally:
+        db_client.execute("DROP TABLE IF EXISTS temp.passenger_import")
+
+    return {"read": read, "imported": imported, "rejected": rejected}
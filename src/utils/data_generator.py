@@ -0,0 +1,292 @@
+# data_generator.py
+#
+# Synthetic users and bookings to go with RandomFlightGenerator's flights. Rows are generated
+# lazily, so datasets of millions of rows can be streamed into the database in chunks:
+#
+#   python -m src.utils.data_generator --db big.db --users 1000000 --flights 10000 --bookings 2000000 --seed 42
+
+import argparse
+import datetime
+import itertools
+import random
+import time
+from src.utils import db_client, flight_generator, schema
+
+class RandomUserGenerator:
+    """
+    Class responsible for generating random users.
+
+    Emails are derived from a running index, so every generated user is unique.
+
+    Attributes:
+        rng (random.Random): The random number generator, seedable for reproducible data.
+        FIRST_NAMES (list): First names to pick from.
+        LAST_NAMES (list): Last names to pick from.
+    """
+    FIRST_NAMES = [
+        "Ali", "Ayesha", "Bilal", "Fatima", "Hassan", "Zainab", "Omar", "Sara", "Usman", "Hina",
+        "James", "Mary", "John", "Linda", "Somchai", "Mali", "Budi", "Siti", "Raj", "Priya",
+    ]
+    LAST_NAMES = [
+        "Khan", "Ahmed", "Malik", "Hussain", "Qureshi", "Smith", "Johnson", "Brown", "Wongsakul",
+        "Santoso", "Sharma", "Patel", "Al-Harbi", "Al-Otaibi", "Butt", "Chaudhry",
+    ]
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def generate_random_phone_number(self):
+        """
+        Generates a random phone number in the format accepted by `validate_phone_number`.
+
+        Returns:
+            str: The generated phone number.
+        """
+        randint = self.rng.randint
+        return f"{randint(200, 999)}-{randint(100, 999)}-{randint(1000, 9999)}"
+
+    def generate_random_user(self, index, is_admin=False):
+        """
+        Generates a random user data entry.
+
+        Args:
+            index (int): Unique number of the user, used in the email.
+            is_admin (bool): Whether the user is an admin.
+
+        Returns:
+            list: name, age, email, password, phone_number and is_admin, in the column
+            order of the 'users' table.
+        """
+        first_name = self.rng.choice(self.FIRST_NAMES)
+        last_name = self.rng.choice(self.LAST_NAMES)
+        return [
+            f"{first_name} {last_name}",
+            self.rng.randint(1, 90),
+            f"{first_name}.{last_name}.{index}@example.com".lower(),
+            f"password{index}",
+            self.generate_random_phone_number(),
+            int(is_admin),
+        ]
+
+    def iter_users(self, num_users, admin_ratio=0.0, start=0):
+        """
+        Lazily generates random users.
+
+        Args:
+            num_users (int): The number of users to generate.
+            admin_ratio (float): Share of the users that are admins.
+            start (int): Index of the first user.
+
+        Yields:
+            list: A random user entry.
+        """
+        for i in range(start, start + num_users):
+            yield self.generate_random_user(i, self.rng.random() < admin_ratio)
+
+    def generate_users(self, num_users, admin_ratio=0.0, start=0):
+        """
+        Generates multiple random users.
+
+        Returns:
+            list: A list of random user entries, see `iter_users`.
+        """
+        return list(self.iter_users(num_users, admin_ratio, start))
+
+class RandomBookingGenerator:
+    """
+    Class responsible for generating random bookings that fit the seats of their flights.
+
+    Flight popularity follows a Zipf-like distribution: the flight of popularity rank r is
+    picked with a weight of 1 / r ** skew, so a few flights sell out while most stay partly
+    empty. A skew of 0 picks flights uniformly.
+
+    Attributes:
+        rng (random.Random): The random number generator, seedable for reproducible data.
+        skew (float): The popularity skew.
+        seats_left (dict[int, int]): Seats left on every flight after the last generation.
+    """
+    def __init__(self, seed=None, skew=1.0):
+        self.rng = random.Random(seed)
+        self.skew = skew
+        self.seats_left = {}
+
+    def _popularity(self, flight_ids):
+        ranked = list(flight_ids)
+        self.rng.shuffle(ranked)
+        return ranked, list(itertools.accumulate(1 / (rank + 1) ** self.skew for rank in range(len(ranked))))
+
+    def iter_bookings(self, user_ids, flights, num_bookings, max_tickets=4, batch_size=10000):
+        """
+        Lazily generates random bookings.
+
+        A booking that does not fit in its flight is cut down to the seats that are left;
+        once too many picks land on full flights, the full flights are dropped from the
+        popularity table. Generation stops early if every flight is full.
+
+        Args:
+            user_ids (list[int]): IDs of the passengers that book.
+            flights (list[tuple[int, int]]): (flight id, available seats) of the bookable flights.
+            num_bookings (int): The number of bookings to generate.
+            max_tickets (int): The largest number of tickets per booking.
+            batch_size (int): Number of flights picked at a time.
+
+        Yields:
+            tuple: (user_id, flight_id, tickets, booking_date) in the column order of the
+            'bookings' table.
+        """
+        self.seats_left = seats_left = {flight_id: seats for flight_id, seats in flights}
+        flight_ids, cum_weights = self._popularity(flight_id for flight_id, seats in flights if seats > 0)
+        dates = [(datetime.date.today() - datetime.timedelta(days=days)).isoformat() for days in range(61)]
+        rng = self.rng
+        generated = 0
+
+        while generated < num_bookings and flight_ids:
+            picks = rng.choices(flight_ids, cum_weights=cum_weights, k=min(batch_size, num_bookings - generated))
+            full = 0
+            for flight_id in picks:
+                left = seats_left[flight_id]
+                if not left:
+                    full += 1
+                    continue
+                tickets = min(rng.randint(1, max_tickets), left)
+                seats_left[flight_id] = left - tickets
+                generated += 1
+                yield rng.choice(user_ids), flight_id, tickets, rng.choice(dates)
+
+            if full * 4 > len(picks):
+                flight_ids, cum_weights = self._popularity(flight_id for flight_id in flight_ids if seats_left[flight_id])
+
+    def generate_bookings(self, user_ids, flights, num_bookings, max_tickets=4):
+        """
+        Generates multiple random bookings.
+
+        Returns:
+            list: A list of booking rows, see `iter_bookings`.
+        """
+        return list(self.iter_bookings(user_ids, flights, num_bookings, max_tickets))
+
+def insert_rows(db_client, query, rows, chunk_size=50000):
+    """
+    Streams rows into the database with one executemany and commit per chunk.
+
+    Args:
+        db_client: The database client instance.
+        query (str): The INSERT statement.
+        rows (Iterable[Sequence]): The rows to insert.
+        chunk_size (int): Rows per transaction.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return inserted
+        db_client.executemany(query, chunk)
+        db_client.commit()
+        inserted += len(chunk)
+
+def _timed(stats, table, func, *args):
+    started = time.perf_counter()
+    rows = func(*args)
+    elapsed = time.perf_counter() - started
+    stats[table] = {"rows": rows, "seconds": round(elapsed, 3), "rows_per_second": round(rows / elapsed) if elapsed else 0}
+    print(f"{table:10} {rows:>12,} rows  {elapsed:8.2f}s  {stats[table]['rows_per_second']:>12,} rows/s")
+    return rows
+
+def _index_users(db_client):
+    schema.create_user_search_index(db_client)
+    db_client.commit()
+    return db_client.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+def load_dataset(db_client, num_users, num_flights, num_bookings, admin_ratio=0.01, skew=1.0, capacity=None,
+                 seed=None, chunk_size=50000):
+    """
+    Generates users, flights and bookings and streams them into the database.
+
+    The flights' available seats are reduced by the generated bookings, so the data is
+    consistent with what the booking service would have produced.
+
+    Args:
+        db_client: The database client instance.
+        num_users (int): Number of users.
+        num_flights (int): Number of flights.
+        num_bookings (int): Number of bookings (fewer if every flight sells out).
+        admin_ratio (float): Share of the users that are admins.
+        skew (float): Flight popularity skew, see RandomBookingGenerator.
+        capacity (int): Seats per flight, or None to keep the generated seat counts.
+        seed (int): Random seed; the same seed yields the same dataset.
+        chunk_size (int): Rows per transaction.
+
+    Returns:
+        dict: rows, seconds and rows_per_second for every table, and for building the
+        users' search index ("users_fts").
+    """
+    schema.create_schema(db_client)
+    stats = {}
+    start = db_client.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+
+    # Building the search index once after the load is several times faster than updating
+    # it from its triggers for every user; create_schema rebuilds it if the load is interrupted.
+    if num_users:
+        schema.drop_user_search_index(db_client)
+    users = RandomUserGenerator(seed).iter_users(num_users, admin_ratio, start)
+    _timed(stats, "users", insert_rows, db_client, """
+        INSERT INTO users (name, age, email, password, phone_number, is_admin)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, users, chunk_size)
+    if num_users:
+        _timed(stats, "users_fts", _index_users, db_client)
+
+    # RandomFlightGenerator draws from the module-level generator
+    random.seed(seed)
+    generator = flight_generator.RandomFlightGenerator()
+    flights = (generator.generate_random_flight() for _ in range(num_flights))
+    if capacity is not None:
+        flights = (flight[:2] + [capacity] + flight[3:] for flight in flights)
+    first_flight = db_client.execute("SELECT COALESCE(MAX(id), 0) FROM flights").fetchone()[0]
+    _timed(stats, "flights", insert_rows, db_client, """
+        INSERT INTO flights (flight_schedule, flight_number, available_seats, from_location, to_location, departure_time, arrival_time, flight_time, gate, distance, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, flights, chunk_size)
+
+    user_ids = [row[0] for row in db_client.execute("SELECT id FROM users WHERE id > ? AND is_admin = 0", (start,))]
+    flight_seats = db_client.execute("SELECT id, available_seats FROM flights WHERE id > ?", (first_flight,)).fetchall()
+    booking_generator = RandomBookingGenerator(seed, skew)
+    bookings = booking_generator.iter_bookings(user_ids, flight_seats, num_bookings) if user_ids else ()
+    _timed(stats, "bookings", insert_rows, db_client,
+           "INSERT INTO bookings (user_id, flight_id, tickets, booking_date) VALUES (?, ?, ?, ?)",
+           bookings, chunk_size)
+
+    changed = [(seats, flight_id) for flight_id, seats in booking_generator.seats_left.items()]
+    db_client.executemany("UPDATE flights SET available_seats = ? WHERE id = ?", changed)
+    db_client.commit()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic reservation dataset.")
+    parser.add_argument("--db", help="database file (default: AIRLINE_DB_PATH or airline_reservation.db)")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--flights", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--admin-ratio", type=float, default=0.01)
+    parser.add_argument("--skew", type=float, default=1.0, help="flight popularity skew, 0 for uniform")
+    parser.add_argument("--capacity", type=int, help="seats per flight (default: the generated seat counts)")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.db:
+        db_client.DatabaseClient.db_path = args.db
+    client = db_client.DatabaseClient()
+    started = time.perf_counter()
+    stats = load_dataset(client, args.users, args.flights, args.bookings, args.admin_ratio, args.skew,
+                         args.capacity, args.seed, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    rows = sum(table["rows"] for name, table in stats.items() if name != "users_fts")
+    print(f"{'total':10} {rows:>12,} rows  {elapsed:8.2f}s  {round(rows / elapsed):>12,} rows/s")
+
+if __name__ == "__main__":
+    main()
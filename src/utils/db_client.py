@@ -1,19 +1,30 @@
 # db_client.py
 
+import os
 import sqlite3
-from threading import Lock
+import time
+from threading import Lock, local
+from src.utils import metrics, tracing
 
 class DatabaseClient:
     """
     Singleton class for managing database connections.
 
+    Every thread gets its own connection to the same database file, so the client can be
+    shared by the interactive menus and by worker threads alike.
+
     Attributes:
         _instance (DatabaseClient): The singleton instance of the class.
         _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        db_path (str): Path of the SQLite database file (env AIRLINE_DB_PATH).
+        timeout (float): Seconds to wait for a lock held by another connection.
     """
     _instance = None
     _lock = Lock()
 
+    db_path = os.environ.get("AIRLINE_DB_PATH", "airline_reservation.db")
+    timeout = 30
+
     def __new__(cls):
         """
         Creates a new instance of the DatabaseClient class if none exists.
@@ -25,23 +36,49 @@ class DatabaseClient:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super(DatabaseClient, cls).__new__(cls)
+                    cls._instance._local = local()
                     cls._instance.connect()
         return cls._instance
 
+    @property
+    def conn(self):
+        """
+        sqlite3.Connection: The connection of the calling thread, opened on first use.
+        """
+        if getattr(self._local, "conn", None) is None:
+            self.connect()
+        return self._local.conn
+
+    @property
+    def cursor(self):
+        """
+        sqlite3.Cursor: The cursor of the calling thread's connection.
+        """
+        if getattr(self._local, "conn", None) is None:
+            self.connect()
+        return self._local.cursor
+
     def connect(self):
         """
-        Establishes a connection to the SQLite database.
+        Establishes a connection to the SQLite database for the calling thread.
 
-        Creates a connection to the 'airline_reservation.db' file and sets up a cursor.
+        Creates a connection to the `db_path` file in WAL mode, so readers do not block
+        the writer, and sets up a cursor.
         """
-        self.conn = sqlite3.connect('airline_reservation.db')
-        self.cursor = self.conn.cursor()
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        self._local.conn = conn
+        self._local.cursor = conn.cursor()
 
     def close(self):
         """
-        Closes the database connection.
+        Closes the calling thread's database connection.
         """
-        self.conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            self._local.cursor = None
 
     def execute(self, query, params=None):
         """
@@ -54,19 +91,95 @@ class DatabaseClient:
         Returns:
             sqlite3.Cursor: The cursor object after executing the query.
         """
-        if params is None:
-            return self.cursor.execute(query)
-        else:
-            return self.cursor.execute(query, params)
+        name = metrics.query_name(query)
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"sql {name}", "db", {"sql": query}):
+                if params is None:
+                    return self.cursor.execute(query)
+                else:
+                    return self.cursor.execute(query, params)
+        finally:
+            metrics.MetricsRegistry().observe(metrics.QUERY_SECONDS, time.perf_counter() - started, (("query", name),))
+
+    def query(self, query, params=None, row_factory=sqlite3.Row):
+        """
+        Executes an SQL query on a new cursor whose rows are built by a row factory.
+
+        The default factory returns sqlite3.Row objects, which can be indexed by column
+        name; pass `record_factory(SomeRecord)` to get typed records instead. The rows are
+        built as they are fetched, so large results can be streamed with fetchmany().
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple): Optional parameters for parameterized queries.
+            row_factory (callable): Called as row_factory(cursor, row) for every row.
+
+        Returns:
+            sqlite3.Cursor: The cursor, ready to be iterated or fetched from.
+        """
+        name = metrics.query_name(query)
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"sql {name}", "db", {"sql": query}):
+                cursor = self.conn.cursor()
+                cursor.row_factory = row_factory
+                if params is None:
+                    return cursor.execute(query)
+                else:
+                    return cursor.execute(query, params)
+        finally:
+            metrics.MetricsRegistry().observe(metrics.QUERY_SECONDS, time.perf_counter() - started, (("query", name),))
+
+    def executemany(self, query, params_seq):
+        """
+        Executes an SQL query once for every parameter set in a single call.
+
+        Args:
+            query (str): The SQL query to execute.
+            params_seq (Iterable[tuple]): The parameter sets.
+
+        Returns:
+            sqlite3.Cursor: The cursor object after executing the query.
+        """
+        name = metrics.query_name(query)
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"sql {name}", "db", {"sql": query}):
+                return self.cursor.executemany(query, params_seq)
+        finally:
+            metrics.MetricsRegistry().observe(metrics.QUERY_SECONDS, time.perf_counter() - started, (("query", name),))
 
     def commit(self):
         """
         Commits the current transaction.
         """
-        self.conn.commit()
+        with metrics.MetricsRegistry().time(metrics.COMMIT_SECONDS), tracing.span("commit", "db"):
+            self.conn.commit()
 
     def rollback(self):
         """
         Rolls back the current transaction.
         """
         self.conn.rollback()
+
+_record_factories = {}
+
+def record_factory(record_type):
+    """
+    Returns a row factory building `record_type` objects, for use with DatabaseClient.query.
+
+    Named tuples are built from the row as it is, so the selected columns must match their
+    fields in order; other types are built with their `from_row` classmethod.
+
+    Args:
+        record_type (type): A NamedTuple class, or a class with a `from_row` classmethod.
+
+    Returns:
+        callable: The row factory.
+    """
+    factory = _record_factories.get(record_type)
+    if factory is None:
+        make = getattr(record_type, "_make", None) or record_type.from_row
+        factory = _record_factories[record_type] = lambda cursor, row: make(row)
+    return factory
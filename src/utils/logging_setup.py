@@ -0,0 +1,160 @@
+# logging_setup.py
+#
+# Process-wide logging configuration. Records are put on an in-memory queue by the thread
+# that logs them and formatted and written by a background QueueListener, so menu actions
+# and API workers never wait on terminal or file I/O.
+#
+# Configuration comes from arguments, or from the environment:
+#   AIRLINE_LOG_LEVEL   root level, e.g. INFO (default WARNING)
+#   AIRLINE_LOG_LEVELS  per-module levels, e.g. "src.passenger=DEBUG,src.utils.db_client=INFO"
+#   AIRLINE_LOG_FILE    write to this file instead of stderr
+#   AIRLINE_LOG_CONFIG  JSON file with "level", "modules", "file" and "sample_rate" keys
+
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from threading import Lock
+from src.utils.rate_limiter import TokenBucketLimiter
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s"
+
+_listener = None
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limits hot log lines.
+
+    Every call site, identified by logger name and message template, gets a token bucket:
+    records at or below `max_level` pass while the bucket has tokens and are dropped
+    otherwise. The next record that passes reports how many were dropped in between.
+
+    Attributes:
+        rate (float): Records per second let through per call site.
+        burst (int): Records let through at once before the rate applies.
+        max_level (int): Highest level that is sampled; more severe records always pass.
+        suppressed (int): Total number of dropped records.
+    """
+    def __init__(self, rate=10.0, burst=20, max_level=logging.DEBUG):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.suppressed = 0
+        self._limiter = TokenBucketLimiter(burst, rate, max_keys=10000)
+        self._dropped = {}
+        self._filter_lock = Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        with self._filter_lock:
+            if not self._limiter.allow(key):
+                self._dropped[key] = self._dropped.get(key, 0) + 1
+                self.suppressed += 1
+                return False
+            dropped = self._dropped.pop(key, 0)
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} similar lines suppressed]"
+        return True
+
+class _InProcessQueueHandler(QueueHandler):
+    # The queue never leaves the process, so records can be queued as they are: their
+    # message is only formatted by the listener thread, if a handler accepts it at all.
+    def prepare(self, record):
+        return record
+
+def parse_module_levels(spec):
+    """
+    Parses a "module=LEVEL,module=LEVEL" string.
+
+    Args:
+        spec (str): The levels, e.g. "src.passenger=DEBUG,src.admin=INFO".
+
+    Returns:
+        dict[str, str]: Level names keyed by logger name.
+
+    Raises:
+        ValueError: If an entry is not of the form module=LEVEL.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        module, sep, level = item.partition("=")
+        if not sep or not module.strip() or not level.strip():
+            raise ValueError(f"Invalid module level: {item}")
+        levels[module.strip()] = level.strip().upper()
+    return levels
+
+def _load_config():
+    config = {}
+    path = os.environ.get("AIRLINE_LOG_CONFIG")
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+    if "AIRLINE_LOG_LEVEL" in os.environ:
+        config["level"] = os.environ["AIRLINE_LOG_LEVEL"]
+    if "AIRLINE_LOG_LEVELS" in os.environ:
+        config.setdefault("modules", {}).update(parse_module_levels(os.environ["AIRLINE_LOG_LEVELS"]))
+    if "AIRLINE_LOG_FILE" in os.environ:
+        config["file"] = os.environ["AIRLINE_LOG_FILE"]
+    return config
+
+def configure_logging(level=None, module_levels=None, log_file=None, sample_rate=None):
+    """
+    Routes all logging through a queue to a background listener thread.
+
+    Arguments override the environment configuration. Calling it again replaces the
+    previous configuration.
+
+    Args:
+        level (str | int): Root log level.
+        module_levels (dict[str, str | int]): Levels of individual loggers, keyed by module name.
+        log_file (str): File to append to instead of writing to stderr.
+        sample_rate (float): Debug records per second let through per call site, 0 to disable sampling.
+
+    Returns:
+        QueueListener: The started listener.
+    """
+    global _listener
+    config = _load_config()
+    level = level if level is not None else config.get("level", "WARNING")
+    module_levels = module_levels if module_levels is not None else config.get("modules", {})
+    log_file = log_file if log_file is not None else config.get("file")
+    sample_rate = sample_rate if sample_rate is not None else config.get("sample_rate", 10.0)
+
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.FileHandler(log_file) if log_file else logging.StreamHandler()
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = _InProcessQueueHandler(log_queue)
+    if sample_rate:
+        handler.addFilter(SamplingFilter(rate=sample_rate, burst=max(1, int(sample_rate * 2))))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level if isinstance(level, int) else level.upper())
+    for module, module_level in module_levels.items():
+        logging.getLogger(module).setLevel(module_level if isinstance(module_level, int) else module_level.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """
+    Flushes the queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,334 @@
+# metrics.py
+
+import functools
+import os
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from src.utils import rate_limiter
+
+# Latency buckets in seconds, from half a millisecond to ten seconds.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ACTION_SECONDS = "airline_action_duration_seconds"
+QUERY_SECONDS = "airline_db_query_duration_seconds"
+COMMIT_SECONDS = "airline_db_commit_duration_seconds"
+
+METRICS_FILE = os.environ.get("AIRLINE_METRICS_FILE", "metrics.prom")
+
+class Histogram:
+    """
+    Fixed-bucket histogram of observed values.
+
+    Attributes:
+        buckets (tuple[float]): Upper bounds of the buckets, in increasing order.
+        counts (list[int]): Number of observations per bucket, plus one for +Inf.
+        sum (float): Sum of all observations.
+        count (int): Number of observations.
+        max (float): Largest observation.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, fraction):
+        """
+        Estimates a quantile as the upper bound of the bucket it falls in.
+
+        Args:
+            fraction (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The bucket bound, or the largest observation for the +Inf bucket.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class MetricsRegistry:
+    """
+    Singleton holding the counters and latency histograms of the process.
+
+    Every update takes a single lock for a few dictionary and list operations, so metrics
+    can be recorded from the menus, API workers and benchmark threads alike. Values that
+    other components already keep (like the login rate limiter's counters) are read by
+    collectors when the metrics are rendered instead of being copied on every change.
+
+    Attributes:
+        _instance (MetricsRegistry): The singleton instance of the class.
+        _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        enabled (bool): Whether observations are recorded at all.
+        buckets (tuple[float]): Bucket bounds of new histograms.
+    """
+    _instance = None
+    _lock = Lock()
+
+    enabled = True
+    buckets = DEFAULT_BUCKETS
+
+    def __new__(cls):
+        """
+        Creates a new instance of the MetricsRegistry class if none exists.
+
+        Returns:
+            MetricsRegistry: The singleton instance of the class.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(MetricsRegistry, cls).__new__(cls)
+                    cls._instance._metrics_lock = Lock()
+                    cls._instance._help = {}
+                    cls._instance._collectors = []
+                    cls._instance.reset()
+        return cls._instance
+
+    def reset(self):
+        """
+        Drops every recorded value. Descriptions and collectors are kept.
+        """
+        with self._metrics_lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def describe(self, name, kind, help_text):
+        """
+        Sets the type and help text rendered for a metric.
+
+        Args:
+            name (str): The metric name.
+            kind (str): "counter", "gauge" or "histogram".
+            help_text (str): One line describing the metric.
+        """
+        self._help[name] = (kind, help_text)
+
+    def add_collector(self, collector):
+        """
+        Registers a function called on every render.
+
+        Args:
+            collector (callable): Returns an iterable of (name, labels, value) samples,
+                where labels is a tuple of (label, value) pairs.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The metric name.
+            labels (tuple[tuple[str, str]]): Label pairs.
+            value (float): The increment.
+        """
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._metrics_lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        """
+        Records an observation in a histogram.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value, in seconds for latencies.
+            labels (tuple[tuple[str, str]]): Label pairs.
+        """
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._metrics_lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, labels=()):
+        """
+        Observes the time spent in the block.
+
+        Args:
+            name (str): The histogram name.
+            labels (tuple[tuple[str, str]]): Label pairs.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, labels)
+
+    def snapshot(self):
+        """
+        Copies the current values.
+
+        Returns:
+            tuple: (counters, histograms, collected), where counters and collected map
+            (name, labels) to a value and histograms map (name, labels) to a Histogram copy.
+        """
+        with self._metrics_lock:
+            counters = dict(self._counters)
+            histograms = {}
+            for key, histogram in self._histograms.items():
+                copy = histograms[key] = Histogram(histogram.buckets)
+                copy.counts = list(histogram.counts)
+                copy.sum, copy.count, copy.max = histogram.sum, histogram.count, histogram.max
+        collected = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                collected[(name, labels)] = value
+        return counters, histograms, collected
+
+    def render(self):
+        """
+        Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        counters, histograms, collected = self.snapshot()
+        families = {}
+        for (name, labels), value in counters.items():
+            families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), value in collected.items():
+            families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), histogram in histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        output = []
+        for name in sorted(families):
+            kind, help_text = self._help.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(families[name])
+        return "\n".join(output) + "\n"
+
+    def write(self, path=None):
+        """
+        Writes the Prometheus exposition text to a file, e.g. for a node exporter's textfile collector.
+
+        Args:
+            path (str): The file to write, METRICS_FILE by default.
+
+        Returns:
+            str: The path written.
+        """
+        path = path or METRICS_FILE
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+        return path
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value below which `fraction` of the sorted values fall.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_QUERY_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?: IF NOT EXISTS)?|INDEX(?: IF NOT EXISTS)? \w+ ON)\s+([\w.]+)", re.IGNORECASE)
+_query_names = {}
+
+def query_name(query):
+    """
+    Derives a low-cardinality metric label from an SQL statement: its verb and first table,
+    e.g. "select_flights". Names are cached per statement text.
+
+    Args:
+        query (str): The SQL statement.
+
+    Returns:
+        str: The query name.
+    """
+    name = _query_names.get(query)
+    if name is None:
+        words = query.split(None, 1)
+        verb = words[0].lower() if words else "unknown"
+        table = _QUERY_TABLE.search(query)
+        name = f"{verb}_{table.group(1).lower()}" if table else verb
+        if len(_query_names) < 1024:
+            _query_names[query] = name
+    return name
+
+def timed_action(dispatcher):
+    """
+    Decorates an action dispatcher taking the action name as first argument, so every
+    dispatch is recorded in ACTION_SECONDS.
+
+    Args:
+        dispatcher (str): Value of the "dispatcher" label, e.g. "passenger".
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(action, *args, **kwargs):
+            labels = (("dispatcher", dispatcher), ("action", action))
+            registry = MetricsRegistry()
+            started = time.perf_counter()
+            try:
+                return func(action, *args, **kwargs)
+            finally:
+                registry.observe(ACTION_SECONDS, time.perf_counter() - started, labels)
+        return wrapper
+    return decorator
+
+def _login_rate_limiter_collector():
+    stats = rate_limiter.LoginRateLimiter().stats()
+    return [
+        ("airline_login_attempts_total", (("result", "allowed"),), stats["allowed"]),
+        ("airline_login_attempts_total", (("result", "rejected_by_email"),), stats["rejected_by_email"]),
+        ("airline_login_attempts_total", (("result", "rejected_by_source"),), stats["rejected_by_source"]),
+        ("airline_login_rate_limiter_keys", (("kind", "email"),), stats["tracked_emails"]),
+        ("airline_login_rate_limiter_keys", (("kind", "source"),), stats["tracked_sources"]),
+    ]
+
+_registry = MetricsRegistry()
+_registry.describe(ACTION_SECONDS, "histogram", "Time spent in menu action dispatches.")
+_registry.describe(QUERY_SECONDS, "histogram", "Time spent executing SQL statements, by statement name.")
+_registry.describe(COMMIT_SECONDS, "histogram", "Time spent committing transactions.")
+_registry.describe("airline_login_attempts_total", "counter", "Login attempts seen by the rate limiter since startup.")
+_registry.describe("airline_login_rate_limiter_keys", "gauge", "Emails and sources tracked by the login rate limiter.")
+_registry.add_collector(_login_rate_limiter_collector)
@@ -0,0 +1,198 @@
+# profiling.py
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from threading import Lock
+
+class ActionStats:
+    """
+    Running totals of one profiled menu action.
+
+    Attributes:
+        calls (int): Number of profiled runs.
+        wall_seconds (float): Total wall-clock time, including time spent waiting for input.
+        cpu_seconds (float): Total CPU time of the process during the runs.
+        max_cpu_seconds (float): CPU time of the most expensive run.
+        peak_bytes (int): Largest traced memory peak of a run (memory mode only).
+        hottest (str): Function with the most own time in the last run, ignoring input().
+        last_file (str): Path of the last written profile.
+    """
+    __slots__ = ("calls", "wall_seconds", "cpu_seconds", "max_cpu_seconds", "peak_bytes", "hottest", "last_file")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.max_cpu_seconds = 0.0
+        self.peak_bytes = 0
+        self.hottest = ""
+        self.last_file = ""
+
+class ActionProfiler:
+    """
+    Singleton that profiles menu actions with cProfile and/or tracemalloc.
+
+    When a directory is configured, every MenuItem call runs under the profiler. Each run
+    writes `<seq>-<action>.pstats` (CPU mode, open with `python -m pstats`) and/or
+    `<seq>-<action>.alloc.txt` with the top allocation sites (memory mode) to the directory,
+    and running totals are kept per action for the debug summary.
+
+    Attributes:
+        _instance (ActionProfiler): The singleton instance of the class.
+        _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        directory (str): Output directory, None when profiling is off (env AIRLINE_PROFILE_DIR).
+        mode (str): "cpu", "memory" or "both" (env AIRLINE_PROFILE_MODE).
+        top (int): Number of allocation sites written per run.
+    """
+    _instance = None
+    _lock = Lock()
+
+    directory = os.environ.get("AIRLINE_PROFILE_DIR")
+    mode = os.environ.get("AIRLINE_PROFILE_MODE", "cpu")
+    top = 25
+
+    MODES = ("cpu", "memory", "both")
+    IGNORED_FUNCTIONS = ("<built-in method builtins.input>",)
+
+    def __new__(cls):
+        """
+        Creates a new instance of the ActionProfiler class if none exists.
+
+        Returns:
+            ActionProfiler: The singleton instance of the class.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(ActionProfiler, cls).__new__(cls)
+                    cls._instance.stats = {}
+                    cls._instance._sequence = itertools.count(1)
+                    cls._instance._stats_lock = Lock()
+        return cls._instance
+
+    @property
+    def enabled(self):
+        """
+        bool: Whether menu actions are profiled.
+        """
+        return self.directory is not None
+
+    def configure(self, directory, mode="cpu", top=25):
+        """
+        Turns profiling on.
+
+        Args:
+            directory (str): Directory the profiles are written to; created if missing.
+            mode (str): "cpu" for cProfile, "memory" for tracemalloc, or "both".
+            top (int): Number of allocation sites written per run.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        ActionProfiler.directory = directory
+        ActionProfiler.mode = mode
+        ActionProfiler.top = top
+
+    def call(self, label, func, *args, **kwargs):
+        """
+        Runs a menu action under the profiler and records its cost.
+
+        Args:
+            label (str): The menu item label, used in file names and the summary.
+            func (callable): The action.
+            *args: Arguments of the action.
+            **kwargs: Keyword arguments of the action.
+
+        Returns:
+            Any: The result of the action.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # next() on a count is atomic, so concurrent actions never share a file name
+        base = os.path.join(self.directory, f"{next(self._sequence):04d}-{_slug(label)}")
+        cpu = self.mode in ("cpu", "both")
+        memory = self.mode in ("memory", "both")
+
+        profiler = cProfile.Profile() if cpu else None
+        started_tracemalloc = memory and not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            wall = time.perf_counter() - wall_started
+            cpu_time = time.process_time() - cpu_started
+            if memory:
+                after = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+
+            with self._stats_lock:
+                action = self.stats.get(label)
+                if action is None:
+                    action = self.stats[label] = ActionStats()
+                action.calls += 1
+                action.wall_seconds += wall
+                action.cpu_seconds += cpu_time
+                action.max_cpu_seconds = max(action.max_cpu_seconds, cpu_time)
+
+            if profiler is not None:
+                profiler.dump_stats(base + ".pstats")
+                action.hottest = self._hottest(profiler)
+                action.last_file = base + ".pstats"
+            if memory:
+                action.peak_bytes = max(action.peak_bytes, peak)
+                self._write_allocations(base + ".alloc.txt", label, before, after)
+                action.last_file = action.last_file or base + ".alloc.txt"
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+    def _hottest(self, profiler):
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        for (filename, line, name), (_, _, own_time, _, _) in entries:
+            function = f"{os.path.basename(filename)}:{line}({name})" if filename != "~" else name
+            if function not in self.IGNORED_FUNCTIONS:
+                return f"{function} {own_time * 1000:.1f}ms"
+        return ""
+
+    def _write_allocations(self, path, label, before, after):
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        differences = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        with open(path, "w") as f:
+            f.write(f"Top {self.top} allocation sites of '{label}' (size and count change during the action)\n\n")
+            for difference in differences[:self.top]:
+                f.write(f"{difference}\n")
+
+    def summary(self):
+        """
+        Returns the profiled actions, most expensive first.
+
+        Returns:
+            list[tuple[str, ActionStats]]: (label, stats) ordered by total CPU time.
+        """
+        return sorted(self.stats.items(), key=lambda item: item[1].cpu_seconds, reverse=True)
+
+def _slug(label):
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_") or "action"
@@ -0,0 +1,182 @@
+# rate_limiter.py
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets with lazy refill.
+
+    Each key holds a bucket of at most `capacity` tokens that refills at `refill_rate`
+    tokens per second. Buckets are only refilled when they are looked at, so an idle key
+    costs nothing but its two numbers. When more than `max_keys` keys are tracked, the least
+    recently used bucket is dropped; a dropped key simply starts again with a full bucket.
+
+    Attributes:
+        capacity (float): Maximum number of tokens (burst size) per key.
+        refill_rate (float): Tokens added per second.
+        max_keys (int): Maximum number of tracked keys.
+    """
+    def __init__(self, capacity, refill_rate, max_keys=100000, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def peek(self, key, now):
+        """
+        Refills the bucket for a key and returns its current token count.
+
+        Args:
+            key (Hashable): The key of the bucket.
+            now (float): The current clock value.
+
+        Returns:
+            float: The number of tokens available for the key.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+        return bucket[0]
+
+    def consume(self, key, tokens=1):
+        """
+        Takes tokens from the bucket for a key. Must follow a call to `peek`.
+
+        Args:
+            key (Hashable): The key of the bucket.
+            tokens (float): The number of tokens to take.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] -= tokens
+
+    def allow(self, key):
+        """
+        Takes one token for a key if one is available.
+
+        Args:
+            key (Hashable): The key of the bucket.
+
+        Returns:
+            bool: True if the request is allowed, False if the key is rate limited.
+        """
+        if self.peek(key, self._clock()) < 1:
+            return False
+        self.consume(key)
+        return True
+
+class LoginRateLimiter:
+    """
+    Singleton rate limiter for login attempts.
+
+    An attempt is allowed only if both the bucket of the target email and the bucket of the
+    source (terminal, client address, ...) have a token left, so neither a single account nor
+    a single source can be hammered. Rejected attempts do not consume tokens.
+
+    Attributes:
+        _instance (LoginRateLimiter): The singleton instance of the class.
+        _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        allowed (int): Number of attempts allowed so far.
+        rejected_by_email (int): Number of attempts rejected by the per-email bucket.
+        rejected_by_source (int): Number of attempts rejected by the per-source bucket.
+    """
+    _instance = None
+    _lock = Lock()
+
+    email_capacity = 5
+    email_refill_rate = 5 / 60
+    source_capacity = 30
+    source_refill_rate = 30 / 60
+    max_keys = 100000
+
+    def __new__(cls):
+        """
+        Creates a new instance of the LoginRateLimiter class if none exists.
+
+        Returns:
+            LoginRateLimiter: The singleton instance of the class.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(LoginRateLimiter, cls).__new__(cls)
+                    cls._instance._limiter_lock = Lock()
+                    cls._instance.reset()
+        return cls._instance
+
+    def reset(self, clock=time.monotonic):
+        """
+        Forgets every bucket and zeroes the counters.
+
+        Args:
+            clock (callable): The clock used by the buckets (optional).
+        """
+        with self._limiter_lock:
+            self._clock = clock
+            self._by_email = TokenBucketLimiter(self.email_capacity, self.email_refill_rate, self.max_keys)
+            self._by_source = TokenBucketLimiter(self.source_capacity, self.source_refill_rate, self.max_keys)
+            self.allowed = 0
+            self.rejected_by_email = 0
+            self.rejected_by_source = 0
+
+    @property
+    def rejected(self):
+        """
+        int: Total number of rejected attempts.
+        """
+        return self.rejected_by_email + self.rejected_by_source
+
+    def allow(self, email, source):
+        """
+        Records a login attempt and decides whether it may proceed.
+
+        Args:
+            email (str): The email the attempt is for.
+            source (str): Where the attempt comes from.
+
+        Returns:
+            bool: True if the attempt may proceed, False if it is rate limited.
+        """
+        email = email.lower()
+        with self._limiter_lock:
+            now = self._clock()
+            if self._by_source.peek(source, now) < 1:
+                self.rejected_by_source += 1
+                return False
+            if self._by_email.peek(email, now) < 1:
+                self.rejected_by_email += 1
+                return False
+            self._by_source.consume(source)
+            self._by_email.consume(email)
+            self.allowed += 1
+            return True
+
+    def stats(self):
+        """
+        Returns the limiter counters.
+
+        Returns:
+            dict: Allowed and rejected attempt counts and the number of tracked keys.
+        """
+        with self._limiter_lock:
+            return {
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "rejected_by_email": self.rejected_by_email,
+                "rejected_by_source": self.rejected_by_source,
+                "tracked_emails": len(self._by_email),
+                "tracked_sources": len(self._by_source),
+            }
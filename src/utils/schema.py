@@ -0,0 +1,496 @@
+# schema.py
+
+def create_schema(db_client):
+    """
+    Creates the tables of the reservation system if they do not exist yet.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            phone_number TEXT NOT NULL,
+            is_admin BOOLEAN NOT NULL
+        )
+    """)
+
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS flights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            flight_schedule TEXT NOT NULL,
+            flight_number TEXT NOT NULL,
+            available_seats INTEGER NOT NULL,
+            from_location TEXT NOT NULL,
+            to_location TEXT NOT NULL,
+            departure_time DATETIME NOT NULL,
+            arrival_time DATETIME NOT NULL,
+            flight_time TEXT NOT NULL,
+            gate TEXT NOT NULL,
+            distance TEXT NOT NULL,
+            status TEXT NOT NULL
+        )
+    """)
+
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            flight_id TEXT NOT NULL,
+            tickets INTEGER NOT NULL,
+            booking_date DATE NOT NULL,
+            seats TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (flight_id) REFERENCES flights(id)
+        )
+    """)
+
+    # Bookings of cancelled flights. The flight is gone by then, so its number and departure
+    # are copied over.
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS refunds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            flight_number TEXT NOT NULL,
+            departure_time DATETIME NOT NULL,
+            tickets INTEGER NOT NULL,
+            booking_date DATE NOT NULL,
+            refund_date DATE NOT NULL,
+            reason TEXT NOT NULL
+        )
+    """)
+
+    # Requests for seats on full flights, booked when seats are released (see
+    # services.promote_waitlist). Lower priority tiers are served first, then earlier requests.
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS waitlist (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            flight_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            tickets INTEGER NOT NULL,
+            priority INTEGER NOT NULL,
+            requested_at DATETIME NOT NULL
+        )
+    """)
+
+    # Seats taken off flights until they are booked or released (see services.hold_seats).
+    # They are counted out of available_seats and marked taken in the seat maps meanwhile.
+    db_client.execute("""
+        CREATE TABLE IF NOT EXISTS seat_holds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            flight_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            tickets INTEGER NOT NULL,
+            seats TEXT,
+            expires_at DATETIME NOT NULL
+        )
+    """)
+
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_flights_number ON flights (flight_number)")
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_users_phone ON users (phone_number)")
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_refunds_user ON refunds (user_id)")
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_waitlist_user ON waitlist (user_id)")
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_user ON seat_holds (user_id)")
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_flight ON seat_holds (flight_id, tickets)")
+
+    # Holds in the order they expire: expiry reads the due ones off the front of the index,
+    # however many are pending.
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_seat_holds_expiry ON seat_holds (expires_at)")
+
+    # The waitlist of a flight in the order it is served, so promotions read it front to
+    # back from the index and stop as soon as the released seats are used up.
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_waitlist_flight ON waitlist (flight_id, priority, id, tickets, user_id)")
+
+    # Covers the flight manifest: a flight's bookings, their passengers and seats (the
+    # booking id comes along as the rowid) are read from the index alone.
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_bookings_flight_user ON bookings (flight_id, user_id, tickets)")
+
+    # Covers a passenger's bookings, and the seats they hold per flight when the passenger
+    # is deleted.
+    db_client.execute("CREATE INDEX IF NOT EXISTS idx_bookings_user_flight ON bookings (user_id, flight_id, tickets)")
+
+    create_flight_capacity(db_client)
+    create_seat_maps(db_client)
+    create_occupancy_tables(db_client)
+    create_user_search_index(db_client)
+    db_client.commit()
+
+# The number of seats of every flight as it was created. available_seats is a counter that
+# bookings and cancellations move, so this is what it is checked against: a flight's
+# available seats should always be its capacity minus the seats of its bookings.
+FLIGHT_CAPACITY_TABLE = """
+    CREATE TABLE IF NOT EXISTS flight_capacity (
+        flight_id INTEGER PRIMARY KEY,
+        seats INTEGER NOT NULL
+    )
+"""
+
+FLIGHT_CAPACITY_TRIGGERS = ("""
+    CREATE TRIGGER IF NOT EXISTS flights_capacity_insert AFTER INSERT ON flights
+    BEGIN
+        INSERT OR REPLACE INTO flight_capacity (flight_id, seats) VALUES (NEW.id, NEW.available_seats);
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS flights_capacity_delete AFTER DELETE ON flights
+    BEGIN
+        DELETE FROM flight_capacity WHERE flight_id = OLD.id;
+    END
+""")
+
+def create_flight_capacity(db_client):
+    """
+    Creates the table of flight capacities and the triggers recording them.
+
+    When the table is new, the capacity of the existing flights is taken to be their
+    available seats plus the seats of all their bookings.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    exists = db_client.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flight_capacity'").fetchone()
+    db_client.execute(FLIGHT_CAPACITY_TABLE)
+    for statement in FLIGHT_CAPACITY_TRIGGERS:
+        db_client.execute(statement)
+    if not exists:
+        db_client.execute("""
+            INSERT INTO flight_capacity (flight_id, seats)
+            SELECT f.id, f.available_seats + COALESCE(b.booked_seats, 0)
+            FROM flights f
+            LEFT JOIN (
+                SELECT CAST(flight_id AS INTEGER) AS flight_id, SUM(tickets) AS booked_seats
+                FROM bookings
+                GROUP BY 1
+            ) b ON b.flight_id = f.id
+        """)
+
+# Seat maps of the flights (see seat_map.SeatMap), created the first time a flight is booked
+# after this table exists. The labels of the seats of a booking are kept in bookings.seats,
+# separated by commas; bookings made before seats were assigned have none until their
+# flight's map is built.
+SEAT_MAPS_TABLE = """
+    CREATE TABLE IF NOT EXISTS seat_maps (
+        flight_id INTEGER PRIMARY KEY,
+        layout TEXT NOT NULL,
+        capacity INTEGER NOT NULL,
+        taken BLOB NOT NULL
+    )
+"""
+
+SEAT_MAPS_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS flights_seat_map_delete AFTER DELETE ON flights
+    BEGIN
+        DELETE FROM seat_maps WHERE flight_id = OLD.id;
+    END
+"""
+
+def create_seat_maps(db_client):
+    """
+    Creates the seat maps table and adds the seats column to bookings of older databases.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    db_client.execute(SEAT_MAPS_TABLE)
+    db_client.execute(SEAT_MAPS_TRIGGER)
+    columns = [row[1] for row in db_client.execute("PRAGMA table_info(bookings)")]
+    if "seats" not in columns:
+        db_client.execute("ALTER TABLE bookings ADD COLUMN seats TEXT")
+
+# Load factor summaries. A flight's capacity is its available seats plus its booked and
+# held seats, so booking, cancelling and holding (which move seats between the three) leave
+# it unchanged. The triggers below keep the summaries in step with every write to flights,
+# bookings and seat holds, so reports read one row per flight, route or day instead of
+# aggregating all bookings.
+OCCUPANCY_TABLES = ("""
+    CREATE TABLE IF NOT EXISTS flight_occupancy (
+        flight_id INTEGER PRIMARY KEY,
+        bookings INTEGER NOT NULL DEFAULT 0,
+        booked_seats INTEGER NOT NULL DEFAULT 0,
+        held_seats INTEGER NOT NULL DEFAULT 0
+    )
+""", """
+    CREATE TABLE IF NOT EXISTS route_occupancy (
+        from_location TEXT NOT NULL,
+        to_location TEXT NOT NULL,
+        flights INTEGER NOT NULL DEFAULT 0,
+        capacity INTEGER NOT NULL DEFAULT 0,
+        booked_seats INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (from_location, to_location)
+    ) WITHOUT ROWID
+""", """
+    CREATE TABLE IF NOT EXISTS daily_occupancy (
+        day TEXT PRIMARY KEY,
+        flights INTEGER NOT NULL DEFAULT 0,
+        capacity INTEGER NOT NULL DEFAULT 0,
+        booked_seats INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+""")
+
+# {sign} is "+" or "-" and {row} is NEW or OLD: adds or removes a flight's contribution to
+# its route and day.
+_FLIGHT_SUMMARY = """
+        INSERT INTO route_occupancy (from_location, to_location, flights, capacity, booked_seats)
+        VALUES ({row}.from_location, {row}.to_location, {sign}1,
+                {sign}({row}.available_seats
+                       + COALESCE((SELECT booked_seats + held_seats FROM flight_occupancy WHERE flight_id = {row}.id), 0)),
+                {sign}COALESCE((SELECT booked_seats FROM flight_occupancy WHERE flight_id = {row}.id), 0))
+        ON CONFLICT (from_location, to_location) DO UPDATE SET
+            flights = flights + excluded.flights,
+            capacity = capacity + excluded.capacity,
+            booked_seats = booked_seats + excluded.booked_seats;
+        INSERT INTO daily_occupancy (day, flights, capacity, booked_seats)
+        VALUES (date({row}.departure_time), {sign}1,
+                {sign}({row}.available_seats
+                       + COALESCE((SELECT booked_seats + held_seats FROM flight_occupancy WHERE flight_id = {row}.id), 0)),
+                {sign}COALESCE((SELECT booked_seats FROM flight_occupancy WHERE flight_id = {row}.id), 0))
+        ON CONFLICT (day) DO UPDATE SET
+            flights = flights + excluded.flights,
+            capacity = capacity + excluded.capacity,
+            booked_seats = booked_seats + excluded.booked_seats;
+        DELETE FROM route_occupancy WHERE from_location = {row}.from_location AND to_location = {row}.to_location AND flights = 0;
+        DELETE FROM daily_occupancy WHERE day = date({row}.departure_time) AND flights = 0;
+"""
+
+# {sign} is "+" or "-" and {row} is NEW or OLD: adds or removes a booking's seats.
+_BOOKING_SUMMARY = """
+        UPDATE flight_occupancy
+        SET bookings = bookings {sign} 1, booked_seats = booked_seats {sign} {row}.tickets
+        WHERE flight_id = {row}.flight_id;
+        UPDATE route_occupancy
+        SET capacity = capacity {sign} {row}.tickets, booked_seats = booked_seats {sign} {row}.tickets
+        WHERE from_location = (SELECT from_location FROM flights WHERE id = {row}.flight_id)
+          AND to_location = (SELECT to_location FROM flights WHERE id = {row}.flight_id);
+        UPDATE daily_occupancy
+        SET capacity = capacity {sign} {row}.tickets, booked_seats = booked_seats {sign} {row}.tickets
+        WHERE day = (SELECT date(departure_time) FROM flights WHERE id = {row}.flight_id);
+"""
+
+# {sign} is "+" or "-" and {row} is NEW or OLD: adds or removes a seat hold's seats, which
+# count towards capacity but are not booked.
+_HOLD_SUMMARY = """
+        UPDATE flight_occupancy
+        SET held_seats = held_seats {sign} {row}.tickets
+        WHERE flight_id = {row}.flight_id;
+        UPDATE route_occupancy
+        SET capacity = capacity {sign} {row}.tickets
+        WHERE from_location = (SELECT from_location FROM flights WHERE id = {row}.flight_id)
+          AND to_location = (SELECT to_location FROM flights WHERE id = {row}.flight_id);
+        UPDATE daily_occupancy
+        SET capacity = capacity {sign} {row}.tickets
+        WHERE day = (SELECT date(departure_time) FROM flights WHERE id = {row}.flight_id);
+"""
+
+OCCUPANCY_TRIGGERS = ("""
+    CREATE TRIGGER IF NOT EXISTS flights_occupancy_insert AFTER INSERT ON flights
+    BEGIN
+        INSERT OR REPLACE INTO flight_occupancy (flight_id) VALUES (NEW.id);
+""" + _FLIGHT_SUMMARY.format(sign="+", row="NEW") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS flights_occupancy_delete AFTER DELETE ON flights
+    BEGIN
+""" + _FLIGHT_SUMMARY.format(sign="-", row="OLD") + """
+        DELETE FROM flight_occupancy WHERE flight_id = OLD.id;
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS flights_occupancy_seats AFTER UPDATE OF available_seats ON flights
+    WHEN OLD.from_location = NEW.from_location AND OLD.to_location = NEW.to_location
+     AND date(OLD.departure_time) IS date(NEW.departure_time)
+    BEGIN
+        UPDATE route_occupancy SET capacity = capacity + NEW.available_seats - OLD.available_seats
+        WHERE from_location = NEW.from_location AND to_location = NEW.to_location;
+        UPDATE daily_occupancy SET capacity = capacity + NEW.available_seats - OLD.available_seats
+        WHERE day = date(NEW.departure_time);
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS flights_occupancy_move AFTER UPDATE OF available_seats, from_location, to_location, departure_time ON flights
+    WHEN OLD.from_location <> NEW.from_location OR OLD.to_location <> NEW.to_location
+      OR date(OLD.departure_time) IS NOT date(NEW.departure_time)
+    BEGIN
+""" + _FLIGHT_SUMMARY.format(sign="-", row="OLD") + _FLIGHT_SUMMARY.format(sign="+", row="NEW") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS bookings_occupancy_insert AFTER INSERT ON bookings
+    BEGIN
+""" + _BOOKING_SUMMARY.format(sign="+", row="NEW") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS bookings_occupancy_delete AFTER DELETE ON bookings
+    BEGIN
+""" + _BOOKING_SUMMARY.format(sign="-", row="OLD") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS bookings_occupancy_update AFTER UPDATE OF flight_id, tickets ON bookings
+    BEGIN
+""" + _BOOKING_SUMMARY.format(sign="-", row="OLD") + _BOOKING_SUMMARY.format(sign="+", row="NEW") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS seat_holds_occupancy_insert AFTER INSERT ON seat_holds
+    BEGIN
+""" + _HOLD_SUMMARY.format(sign="+", row="NEW") + """
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS seat_holds_occupancy_delete AFTER DELETE ON seat_holds
+    BEGIN
+""" + _HOLD_SUMMARY.format(sign="-", row="OLD") + """
+    END
+""")
+
+def create_occupancy_tables(db_client):
+    """
+    Creates the load factor summary tables and the triggers maintaining them.
+
+    When the tables are new they are filled from the existing flights, bookings and seat
+    holds. Tables from before seat holds counted towards capacity get the held_seats column
+    and new triggers, and are rebuilt.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    exists = db_client.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'flight_occupancy'").fetchone()
+    outdated = exists and "held_seats" not in [row[1] for row in db_client.execute("PRAGMA table_info(flight_occupancy)")]
+    if outdated:
+        db_client.execute("ALTER TABLE flight_occupancy ADD COLUMN held_seats INTEGER NOT NULL DEFAULT 0")
+        triggers = db_client.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%occupancy%'").fetchall()
+        for (name,) in triggers:
+            db_client.execute(f"DROP TRIGGER {name}")
+    for statement in OCCUPANCY_TABLES + OCCUPANCY_TRIGGERS:
+        db_client.execute(statement)
+    if not exists or outdated:
+        rebuild_occupancy(db_client)
+
+def rebuild_occupancy(db_client):
+    """
+    Recomputes the load factor summaries from the flights, bookings and seat_holds tables.
+
+    The caller commits.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    db_client.execute("DELETE FROM flight_occupancy")
+    db_client.execute("DELETE FROM route_occupancy")
+    db_client.execute("DELETE FROM daily_occupancy")
+    db_client.execute("""
+        INSERT INTO flight_occupancy (flight_id, bookings, booked_seats, held_seats)
+        SELECT f.id, COALESCE(b.bookings, 0), COALESCE(b.booked_seats, 0), COALESCE(h.held_seats, 0)
+        FROM flights f
+        LEFT JOIN (
+            SELECT CAST(flight_id AS INTEGER) AS flight_id, COUNT(*) AS bookings, SUM(tickets) AS booked_seats
+            FROM bookings
+            GROUP BY 1
+        ) b ON b.flight_id = f.id
+        LEFT JOIN (
+            SELECT flight_id, SUM(tickets) AS held_seats FROM seat_holds GROUP BY flight_id
+        ) h ON h.flight_id = f.id
+    """)
+    db_client.execute("""
+        INSERT INTO route_occupancy (from_location, to_location, flights, capacity, booked_seats)
+        SELECT f.from_location, f.to_location, COUNT(*), SUM(f.available_seats + o.booked_seats + o.held_seats), SUM(o.booked_seats)
+        FROM flights f
+        JOIN flight_occupancy o ON o.flight_id = f.id
+        GROUP BY f.from_location, f.to_location
+    """)
+    db_client.execute("""
+        INSERT INTO daily_occupancy (day, flights, capacity, booked_seats)
+        SELECT date(f.departure_time), COUNT(*), SUM(f.available_seats + o.booked_seats + o.held_seats), SUM(o.booked_seats)
+        FROM flights f
+        JOIN flight_occupancy o ON o.flight_id = f.id
+        GROUP BY date(f.departure_time)
+    """)
+
+# Full-text index of the users' names, emails and phone numbers. The trigram tokenizer
+# matches any substring of three or more characters, so "ahm", "@exampl" and "123-45" all
+# find their users without scanning the table. It is an external content table: the text
+# lives in 'users' only and the triggers keep the index in step with it.
+USER_SEARCH_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        name, email, phone_number,
+        content = 'users', content_rowid = 'id', tokenize = 'trigram'
+    )
+"""
+
+USER_SEARCH_TRIGGERS = ("""
+    CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users
+    BEGIN
+        INSERT INTO users_fts (rowid, name, email, phone_number) VALUES (NEW.id, NEW.name, NEW.email, NEW.phone_number);
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users
+    BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email, phone_number) VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone_number);
+    END
+""", """
+    CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name, email, phone_number ON users
+    BEGIN
+        INSERT INTO users_fts (users_fts, rowid, name, email, phone_number) VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone_number);
+        INSERT INTO users_fts (rowid, name, email, phone_number) VALUES (NEW.id, NEW.name, NEW.email, NEW.phone_number);
+    END
+""")
+
+def create_user_search_index(db_client):
+    """
+    Creates the full-text index of the users and the triggers maintaining it.
+
+    When the index is new it is built from the existing users.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    exists = db_client.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'").fetchone()
+    db_client.execute(USER_SEARCH_TABLE)
+    for statement in USER_SEARCH_TRIGGERS:
+        db_client.execute(statement)
+    if not exists:
+        rebuild_user_search_index(db_client)
+
+def drop_user_search_index(db_client):
+    """
+    Drops the full-text index of the users and its triggers, e.g. before a bulk load that
+    would otherwise update the index row by row. create_user_search_index rebuilds it.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    for trigger in ("users_fts_insert", "users_fts_delete", "users_fts_update"):
+        db_client.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    db_client.execute("DROP TABLE IF EXISTS users_fts")
+    db_client.commit()
+
+def rebuild_user_search_index(db_client):
+    """
+    Rebuilds the full-text index of the users from the 'users' table. The caller commits.
+
+    Args:
+        db_client: The database client instance.
+
+    Returns:
+        None
+    """
+    db_client.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
@@ -0,0 +1,227 @@
+# seat_map.py
+#
+# Seat maps of flights as bitmaps. A flight's cabin is laid out in rows of seat letters,
+# split into blocks by the aisles; seat i (row i // width, letter i % width) is bit i of an
+# integer that is set while the seat is taken, and the map is stored as that integer's
+# bytes. Taking or freeing a seat flips one bit, and searching for N adjacent free seats is
+# a handful of shifts and ANDs over the whole map.
+
+from functools import lru_cache
+from typing import NamedTuple
+
+class SeatLayout(NamedTuple):
+    """
+    The seat letters of a row, one string per block between aisles.
+    """
+    name: str
+    blocks: tuple
+
+    @property
+    def letters(self):
+        return "".join(self.blocks)
+
+    @property
+    def width(self):
+        return sum(len(block) for block in self.blocks)
+
+# Layouts by the largest capacity they are used for, smallest aircraft first.
+LAYOUTS = (
+    (100, SeatLayout("regional", ("AB", "CD"))),
+    (220, SeatLayout("narrow-body", ("ABC", "DEF"))),
+    (None, SeatLayout("wide-body", ("ABC", "DEFG", "HJK"))),
+)
+LAYOUTS_BY_NAME = {layout.name: layout for _, layout in LAYOUTS}
+
+def layout_for(capacity):
+    """
+    Picks the layout of an aircraft with `capacity` seats.
+
+    Args:
+        capacity (int): The number of seats.
+
+    Returns:
+        SeatLayout: The layout.
+    """
+    for limit, layout in LAYOUTS:
+        if limit is None or capacity <= limit:
+            return layout
+
+@lru_cache(maxsize=None)
+def _run_starts(layout_name, rows, count):
+    # Bits of the seats where `count` adjacent seats of the same block can start, in every row.
+    layout = LAYOUTS_BY_NAME[layout_name]
+    row_mask = 0
+    position = 0
+    for block in layout.blocks:
+        for offset in range(len(block) - count + 1):
+            row_mask |= 1 << (position + offset)
+        position += len(block)
+    every_row = sum(1 << (row * layout.width) for row in range(rows))
+    return row_mask * every_row
+
+class SeatMap:
+    """
+    The taken and free seats of a flight.
+
+    Seats beyond the capacity in the last row do not exist and are never free.
+
+    Attributes:
+        layout (SeatLayout): The seat layout.
+        capacity (int): The number of seats.
+        rows (int): The number of rows.
+        taken (int): Bitmap of the taken seats.
+    """
+    __slots__ = ("layout", "capacity", "rows", "taken")
+
+    def __init__(self, layout, capacity, taken=0):
+        self.layout = layout
+        self.capacity = capacity
+        self.rows = -(-capacity // layout.width)
+        self.taken = taken
+
+    @classmethod
+    def for_capacity(cls, capacity):
+        """
+        Builds an empty seat map for an aircraft with `capacity` seats.
+        """
+        return cls(layout_for(capacity), capacity)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a seat map from a row of the 'seat_maps' table.
+
+        Args:
+            row (tuple): (layout, capacity, taken).
+
+        Returns:
+            SeatMap: The seat map.
+        """
+        return cls(LAYOUTS_BY_NAME[row[0]], row[1], int.from_bytes(row[2], "little"))
+
+    def to_blob(self):
+        """
+        Returns:
+            bytes: The taken seats as stored in the 'seat_maps' table.
+        """
+        return self.taken.to_bytes((self.capacity + 7) // 8, "little")
+
+    @property
+    def taken_count(self):
+        return self.taken.bit_count()
+
+    @property
+    def free(self):
+        """
+        int: Bitmap of the free seats.
+        """
+        return ~self.taken & ((1 << self.capacity) - 1)
+
+    def seat(self, label):
+        """
+        Converts a seat label such as "12C" to its seat number.
+
+        Raises:
+            ValueError: If the seat does not exist on this flight.
+        """
+        label = str(label).strip().upper()
+        row, letter = label[:-1], label[-1:]
+        if not row.isdigit() or not letter or letter not in self.layout.letters:
+            raise ValueError(f"Invalid seat: {label}")
+        seat = (int(row) - 1) * self.layout.width + self.layout.letters.index(letter)
+        if int(row) < 1 or seat >= self.capacity:
+            raise ValueError(f"Seat {label} does not exist on this flight")
+        return seat
+
+    def label(self, seat):
+        """
+        Converts a seat number to its label, e.g. 0 to "1A".
+        """
+        return f"{seat // self.layout.width + 1}{self.layout.letters[seat % self.layout.width]}"
+
+    def parse(self, labels):
+        """
+        Converts seat labels (a list, or a string separated by commas or spaces) to seat numbers.
+
+        Raises:
+            ValueError: If a seat does not exist or is given twice.
+        """
+        if isinstance(labels, str):
+            labels = labels.replace(",", " ").split()
+        seats = [self.seat(label) for label in labels]
+        if len(set(seats)) != len(seats):
+            raise ValueError("A seat was given more than once")
+        return seats
+
+    def labels(self, seats):
+        return [self.label(seat) for seat in seats]
+
+    def is_free(self, seat):
+        return not self.taken >> seat & 1
+
+    def hold(self, seats):
+        for seat in seats:
+            self.taken |= 1 << seat
+
+    def release(self, seats):
+        for seat in seats:
+            self.taken &= ~(1 << seat)
+
+    def find_adjacent(self, count):
+        """
+        Finds the frontmost `count` free seats next to each other in a row, without an
+        aisle between them.
+
+        Returns:
+            list[int]: The seat numbers, or None if no row has them.
+        """
+        if count < 1 or count > max(len(block) for block in self.layout.blocks):
+            return None
+        free = self.free
+        runs = free
+        for offset in range(1, count):
+            runs &= free >> offset
+        runs &= _run_starts(self.layout.name, self.rows, count)
+        if not runs:
+            return None
+        start = (runs & -runs).bit_length() - 1
+        return list(range(start, start + count))
+
+    def allocate(self, count):
+        """
+        Picks `count` free seats: adjacent ones if a row has them, else the frontmost free seats.
+
+        Returns:
+            list[int]: The seat numbers, fewer than `count` if the flight has fewer free seats.
+        """
+        seats = self.find_adjacent(count)
+        if seats is not None:
+            return seats
+        seats = []
+        free = self.free
+        while free and len(seats) < count:
+            lowest = free & -free
+            seats.append(lowest.bit_length() - 1)
+            free ^= lowest
+        return seats
+
+    def render(self):
+        """
+        Draws the map, one line per row, with '.' for free and 'X' for taken seats.
+
+        Returns:
+            str: The drawing.
+        """
+        width = len(str(self.rows))
+        lines = [" " * (width + 2) + "  ".join(self.layout.blocks)]
+        for row in range(self.rows):
+            blocks = []
+            position = row * self.layout.width
+            for block in self.layout.blocks:
+                cells = ""
+                for seat in range(position, position + len(block)):
+                    cells += " " if seat >= self.capacity else ("." if self.is_free(seat) else "X")
+                blocks.append(cells)
+                position += len(block)
+            lines.append(f"{row + 1:>{width}}  " + "  ".join(blocks))
+        return "\n".join(lines)
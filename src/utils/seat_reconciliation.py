@@ -0,0 +1,204 @@
+# seat_reconciliation.py
+#
+# Checks every flight's available_seats counter against its bookings. The expected value is
+# the flight's capacity (see schema.FLIGHT_CAPACITY_TABLE) minus the seats booked by existing
+# passengers and the seats on hold; bookings whose passenger or flight no longer exists are orphans. Flights are
+# checked `chunk_size` at a time with one grouped query per chunk, and a repair fixes each
+# chunk in its own short transaction, so bookings are never held up for long. Run from the
+# project root:
+#
+#   python -m src.utils.seat_reconciliation --repair --json report.json
+
+import argparse
+import json
+import time
+from typing import NamedTuple
+from tabulate import tabulate
+from src import services
+from src.utils import db_client, schema
+
+class SeatDrift(NamedTuple):
+    """
+    A flight whose available seats disagree with its bookings. A positive drift means the
+    counter offers seats that are already booked, a negative one that seats were leaked.
+    """
+    flight_id: int
+    flight_number: str
+    capacity: int
+    booked_seats: int
+    held_seats: int
+    available_seats: int
+    expected_seats: int
+    drift: int
+    orphaned_bookings: int
+    orphaned_seats: int
+
+class ReconciliationReport(NamedTuple):
+    """
+    The outcome of a reconciliation run. The orphan counts include bookings of flights
+    that no longer exist; `promoted` counts the waitlisted requests booked onto repaired flights.
+    """
+    flights: int
+    drifted: list
+    orphaned_bookings: int
+    orphaned_seats: int
+    repaired: bool
+    seconds: float
+    promoted: int
+
+FLIGHT_CHUNK_END = "SELECT MAX(id) FROM (SELECT id FROM flights WHERE id > ? ORDER BY id LIMIT ?)"
+
+# Bookings are looked up by the flight's id as text, the way bookings.flight_id stores it,
+# so they are read from the covering index on (flight_id, user_id, tickets).
+FLIGHT_CHUNK = """
+    SELECT f.id, f.flight_number, c.seats,
+           COALESCE(SUM(b.tickets) FILTER (WHERE u.id IS NOT NULL), 0),
+           (SELECT COALESCE(SUM(h.tickets), 0) FROM seat_holds h WHERE h.flight_id = f.id),
+           f.available_seats,
+           COUNT(b.id) FILTER (WHERE u.id IS NULL),
+           COALESCE(SUM(b.tickets) FILTER (WHERE u.id IS NULL), 0)
+    FROM flights f
+    JOIN flight_capacity c ON c.flight_id = f.id
+    LEFT JOIN bookings b ON b.flight_id = CAST(f.id AS TEXT)
+    LEFT JOIN users u ON u.id = b.user_id
+    WHERE f.id > ? AND f.id <= ?
+    GROUP BY f.id
+"""
+
+REPAIR_ORPHANS = """
+    DELETE FROM bookings
+    WHERE flight_id IN (SELECT CAST(id AS TEXT) FROM flights WHERE id > ? AND id <= ?)
+      AND NOT EXISTS (SELECT 1 FROM users WHERE id = bookings.user_id)
+"""
+
+# Flights sold beyond their capacity are set to zero available seats and stay in the report.
+REPAIR_COUNTERS = """
+    UPDATE flights SET available_seats = MAX(expected.seats, 0)
+    FROM (
+        SELECT f.id, c.seats - COALESCE(SUM(b.tickets), 0)
+                     - (SELECT COALESCE(SUM(h.tickets), 0) FROM seat_holds h WHERE h.flight_id = f.id) AS seats
+        FROM flights f
+        JOIN flight_capacity c ON c.flight_id = f.id
+        LEFT JOIN bookings b ON b.flight_id = CAST(f.id AS TEXT)
+        WHERE f.id > ? AND f.id <= ?
+        GROUP BY f.id
+    ) AS expected
+    WHERE flights.id = expected.id AND flights.available_seats <> MAX(expected.seats, 0)
+"""
+
+MISSING_FLIGHT_BOOKINGS = """
+    SELECT COUNT(*), COALESCE(SUM(tickets), 0) FROM bookings
+    WHERE id > ? AND id <= ? AND NOT EXISTS (SELECT 1 FROM flights WHERE id = bookings.flight_id)
+"""
+
+REPAIR_MISSING_FLIGHT_BOOKINGS = """
+    DELETE FROM bookings
+    WHERE id > ? AND id <= ? AND NOT EXISTS (SELECT 1 FROM flights WHERE id = bookings.flight_id)
+"""
+
+def reconcile_seats(db_client, repair=False, chunk_size=1000, booking_chunk_size=50000):
+    """
+    Compares the available seats of every flight with its capacity and bookings.
+
+    Every repair transaction also offers the seats it frees to the repaired flights'
+    waitlists (see services.promote_waitlist).
+
+    Args:
+        db_client: The database client instance.
+        repair (bool): Delete orphaned bookings and reset drifted counters.
+        chunk_size (int): Flights checked (and repaired) per query and transaction.
+        booking_chunk_size (int): Bookings scanned per query for bookings of deleted flights.
+
+    Returns:
+        ReconciliationReport: The drifted flights, in id order, and the orphan totals.
+    """
+    started = time.perf_counter()
+    flights = 0
+    drifted = []
+    promoted = 0
+    last_id = 0
+    while True:
+        end_id = db_client.execute(FLIGHT_CHUNK_END, (last_id, chunk_size)).fetchone()[0]
+        if end_id is None:
+            break
+        chunk = []
+        for flight_id, flight_number, capacity, booked, held, available, orphaned, orphaned_seats in db_client.execute(FLIGHT_CHUNK, (last_id, end_id)):
+            flights += 1
+            expected = capacity - booked - held
+            if available != expected or orphaned:
+                chunk.append(SeatDrift(flight_id, flight_number, capacity, booked, held, available, expected,
+                                       available - expected, orphaned, orphaned_seats))
+        if chunk and repair:
+            promoted += _write(db_client, (REPAIR_ORPHANS, REPAIR_COUNTERS), (last_id, end_id),
+                               [flight.flight_id for flight in chunk])
+        drifted.extend(chunk)
+        last_id = end_id
+
+    orphaned = sum(flight.orphaned_bookings for flight in drifted)
+    orphaned_seats = sum(flight.orphaned_seats for flight in drifted)
+    last_booking = db_client.execute("SELECT COALESCE(MAX(id), 0) FROM bookings").fetchone()[0]
+    for first in range(0, last_booking, booking_chunk_size):
+        bounds = (first, first + booking_chunk_size)
+        count, seats = db_client.execute(MISSING_FLIGHT_BOOKINGS, bounds).fetchone()
+        if count and repair:
+            _write(db_client, (REPAIR_MISSING_FLIGHT_BOOKINGS,), bounds)
+        orphaned += count
+        orphaned_seats += seats
+
+    return ReconciliationReport(flights, drifted, orphaned, orphaned_seats, repair, time.perf_counter() - started, promoted)
+
+def _write(db_client, statements, params, flight_ids=()):
+    try:
+        for statement in statements:
+            db_client.execute(statement, params)
+        promoted = len(services.promote_waitlist(db_client, flight_ids)) if flight_ids else 0
+        db_client.commit()
+    except BaseException:
+        db_client.rollback()
+        raise
+    return promoted
+
+def print_report(report, limit=20):
+    """
+    Prints the drifted flights of a report and its totals.
+
+    Args:
+        report (ReconciliationReport): The report.
+        limit (int): Number of drifted flights listed, largest drift first.
+    """
+    shown = sorted(report.drifted, key=lambda flight: abs(flight.drift), reverse=True)[:limit]
+    if shown:
+        print(tabulate([(flight.flight_number, flight.capacity, flight.booked_seats, flight.held_seats, flight.available_seats,
+                         flight.expected_seats, f"{flight.drift:+d}", flight.orphaned_bookings) for flight in shown],
+                       headers=["Flight Number", "Capacity", "Booked", "Held", "Available", "Expected", "Drift", "Orphaned Bookings"],
+                       tablefmt="grid"))
+    if len(report.drifted) > len(shown):
+        print(f"... and {len(report.drifted) - len(shown)} more flight(s)")
+    print(f"Checked {report.flights} flight(s) in {report.seconds:.2f}s: {len(report.drifted)} drifted "
+          f"by {sum(abs(flight.drift) for flight in report.drifted)} seat(s) in total, "
+          f"{report.orphaned_bookings} orphaned booking(s) holding {report.orphaned_seats} seat(s)"
+          + (" (repaired)" if report.repaired and (report.drifted or report.orphaned_bookings) else "")
+          + (f", {report.promoted} waitlisted request(s) booked" if report.promoted else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the flights' available seats against their bookings.")
+    parser.add_argument("--db", help="database file (default: AIRLINE_DB_PATH or airline_reservation.db)")
+    parser.add_argument("--repair", action="store_true", help="delete orphaned bookings and reset drifted counters")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="flights per query and transaction")
+    parser.add_argument("--show", type=int, default=20, help="drifted flights listed")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.db:
+        db_client.DatabaseClient.db_path = args.db
+    client = db_client.DatabaseClient()
+    schema.create_schema(client)
+    report = reconcile_seats(client, args.repair, args.chunk_size)
+    print_report(report, args.show)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(report._asdict(), drifted=[flight._asdict() for flight in report.drifted]), f, indent=2)
+
+if __name__ == "__main__":
+    main()
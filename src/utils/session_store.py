@@ -0,0 +1,180 @@
+# session_store.py
+
+import heapq
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class Session:
+    """
+    Represents an authenticated user session.
+
+    Attributes:
+        token (str): The opaque token identifying the session.
+        user_id (int): The ID of the logged-in user.
+        name (str): The name of the logged-in user.
+        email (str): The email of the logged-in user.
+        role (int): The role of the logged-in user (1 for admins, 0 for passengers).
+        expires_at (float): Clock value after which the session is no longer valid.
+    """
+    __slots__ = ("token", "user_id", "name", "email", "role", "expires_at")
+
+    def __init__(self, token, user_id, name, email, role, expires_at):
+        self.token = token
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.role = role
+        self.expires_at = expires_at
+
+    @property
+    def is_admin(self):
+        """
+        bool: True if the session belongs to an admin user.
+        """
+        return self.role == 1
+
+    def __repr__(self):
+        return f"Session(user_id={self.user_id!r}, email={self.email!r}, role={self.role!r})"
+
+class SessionStore:
+    """
+    Thread-safe store of sessions keyed by opaque tokens.
+
+    Sessions expire after `ttl` seconds of inactivity. Expiry is driven by a min-heap of
+    deadlines, so a sweep only looks at sessions that are actually due instead of scanning
+    the whole store. Touching a session does not push a new heap entry; stale entries are
+    re-queued with the current deadline when they reach the top of the heap. When the
+    store holds `max_sessions` sessions, the least recently used one is evicted.
+
+    Attributes:
+        ttl (float): Idle lifetime of a session in seconds.
+        max_sessions (int): Maximum number of live sessions.
+    """
+    def __init__(self, ttl=1800, max_sessions=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._sessions = OrderedDict()
+        self._by_user = {}
+        self._deadlines = []
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, user_id, name, email, role):
+        """
+        Creates a new session for the given user.
+
+        Args:
+            user_id (int): The ID of the user.
+            name (str): The name of the user.
+            email (str): The email of the user.
+            role (int): The role of the user.
+
+        Returns:
+            Session: The newly created session.
+        """
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            while len(self._sessions) >= self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                self._unindex(evicted)
+
+            session = Session(secrets.token_urlsafe(24), user_id, name, email, role, now + self.ttl)
+            self._sessions[session.token] = session
+            self._by_user.setdefault(user_id, set()).add(session.token)
+            heapq.heappush(self._deadlines, (session.expires_at, session.token))
+            return session
+
+    def get(self, token):
+        """
+        Looks up a live session and extends its lifetime.
+
+        Args:
+            token (str): The session token.
+
+        Returns:
+            Session: The session, or None if the token is unknown or expired.
+        """
+        if token is None:
+            return None
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            session.expires_at = now + self.ttl
+            self._sessions.move_to_end(token)
+            return session
+
+    def delete(self, token):
+        """
+        Removes a session, e.g. on logout.
+
+        Args:
+            token (str): The session token.
+        """
+        with self._lock:
+            session = self._sessions.pop(token, None)
+            if session is not None:
+                self._unindex(session)
+
+    def revoke_user(self, user_id):
+        """
+        Removes every session belonging to a user, e.g. after the account is deleted.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            int: The number of sessions removed.
+        """
+        with self._lock:
+            tokens = self._by_user.pop(user_id, set())
+            for token in tokens:
+                self._sessions.pop(token, None)
+            return len(tokens)
+
+    def sweep(self):
+        """
+        Expires every session whose deadline has passed.
+
+        Returns:
+            int: The number of sessions expired.
+        """
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def _sweep(self, now):
+        expired = 0
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, token = heapq.heappop(deadlines)
+            session = self._sessions.get(token)
+            if session is None:
+                continue
+            if session.expires_at > now:
+                # the session was touched since this entry was queued
+                heapq.heappush(deadlines, (session.expires_at, token))
+                continue
+            del self._sessions[token]
+            self._unindex(session)
+            expired += 1
+
+        # drop heap entries left behind by deleted or evicted sessions
+        if len(deadlines) > 2 * len(self._sessions) + 64:
+            self._deadlines = [(s.expires_at, t) for t, s in self._sessions.items()]
+            heapq.heapify(self._deadlines)
+        return expired
+
+    def _unindex(self, session):
+        tokens = self._by_user.get(session.user_id)
+        if tokens is not None:
+            tokens.discard(session.token)
+            if not tokens:
+                del self._by_user[session.user_id]
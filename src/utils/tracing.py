@@ -0,0 +1,236 @@
+# tracing.py
+
+import atexit
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from itertools import count
+from threading import Lock
+
+# The span the current code runs in. NOT_SAMPLED marks a trace that lost the sampling
+# draw, so its children are skipped as cheaply as when tracing is off.
+NOT_SAMPLED = object()
+_current_span = ContextVar("current_span", default=None)
+_span_ids = count(1)
+
+class Span:
+    """
+    A timed, named section of work.
+
+    Attributes:
+        name (str): What the span measures, e.g. "sql select_flights".
+        category (str): Group of the span in the trace viewer, e.g. "db".
+        args (dict): Extra details shown with the span.
+        span_id (int): Unique number of the span.
+        parent_id (int): span_id of the enclosing span, or None for a root span.
+        started (int): perf_counter_ns() when the span was entered.
+    """
+    __slots__ = ("name", "category", "args", "span_id", "parent_id", "started", "_token")
+
+    def __init__(self, name, category, args, parent_id):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.started = 0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        args = dict(self.args) if self.args else {}
+        args["span_id"] = self.span_id
+        if self.parent_id is not None:
+            args["parent_id"] = self.parent_id
+        if exc_type is not None:
+            args["error"] = exc_type.__name__
+        Tracer().record({
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.started / 1000,
+            "dur": (ended - self.started) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+        return False
+
+class _Unsampled:
+    """
+    Context manager for a root span that lost the sampling draw.
+    """
+    __slots__ = ("_token",)
+
+    def __enter__(self):
+        self._token = _current_span.set(NOT_SAMPLED)
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+class _NoSpan:
+    """
+    Shared do-nothing context manager used when no span is recorded.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+class Tracer:
+    """
+    Singleton collecting finished spans and exporting them in the Chrome trace event format,
+    which chrome://tracing and https://ui.perfetto.dev can open.
+
+    Sampling is decided once per root span: a trace is either recorded completely or not at
+    all. With a sample rate of 0 (the default) a span costs a context variable lookup.
+
+    Attributes:
+        _instance (Tracer): The singleton instance of the class.
+        _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        sample_rate (float): Share of root spans that are recorded (env AIRLINE_TRACE_SAMPLE).
+        trace_file (str): File the spans are exported to (env AIRLINE_TRACE_FILE).
+        max_events (int): Maximum number of buffered spans; later spans are dropped.
+    """
+    _instance = None
+    _lock = Lock()
+
+    sample_rate = float(os.environ.get("AIRLINE_TRACE_SAMPLE", "0"))
+    trace_file = os.environ.get("AIRLINE_TRACE_FILE", "trace.json")
+    max_events = 100000
+
+    def __new__(cls):
+        """
+        Creates a new instance of the Tracer class if none exists.
+
+        Returns:
+            Tracer: The singleton instance of the class.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(Tracer, cls).__new__(cls)
+                    cls._instance._events_lock = Lock()
+                    cls._instance._events = []
+                    cls._instance.dropped = 0
+                    cls._instance._export_registered = False
+        return cls._instance
+
+    def configure(self, sample_rate, trace_file=None):
+        """
+        Sets the sample rate and trace file, and exports the trace when the process exits.
+
+        Args:
+            sample_rate (float): Share of root spans to record, between 0 and 1.
+            trace_file (str): File to export to.
+        """
+        Tracer.sample_rate = sample_rate
+        if trace_file:
+            Tracer.trace_file = trace_file
+        if sample_rate > 0 and not self._export_registered:
+            atexit.register(self.export)
+            self._export_registered = True
+
+    def record(self, event):
+        with self._events_lock:
+            if len(self._events) < self.max_events:
+                self._events.append(event)
+            else:
+                self.dropped += 1
+
+    def events(self):
+        """
+        Returns:
+            list[dict]: A copy of the buffered trace events.
+        """
+        with self._events_lock:
+            return list(self._events)
+
+    def clear(self):
+        """
+        Drops all buffered spans.
+        """
+        with self._events_lock:
+            self._events = []
+            self.dropped = 0
+
+    def export(self, path=None):
+        """
+        Writes the buffered spans to a JSON file in the Chrome trace event format.
+
+        Args:
+            path (str): The file to write, `trace_file` by default.
+
+        Returns:
+            str: The path written, or None if no span was recorded.
+        """
+        events = self.events()
+        if not events:
+            return None
+        path = path or self.trace_file
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped": self.dropped}}, f)
+        return path
+
+def span(name, category="app", args=None):
+    """
+    Opens a span as a context manager, nested under the current span if there is one.
+
+    Args:
+        name (str): What the span measures.
+        category (str): Group of the span in the trace viewer.
+        args (dict): Extra details shown with the span.
+
+    Returns:
+        A context manager yielding the Span, or None when it is not recorded.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        rate = Tracer.sample_rate
+        if rate <= 0:
+            return _NO_SPAN
+        if rate < 1 and random.random() >= rate:
+            return _Unsampled()
+        return Span(name, category, args, None)
+    if parent is NOT_SAMPLED:
+        return _NO_SPAN
+    return Span(name, category, args, parent.span_id)
+
+def traced_action(dispatcher):
+    """
+    Decorates an action dispatcher taking the action name as first argument, so every
+    dispatch runs in an "<dispatcher> <action>" span.
+
+    Args:
+        dispatcher (str): The dispatcher name, e.g. "passenger".
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(action, *args, **kwargs):
+            with span(f"{dispatcher} {action}", "action"):
+                return func(action, *args, **kwargs)
+        return wrapper
+    return decorator
+
+if Tracer.sample_rate > 0:
+    Tracer().configure(Tracer.sample_rate)
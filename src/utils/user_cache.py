@@ -0,0 +1,167 @@
+# user_cache.py
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class UserCache:
+    """
+    Singleton, bounded LRU cache of rows from the 'users' table.
+
+    Rows are cached by id and indexed by email. Emails that are not in the database are
+    remembered for `negative_ttl` seconds, so repeated lookups of unknown emails (e.g.
+    credential stuffing) do not reach the database. Writers must keep the cache consistent
+    by calling `put` after an update and `invalidate` after an insert or delete.
+
+    Every `put`, `invalidate` and `clear` bumps a version. A lookup that missed only stores
+    what it read if the version is unchanged once the query returns, so a row read before a
+    concurrent write never replaces what the writer stored. The cache only sees writes made
+    through this process: a user registered by another process (e.g. the API server while
+    the console runs) is found at the latest `negative_ttl` seconds after an earlier failed
+    lookup, and rows another process updates stay as cached until they are evicted.
+
+    Attributes:
+        _instance (UserCache): The singleton instance of the class.
+        _lock (Lock): Thread lock for ensuring thread-safe instantiation.
+        max_users (int): Maximum number of cached user rows.
+        max_negative (int): Maximum number of remembered unknown emails.
+        negative_ttl (float): Lifetime of a negative entry in seconds.
+    """
+    _instance = None
+    _lock = Lock()
+
+    max_users = 10000
+    max_negative = 10000
+    negative_ttl = 5
+
+    def __new__(cls):
+        """
+        Creates a new instance of the UserCache class if none exists.
+
+        Returns:
+            UserCache: The singleton instance of the class.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(UserCache, cls).__new__(cls)
+                    cls._instance._rows = OrderedDict()
+                    cls._instance._ids_by_email = {}
+                    cls._instance._unknown_emails = OrderedDict()
+                    cls._instance._version = 0
+                    cls._instance._cache_lock = Lock()
+        return cls._instance
+
+    def get_by_email(self, db_client, email):
+        """
+        Returns the users row for an email, querying the database on a miss.
+
+        Args:
+            db_client: The database client instance.
+            email (str): The email to look up.
+
+        Returns:
+            tuple: The users row, or None if no user has that email.
+        """
+        with self._cache_lock:
+            user_id = self._ids_by_email.get(email)
+            if user_id is not None:
+                self._rows.move_to_end(user_id)
+                return self._rows[user_id]
+            expires_at = self._unknown_emails.get(email)
+            if expires_at is not None:
+                if expires_at > time.monotonic():
+                    return None
+                del self._unknown_emails[email]
+            version = self._version
+
+        row = db_client.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        with self._cache_lock:
+            if self._version != version:
+                return row
+            if row is None:
+                self._unknown_emails[email] = time.monotonic() + self.negative_ttl
+                self._unknown_emails.move_to_end(email)
+                if len(self._unknown_emails) > self.max_negative:
+                    self._unknown_emails.popitem(last=False)
+            else:
+                self._store(row)
+        return row
+
+    def get_by_id(self, db_client, user_id):
+        """
+        Returns the users row for an id, querying the database on a miss.
+
+        Args:
+            db_client: The database client instance.
+            user_id (int): The id to look up.
+
+        Returns:
+            tuple: The users row, or None if no user has that id.
+        """
+        with self._cache_lock:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._rows.move_to_end(user_id)
+                return row
+            version = self._version
+
+        row = db_client.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is not None:
+            with self._cache_lock:
+                if self._version == version:
+                    self._store(row)
+        return row
+
+    def put(self, row):
+        """
+        Stores a users row, replacing any cached version of the same user.
+
+        Args:
+            row (tuple): A full row from the 'users' table.
+        """
+        with self._cache_lock:
+            self._version += 1
+            self._store(row)
+
+    def invalidate(self, email=None, user_id=None):
+        """
+        Drops the cached row and any negative entry for a user.
+
+        Args:
+            email (str): The email of the user (optional).
+            user_id (int): The id of the user (optional).
+        """
+        with self._cache_lock:
+            self._version += 1
+            if email is not None:
+                self._unknown_emails.pop(email, None)
+                if user_id is None:
+                    user_id = self._ids_by_email.get(email)
+            if user_id is not None:
+                row = self._rows.pop(user_id, None)
+                if row is not None:
+                    self._ids_by_email.pop(row[3], None)
+
+    def clear(self):
+        """
+        Empties the cache.
+        """
+        with self._cache_lock:
+            self._version += 1
+            self._rows.clear()
+            self._ids_by_email.clear()
+            self._unknown_emails.clear()
+
+    def _store(self, row):
+        # Called with the cache lock held.
+        user_id, email = row[0], row[3]
+        old = self._rows.pop(user_id, None)
+        if old is not None and old[3] != email:
+            self._ids_by_email.pop(old[3], None)
+        self._rows[user_id] = row
+        self._ids_by_email[email] = user_id
+        self._unknown_emails.pop(email, None)
+        while len(self._rows) > self.max_users:
+            _, evicted = self._rows.popitem(last=False)
+            self._ids_by_email.pop(evicted[3], None)
@@ -14,24 +14,31 @@ Main Menu:
 8. debug_fetch_flights_table: Fetches all flights.
 9. debug_fetch_bookings_table: Fetches all bookings.
 10. debug_clear_tables: Clears all tables. 
+11. debug_show_metrics: Shows action, query and commit latencies and writes them to metrics.prom.
+12. debug_show_profile_summary: Shows the most expensive menu actions when profiling is on.
 p.s. each time you run program, n new flights are generated and inserted into flights, you can setup it in main.
 
 Admin Menu:
 1. Add new Passenger: Allows admins to add new passengers to the system.
-2. Search for Passenger: Enables admins to find passenger details by ID.
-3. Update Passenger data: Admins can modify existing passenger information.
-4. Delete Passenger: Removes a passenger from the system.
-5. Display all registered Passengers: Shows a list of all registered passengers.
-6. Display Passengers for all flights or specific flight: View bookings for all flights or a particular flight.
-7. Delete Flight: Remove a flight from the system.
+2. Import Passengers from CSV: Bulk imports passengers from a CSV file and reports rejected rows.
+3. Search for Passenger: Enables admins to find passenger details by ID.
+4. Find Passengers: Finds passengers by any part (3+ characters) of their name, email or phone number, best matches first, page by page.
+5. Update Passenger data: Admins can modify existing passenger information.
+6. Delete Passenger: Removes a passenger from the system.
+7. Display all registered Passengers: Shows a list of all registered passengers.
+8. Display Passengers for all flights or specific flight: View bookings for all flights or a particular flight.
+9. Cancel Flights: Cancels flights by number, route or departure days and refunds their bookings.
+10. Occupancy report: Shows the load factor (booked seats over capacity) per day, per route and of the fullest flights.
+11. Reconcile seat inventory: Checks every flight's available seats against its bookings and optionally repairs the drift.
 0. Logout: Exit the admin menu.
 
 Passenger Menu:
-1. Book Flight: Allows passengers to book flights.
+1. Book Flight: Allows passengers to book flights, picking seats on the flight's seat map or being seated together,
+   or to join the flight's waitlist when it has too few seats left. The seats are held while the booking is confirmed.
 2. Update Personal Data: Allows passengers to update their personal information.
 3. Delete account: Removes a passenger's account from the system.
 4. Display Flight Schedules: Shows a list of all available flights.
-5. Cancel Booking: Cancels a previously booked flight.
-6. View My Bookings: Displays a list of bookings made by the passenger.
+5. Cancel Booking: Cancels a previously booked flight, or leaves a flight's waitlist.
+6. View My Bookings: Displays a list of bookings made by the passenger and their waitlist requests.
 7. Logout: Exit the passenger menu.
 """)
@@ -1,5 +1,9 @@
+import datetime
 import re
 
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+PHONE_NUMBER_PATTERN = re.compile(r'[\+\d]?(\d{2,3}[-\.\s]??\d{2,3}[-\.\s]??\d{4}|\(\d{3}\)\s*\d{3}[-\.\s]??\d{4}|\d{3}[-\.\s]??\d{4})')
+
 def validate_non_empty_string(value, field_name):
     """
     Validates that a string is not empty.
@@ -53,8 +57,7 @@ def validate_email(email):
     Raises:
         ValueError: If the email format is invalid.
     """
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-    if not re.match(pattern, email):
+    if not EMAIL_PATTERN.match(email):
         raise ValueError("Invalid email format")
     return email
 
@@ -88,7 +91,25 @@ def validate_phone_number(phone_number):
     Raises:
         ValueError: If the phone number format is invalid.
     """
-    pattern = r'[\+\d]?(\d{2,3}[-\.\s]??\d{2,3}[-\.\s]??\d{4}|\(\d{3}\)\s*\d{3}[-\.\s]??\d{4}|\d{3}[-\.\s]??\d{4})'
-    if not re.match(pattern, phone_number):
+    if not PHONE_NUMBER_PATTERN.match(phone_number):
         raise ValueError("Invalid phone number format")
-    return phone_number
\ No newline at end of file
+    return phone_number
+
+def validate_date(value, field_name):
+    """
+    Validates a date in YYYY-MM-DD format.
+
+    Args:
+        value (str): The date to validate.
+        field_name (str): The name of the field being validated.
+
+    Returns:
+        str: The date in YYYY-MM-DD format.
+
+    Raises:
+        ValueError: If the value is not a valid date.
+    """
+    try:
+        return datetime.date.fromisoformat(str(value).strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"{field_name} must be a date in YYYY-MM-DD format")
@@ -0,0 +1,142 @@
+# validation_engine.py
+
+from collections import namedtuple
+from src.utils.validate_inputs import EMAIL_PATTERN, PHONE_NUMBER_PATTERN
+
+BatchResult = namedtuple("BatchResult", ["valid", "errors"])
+BatchResult.__doc__ = """
+Result of validating a batch of rows.
+
+Attributes:
+    valid (list[tuple[int, tuple]]): (row index, cleaned values) for every row that passed.
+    errors (dict[int, list[str]]): Error messages for every row that failed, keyed by row index.
+"""
+
+# Column checks. Each one walks a whole column, appends messages for bad cells to
+# `errors` and returns the cleaned column. They follow the rules of `validate_inputs`
+# but never raise, so a row reports all of its problems at once.
+
+def _add_errors(errors, indexes, message):
+    for i in indexes:
+        errors.setdefault(i, []).append(message)
+
+def _strip_all(values):
+    return [value.strip() if value else "" for value in values]
+
+def _check_non_empty_string(values, field_name, errors):
+    cleaned = _strip_all(values)
+    _add_errors(errors, [i for i, value in enumerate(cleaned) if not value], f"{field_name} cannot be empty")
+    return cleaned
+
+def _check_positive_integer(values, field_name, errors):
+    cleaned = []
+    append = cleaned.append
+    invalid = f"{field_name} must be a valid integer"
+    not_positive = f"{field_name} must be a positive integer"
+    for i, value in enumerate(values):
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            errors.setdefault(i, []).append(invalid)
+            append(None)
+            continue
+        if number <= 0:
+            errors.setdefault(i, []).append(not_positive)
+        append(number)
+    return cleaned
+
+def _pattern_check(pattern, message):
+    match = pattern.match
+
+    def check(values, field_name, errors):
+        cleaned = _strip_all(values)
+        _add_errors(errors, [i for i, value in enumerate(cleaned) if not match(value)], message)
+        return cleaned
+    return check
+
+def _check_password(values, field_name, errors):
+    _add_errors(errors, [i for i, value in enumerate(values) if not value or len(value) < 4], "Password must be at least 8 characters long")
+    return list(values)
+
+CHECKS = {
+    "non_empty_string": _check_non_empty_string,
+    "positive_integer": _check_positive_integer,
+    "email": _pattern_check(EMAIL_PATTERN, "Invalid email format"),
+    "password": _check_password,
+    "phone_number": _pattern_check(PHONE_NUMBER_PATTERN, "Invalid phone number format"),
+}
+
+class ValidationEngine:
+    """
+    Validates whole columns of input at once with precompiled patterns.
+
+    The engine is built from a list of fields, each naming a column, one of the CHECKS and a
+    label used in error messages. Instead of raising on the first failure like
+    `validate_inputs`, it collects every error of every row.
+
+    Attributes:
+        fields (list[tuple[str, str, str]]): (column, check, label) for every validated field.
+    """
+    def __init__(self, fields):
+        for _, check, _ in fields:
+            if check not in CHECKS:
+                raise ValueError(f"Unknown check: {check}")
+        self.fields = list(fields)
+
+    @property
+    def columns(self):
+        """
+        list[str]: The names of the validated columns, in order.
+        """
+        return [column for column, _, _ in self.fields]
+
+    def validate_columns(self, columns):
+        """
+        Validates a batch given as columns.
+
+        Args:
+            columns (dict[str, list]): Equal-length lists of raw values keyed by column name.
+
+        Returns:
+            BatchResult: The cleaned rows that passed and the errors of the rows that failed.
+        """
+        errors = {}
+        cleaned = [CHECKS[check](columns[column], label, errors) for column, check, label in self.fields]
+        valid = [(i, values) for i, values in enumerate(zip(*cleaned)) if i not in errors]
+        return BatchResult(valid, errors)
+
+    def validate_rows(self, rows):
+        """
+        Validates a batch of rows by transposing it into columns.
+
+        Args:
+            rows (list[dict]): Rows of raw values keyed by column name.
+
+        Returns:
+            BatchResult: The cleaned rows that passed and the errors of the rows that failed.
+        """
+        return self.validate_columns({column: [row.get(column) for row in rows] for column in self.columns})
+
+    def validate_row(self, row):
+        """
+        Validates a single row.
+
+        Args:
+            row (dict): Raw values keyed by column name.
+
+        Returns:
+            tuple: (values, errors) where values is the tuple of cleaned values, or None if
+            any field failed, and errors is the list of messages.
+        """
+        result = self.validate_rows([row])
+        if result.valid:
+            return result.valid[0][1], []
+        return None, result.errors[0]
+
+PASSENGER_VALIDATOR = ValidationEngine([
+    ("name", "non_empty_string", "Name"),
+    ("age", "positive_integer", "Age"),
+    ("email", "email", "Email"),
+    ("password", "password", "Password"),
+    ("phone_number", "phone_number", "Phone number"),
+])